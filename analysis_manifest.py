@@ -0,0 +1,157 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+
+def text_hash(*parts):
+    """SHA-256 of the given strings"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class AnalysisManifest:
+    """What earlier runs of the text analyzer already worked out, per file and per chunk.
+
+    For every analyzed file the manifest keeps its size, mtime and content
+    hash, the hashes of its chunks, the hash of the preview it was
+    categorized from, its categorization, overall summary and finished
+    result row. Chunk analyses are stored once per (model, chunk text)
+    hash, so a chunk that moved or reappears in another file is not
+    analyzed again. A file whose size and mtime (or content hash) still
+    match is reused without any LLM request; an edited file only sends
+    its new or changed chunks. A file whose analysis did not finish keeps
+    a partial entry (see put_partial), so the chunks that did succeed
+    survive `prune` and the next run sends just the failed requests.
+    Stored in SQLite next to the analysis output.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime REAL,
+            content_hash TEXT,
+            settings TEXT,
+            chunk_keys TEXT,
+            preview_hash TEXT,
+            categorization TEXT,
+            summary TEXT,
+            result TEXT,
+            updated REAL
+        )""")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS chunks (
+            key TEXT PRIMARY KEY,
+            analysis TEXT,
+            updated REAL
+        )""")
+        self.db.commit()
+
+        # Run statistics
+        self.files_reused = 0
+        self.chunks_reused = 0
+        self.chunks_analyzed = 0
+
+    def file_entry(self, path):
+        """What is known about a file, or None"""
+        with self.lock:
+            row = self.db.execute("""SELECT size, mtime, content_hash, settings, chunk_keys, preview_hash,
+                                     categorization, summary, result FROM files WHERE path = ?""",
+                                  (str(path),)).fetchone()
+        if not row:
+            return None
+        size, mtime, content_hash, settings, chunk_keys, preview_hash, categorization, summary, result = row
+        return {
+            'size': size,
+            'mtime': mtime,
+            'content_hash': content_hash,
+            'settings': settings,
+            'chunk_keys': json.loads(chunk_keys),
+            'preview_hash': preview_hash,
+            'categorization': json.loads(categorization),
+            'summary': summary,
+            'result': json.loads(result),
+        }
+
+    def unchanged(self, path, settings, size, mtime):
+        """The stored result of a file whose size and mtime (and the analysis settings) still match, or None"""
+        entry = self.file_entry(path)
+        if entry and entry['settings'] == settings and entry['size'] == size and entry['mtime'] == mtime:
+            self.files_reused += 1
+            return entry['result']
+        return None
+
+    def touch(self, path, size, mtime):
+        """Record the new size/mtime of a file whose content hash still matched"""
+        with self.lock:
+            self.db.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ?", (size, mtime, str(path)))
+            self.db.commit()
+            self.files_reused += 1
+
+    def chunk_analyses(self, keys):
+        """{chunk key: analysis} for the keys already analyzed"""
+        found = {}
+        with self.lock:
+            for key in set(keys):
+                row = self.db.execute("SELECT analysis FROM chunks WHERE key = ?", (key,)).fetchone()
+                if row:
+                    found[key] = json.loads(row[0])
+            self.chunks_reused += sum(1 for key in keys if key in found)
+        return found
+
+    def put_chunk(self, key, analysis):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)",
+                            (key, json.dumps(analysis, ensure_ascii=False), time.time()))
+            self.db.commit()
+            self.chunks_analyzed += 1
+
+    def put_file(self, path, size, mtime, content_hash, settings, chunk_keys, preview_hash, categorization, summary,
+                 result):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                str(path), size, mtime, content_hash, settings, json.dumps(chunk_keys), preview_hash,
+                json.dumps(categorization, ensure_ascii=False), summary, json.dumps(result, ensure_ascii=False),
+                time.time()))
+            self.db.commit()
+
+    def put_partial(self, path, settings, chunk_keys, preview_hash=None, categorization=None):
+        """Record what a file whose analysis did not finish got done: its chunks and (if any) categorization.
+
+        Without a size, mtime or content hash the file is analyzed again on
+        the next run, reusing these instead of sending them again.
+        """
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, NULL, NULL, NULL, ?, ?, ?, ?, NULL, 'null', ?)", (
+                str(path), settings, json.dumps(chunk_keys), preview_hash,
+                json.dumps(categorization, ensure_ascii=False), time.time()))
+            self.db.commit()
+
+    def prune(self):
+        """Drop chunk analyses no file refers to any more; returns how many"""
+        with self.lock:
+            referenced = set()
+            for (chunk_keys,) in self.db.execute("SELECT chunk_keys FROM files"):
+                referenced.update(json.loads(chunk_keys))
+            orphans = [key for (key,) in self.db.execute("SELECT key FROM chunks") if key not in referenced]
+            self.db.executemany("DELETE FROM chunks WHERE key = ?", [(key,) for key in orphans])
+            self.db.commit()
+        return len(orphans)
+
+    def summary(self):
+        return (f"{self.files_reused} files unchanged, {self.chunks_reused} chunk analyses reused, "
+                f"{self.chunks_analyzed} chunks analyzed")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
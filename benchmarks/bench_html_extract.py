@@ -0,0 +1,182 @@
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from html_extract import MEDIA_EXTENSIONS, PARSER, PageExtractor, read_html_source
+
+# The multi-pass extraction WebScraper used before PageExtractor, frozen as it was
+
+
+def extract_content(soup):
+    """Extract main content from the webpage"""
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
+        script.decompose()
+
+    # Try to find main content areas
+    content_selectors = ['main', 'article', '.content', '.main-content', '.post-content',
+                         '.entry-content', '#content', '.container']
+
+    content = None
+    for selector in content_selectors:
+        content = soup.select_one(selector)
+        if content:
+            break
+
+    # If no specific content area found, use body
+    if not content:
+        content = soup.find('body')
+
+    return content
+
+
+def html_to_markdown(content):
+    """Convert HTML content to markdown"""
+    if not content:
+        return ""
+
+    markdown = ""
+
+    # Process different HTML elements
+    for element in content.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+        level = int(element.name[1])
+        markdown += f"\n{'#' * level} {element.get_text().strip()}\n\n"
+
+    for element in content.find_all('p'):
+        text = element.get_text().strip()
+        if text:
+            markdown += f"{text}\n\n"
+
+    for element in content.find_all(['ul', 'ol']):
+        for li in element.find_all('li'):
+            text = li.get_text().strip()
+            if text:
+                markdown += f"- {text}\n"
+        markdown += "\n"
+
+    for element in content.find_all('a'):
+        text = element.get_text().strip()
+        href = element.get('href', '')
+        if text and href:
+            markdown += f"[{text}]({href})\n"
+
+    for element in content.find_all(['strong', 'b']):
+        text = element.get_text().strip()
+        if text:
+            markdown += f"**{text}**\n"
+
+    for element in content.find_all(['em', 'i']):
+        text = element.get_text().strip()
+        if text:
+            markdown += f"*{text}*\n"
+
+    for element in content.find_all('code'):
+        text = element.get_text().strip()
+        if text:
+            markdown += f"`{text}`\n"
+
+    for element in content.find_all('pre'):
+        text = element.get_text().strip()
+        if text:
+            markdown += f"```\n{text}\n```\n\n"
+
+    # If no specific elements found, just get all text
+    if not markdown.strip():
+        markdown = content.get_text()
+
+    return markdown
+
+
+def extract_links(soup, base_url):
+    """Extract all links from the page"""
+    links = set()
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        # Convert relative URLs to absolute
+        absolute_url = urljoin(base_url, href)
+
+        # Parse the URL
+        parsed = urlparse(absolute_url)
+
+        # Filter out non-HTTP(S) links and anchors
+        if parsed.scheme in ['http', 'https'] and parsed.netloc:
+            # Remove fragment (anchor) from URL
+            clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+            if parsed.query:
+                clean_url += f"?{parsed.query}"
+            links.add(clean_url)
+
+    return links
+
+
+def extract_media_urls(soup, base_url, media_extensions):
+    """Extract all media URLs from the page"""
+    media_urls = set()
+
+    # Find images
+    for img in soup.find_all('img'):
+        src = img.get('src') or img.get('data-src')
+        if src:
+            media_urls.add(urljoin(base_url, src))
+
+    # Find videos
+    for video in soup.find_all(['video', 'source']):
+        src = video.get('src')
+        if src:
+            media_urls.add(urljoin(base_url, src))
+
+    # Find links to media files
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if any(href.lower().endswith(ext) for ext in media_extensions):
+            media_urls.add(urljoin(base_url, href))
+
+    # Find background images in style attributes
+    for element in soup.find_all(style=True):
+        style = element['style']
+        urls = re.findall(r'url\(["\']?([^"\']+)["\']?\)', style)
+        for url in urls:
+            media_urls.add(urljoin(base_url, url))
+
+    return media_urls
+
+
+def benchmark(html_dir):
+    """Pages per second for the old multi-pass extraction vs the single-pass extractor"""
+    pages = [read_html_source(path) for path in sorted(Path(html_dir).glob('*.html'))]
+    if not pages:
+        print(f"No .html files found in {html_dir}")
+        return
+
+    start = time.perf_counter()
+    for url, html in pages:
+        soup = BeautifulSoup(html, 'html.parser')
+        soup.find('title')
+        extract_links(soup, url)
+        extract_media_urls(soup, url, MEDIA_EXTENSIONS)
+        html_to_markdown(extract_content(soup))
+    before = len(pages) / (time.perf_counter() - start)
+
+    extractor = PageExtractor(MEDIA_EXTENSIONS)
+    start = time.perf_counter()
+    for url, html in pages:
+        extractor.extract(html, url)
+    after = len(pages) / (time.perf_counter() - start)
+
+    print(f"Pages: {len(pages)}")
+    print(f"Before (html.parser, multi-pass): {before:8.1f} pages/s")
+    print(f"{'After (' + PARSER + ', single pass):':<33} {after:8.1f} pages/s")
+    print(f"Speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    # Usage: python benchmarks/bench_html_extract.py <scraped_content_*/html_source>
+    if len(sys.argv) != 2:
+        print("Usage: python benchmarks/bench_html_extract.py <html_source directory>")
+        sys.exit(1)
+    benchmark(sys.argv[1])
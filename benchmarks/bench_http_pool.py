@@ -0,0 +1,61 @@
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scraper_http import create_session
+
+
+class _BenchmarkHandler(BaseHTTPRequestHandler):
+    """Tiny keep-alive capable handler serving a fixed page"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = b'<html><body>' + b'<p>benchmark</p>' * 200 + b'</body></html>'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def benchmark(request_count=500):
+    """Compare requests/second against a local server with and without pooling"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _BenchmarkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    try:
+        start = time.perf_counter()
+        for _ in range(request_count):
+            requests.get(url, timeout=10).raise_for_status()
+        unpooled = request_count / (time.perf_counter() - start)
+
+        session = create_session()
+        start = time.perf_counter()
+        for _ in range(request_count):
+            session.get(url, timeout=10).raise_for_status()
+        pooled = request_count / (time.perf_counter() - start)
+        session.close()
+    finally:
+        server.shutdown()
+
+    print(f"Requests per run: {request_count}")
+    print(f"Without pool (requests.get): {unpooled:8.1f} req/s")
+    print(f"With pooled session:         {pooled:8.1f} req/s")
+    print(f"Speedup: {pooled / unpooled:.2f}x (plain HTTP; TLS handshakes make the gap larger)")
+
+
+if __name__ == "__main__":
+    # Usage: python benchmarks/bench_http_pool.py [request_count]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    benchmark(count)
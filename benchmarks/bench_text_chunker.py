@@ -0,0 +1,72 @@
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from text_chunker import chunk_stream
+
+
+def concat_chunk_text(text, chunk_size=50000):
+    """The original TextAnalyzer.chunk_text: whole-text split and repeated concatenation"""
+    chunks = []
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    current_chunk = ""
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) + 1 <= chunk_size:
+            current_chunk += sentence + " "
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence + " "
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    if not chunks:
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    return chunks
+
+
+def transcript(megabytes):
+    """A generated transcript of short and long sentences, `megabytes` long"""
+    sentence_parts = ["Speaker one said the numbers were up.", "Really?", "Yes, by a lot!",
+                      "We should look at the quarterly report again before the meeting on Friday."]
+    text = ' '.join(sentence_parts[number % 4] + f" Item {number}." for number in range(megabytes * 25000))
+    return text[:megabytes * 1024 * 1024]
+
+
+def benchmark(megabytes=50, chunk_size=50000):
+    """Chunk a generated transcript both ways: time, peak memory and whether the chunks agree"""
+    text = transcript(megabytes)
+    blocks = [text[i:i + 1024 * 1024] for i in range(0, len(text), 1024 * 1024)]
+
+    timings = {}
+    peaks = {}
+    results = {}
+    for name in ('before', 'after'):
+        for traced in (False, True):
+            # Timed untraced; tracemalloc slows every allocation
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            if name == 'before':
+                results[name] = [len(chunk) for chunk in concat_chunk_text(text, chunk_size)]
+            else:
+                results[name] = [len(chunk) for chunk in chunk_stream(iter(blocks), chunk_size)]
+            if traced:
+                peaks[name] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                timings[name] = time.perf_counter() - start
+
+    # The text itself is allocated before tracing starts, so neither peak includes it
+    print(f"Text: {len(text) / 1024 / 1024:.0f} MB, {len(results['after'])} chunks of up to {chunk_size} characters")
+    print(f"Before (split + concatenation): {timings['before']:6.2f}s, peak {peaks['before'] / 1024 / 1024:7.1f} MB")
+    print(f"After (streamed spans):         {timings['after']:6.2f}s, peak {peaks['after'] / 1024 / 1024:7.1f} MB "
+          "(chunks not kept)")
+    print(f"Chunks identical: {results['before'] == results['after']}")
+
+
+if __name__ == "__main__":
+    # Usage: python benchmarks/bench_text_chunker.py [megabytes]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,100 @@
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from html_extract import read_html_source
+from video_patterns import VIDEO_PATTERNS, VideoUrlMatcher
+from video_scraper import VideoScraper
+
+# The one-scan-per-pattern extraction VideoScraper used before VideoUrlMatcher, frozen as it was
+
+
+def multi_pass_text_urls(text, extensions):
+    """The original VideoScraper.extract_video_urls_from_text: one full scan per pattern"""
+    video_urls = set()
+    for pattern in VIDEO_PATTERNS:
+        video_urls.update(re.findall(pattern, text, re.IGNORECASE))
+    video_urls.update(re.findall(r'["\']([^"\']+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']', text, re.IGNORECASE))
+    video_urls.update(re.findall(r'["\']\s*:\s*["\']([^"\']+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']', text, re.IGNORECASE))
+    video_urls.update(re.findall(r'data:video/[^;]+;base64,[A-Za-z0-9+/=]+', text))
+    for url in re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text):
+        if any(ext in url.lower() for ext in extensions):
+            video_urls.add(url)
+    for match in re.findall(r'["\']([^"\']*\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']', text, re.IGNORECASE):
+        if not match.startswith(('http://', 'https://', 'data:')):
+            video_urls.add(match)
+    return video_urls
+
+
+def multi_pass_attribute_urls(soup, base_url, extensions):
+    """The original attribute/script/style scans of extract_video_urls_from_html"""
+    video_urls = set()
+    for script in soup.find_all('script'):
+        if script.string:
+            for pattern in VIDEO_PATTERNS:
+                video_urls.update(re.findall(pattern, script.string, re.IGNORECASE))
+            json_pattern = r'\{[^{}]*"(?:url|src|source|video|file|stream)"[^{}]*:[^{}]*"([^"]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"]*)"[^{}]*\}'
+            for match in re.findall(json_pattern, script.string, re.IGNORECASE):
+                video_urls.add(urljoin(base_url, match))
+    for element in soup.find_all(True):
+        for attr, value in element.attrs.items():
+            if isinstance(value, str):
+                if any(keyword in attr.lower() for keyword in ['video', 'media', 'src', 'source', 'file', 'url']):
+                    if any(ext in value.lower() for ext in extensions):
+                        video_urls.add(urljoin(base_url, value))
+                for pattern in VIDEO_PATTERNS:
+                    video_urls.update(re.findall(pattern, value, re.IGNORECASE))
+    for element in soup.find_all(style=True):
+        for pattern in VIDEO_PATTERNS:
+            video_urls.update(re.findall(pattern, element['style'], re.IGNORECASE))
+    return video_urls
+
+
+def benchmark(html_dir, repeat=3):
+    """Pages per second of the multi-pass pattern scans vs VideoUrlMatcher, with an equality check"""
+    pages = [read_html_source(path) for path in sorted(Path(html_dir).glob('*.html'))]
+    if not pages:
+        print(f"No .html files found in {html_dir}")
+        return
+
+    # Bare instance: the extraction methods only need the extensions and the matcher
+    scraper = VideoScraper.__new__(VideoScraper)
+    scraper.video_extensions = {'.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.m3u8', '.webm', '.mpg', '.mpeg'}
+    scraper.matcher = VideoUrlMatcher(VIDEO_PATTERNS, scraper.video_extensions)
+    soups = [BeautifulSoup(html, 'html.parser') for url, html in pages]
+
+    results = {}
+    timings = {}
+    for name in ('before', 'after'):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for (url, html), soup in zip(pages, soups):
+                if name == 'before':
+                    found = multi_pass_text_urls(html, scraper.video_extensions)
+                    found |= multi_pass_attribute_urls(soup, url, scraper.video_extensions)
+                else:
+                    found = scraper.extract_video_urls_from_text(html)
+                    found |= scraper.attribute_video_urls(soup, url)
+                results.setdefault(name, {})[url] = found
+        timings[name] = len(pages) * repeat / (time.perf_counter() - start)
+
+    mismatches = [url for url in results['before'] if results['before'][url] != results['after'][url]]
+    print(f"Pages: {len(pages)} (x{repeat}), video URLs found: {sum(len(v) for v in results['after'].values())}")
+    print(f"Before (one scan per pattern): {timings['before']:8.1f} pages/s")
+    print(f"After (prefiltered matcher):   {timings['after']:8.1f} pages/s")
+    print(f"Speedup: {timings['after'] / timings['before']:.2f}x, pages with different results: {len(mismatches)}")
+    for url in mismatches[:5]:
+        print(f"  {url}: {sorted(results['before'][url] ^ results['after'][url])[:5]}")
+
+
+if __name__ == "__main__":
+    # Usage: python benchmarks/bench_video_patterns.py <video_links_*/html_source>
+    if len(sys.argv) != 2:
+        print("Usage: python benchmarks/bench_video_patterns.py <html_source directory>")
+        sys.exit(1)
+    benchmark(sys.argv[1])
@@ -8,6 +8,7 @@ from datetime import datetime
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
+from llm_cache import LLMResponseCache
 
 class MarkdownWikiBuilder:
     def __init__(self):
@@ -25,6 +26,9 @@ class MarkdownWikiBuilder:
         # Target word count
         self.target_words = 20000
         
+        # Responses of earlier runs, keyed by model, prompt and parameters
+        self.llm_cache = LLMResponseCache("llm_cache")
+        
     def get_api_key(self):
         """Get API key from user or file"""
         api_key_file = Path("openrouter_api_key.txt")
@@ -133,12 +137,21 @@ Format as a structured outline with clear hierarchy."""
             "temperature": 0.7
         }
         
+        # Unchanged input: answer from the cache at no API cost
+        cached = self.llm_cache.get(self.model, prompt, max_tokens, data['temperature'])
+        if cached is not None:
+            return cached
+        
         try:
             response = requests.post(self.api_url, headers=headers, json=data)
             response.raise_for_status()
             
             result = response.json()
-            return result['choices'][0]['message']['content']
+            content = result['choices'][0]['message']['content']
+            if content:
+                self.llm_cache.put(self.model, prompt, max_tokens, data['temperature'], content,
+                                   result.get('usage', {}).get('total_tokens'))
+            return content
         except Exception as e:
             print(f"API Error: {str(e)}")
             return None
@@ -426,6 +439,7 @@ Generate the complete section content:"""
             print(f"  - Markdown: {md_file}")
             print(f"  - Text: {txt_file}")
             print(f"  - Word count: {len(wiki_content.split())}")
+            print(f"  - Response cache: {self.llm_cache.summary()}")
             
             # Open output directory
             os.startfile(self.output_dir)
@@ -0,0 +1,373 @@
+import math
+import json
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+from url_canon import MemoryVisitedSet, canonicalize_url
+from rate_limiter import AdaptiveRateLimiter
+
+
+class CrawlJournal:
+    """Append-only JSON-lines checkpoint of a crawl's frontier.
+
+    Every enqueued, started and completed URL is appended as one short
+    record, plus free-form "note" records the scrapers use for per-page
+    results. Writes are buffered and flushed every `flush_interval` seconds
+    so checkpointing costs next to nothing on large crawls; a crash loses
+    at most that window, and URLs that were in flight are simply fetched
+    again on resume.
+    """
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.last_flush = time.monotonic()
+
+    def load(self):
+        """Replay the journal: (pending [(url, depth, score)], seen set, completed set, notes)"""
+        queued = {}
+        completed = set()
+        notes = []
+        if not self.path.exists():
+            return [], set(), completed, notes
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a hard kill
+                    continue
+                kind = record.get('t')
+                if kind == 'e':
+                    queued.setdefault(record['u'], (record['d'], record.get('s', 0.0)))
+                elif kind == 'c':
+                    completed.add(record['u'])
+                elif kind == 'n':
+                    notes.append(record)
+
+        pending = [(url, depth, score) for url, (depth, score) in queued.items() if url not in completed]
+        return pending, set(queued), completed, notes
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(line)
+            now = time.monotonic()
+            if now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = now
+
+    def enqueued(self, url, depth, score=0.0):
+        self.write({'t': 'e', 'u': url, 'd': depth, 's': round(score, 3)})
+
+    def started(self, url):
+        self.write({'t': 's', 'u': url})
+
+    def completed(self, url):
+        self.write({'t': 'c', 'u': url})
+
+    def note(self, kind, **data):
+        """Record scraper-specific progress (page outcomes, found items)"""
+        self.write({'t': 'n', 'k': kind, **data})
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+# Seeds are fetched before any discovered link
+SEED_SCORE = 100.0
+
+
+class LinkScorer:
+    """Best-first score of a candidate URL; higher scores are fetched sooner.
+
+    Favors links that stay on the page's host, have shallow paths and
+    descriptive anchor text, are linked from many pages, and sit close to
+    the seeds.
+    """
+
+    GENERIC_ANCHORS = {'here', 'click here', 'more', 'read more', 'link', 'this', 'next', 'previous', 'prev'}
+
+    def __init__(self, same_host=2.0, path_depth=-0.25, anchor=1.0, inlinks=0.5, crawl_depth=-1.0, keywords=()):
+        self.same_host = same_host
+        self.path_depth = path_depth
+        self.anchor = anchor
+        self.inlinks = inlinks
+        self.crawl_depth = crawl_depth
+        self.keywords = [keyword.lower() for keyword in keywords]
+
+    def base(self, url, depth):
+        segments = [segment for segment in urlparse(url).path.split('/') if segment]
+        return self.crawl_depth * depth + self.path_depth * len(segments)
+
+    def score(self, page_url, url, anchor, depth, inlinks=1):
+        score = self.base(url, depth) + self.inlink_bonus(inlinks)
+        if urlparse(page_url).netloc.lower() == urlparse(url).netloc.lower():
+            score += self.same_host
+        text = ' '.join(anchor.split()).lower() if anchor else ''
+        if len(text) >= 3 and text not in self.GENERIC_ANCHORS:
+            score += self.anchor
+        lowered_url = url.lower()
+        for keyword in self.keywords:
+            if keyword in text or keyword in lowered_url:
+                score += self.anchor
+        return score
+
+    def inlink_bonus(self, inlinks):
+        return self.inlinks * math.log2(1 + inlinks)
+
+    def sitemap_score(self, url, priority, depth):
+        """Sitemap entries: on-host, with <priority> (0..1) standing in for anchor text"""
+        return self.base(url, depth) + self.same_host + 2 * self.anchor * priority
+
+
+class CrawlEngine:
+    """Asyncio crawl loop: a best-first, per-host frontier drained by N worker coroutines.
+
+    `process_page(url, depth)` is a blocking callable (it runs in a thread
+    pool) that fetches, parses and saves one page and returns the links that
+    could be followed from it, as URLs or (url, anchor text) pairs. Each
+    host's queue is a heap ordered by `scorer`; of every page's new links
+    only the best `links_per_page` are queued, a link seen again on another
+    page moves up, and the crawl stops after `max_pages` fetches. Each host
+    gets at most `host_max_in_flight` concurrent requests and its request
+    starts are paced by `rate_limiter` (a rate_limiter.AdaptiveRateLimiter
+    the scrapers feed with responses; by default a fixed `host_delay`
+    seconds between requests), while pages from different hosts are
+    fetched in parallel, best-scored host first.
+
+    URLs are canonicalized before they enter the frontier and deduplicated
+    through `visited`, any object with `add(url) -> bool` and `in` (see
+    url_canon; defaults to an in-memory set).
+
+    With `robots` (a robots_sitemap.RobotsCache), URLs disallowed by
+    robots.txt are skipped and a host's Crawl-delay is the floor of its
+    request delay.
+
+    With a `journal`, every frontier change is checkpointed so an
+    interrupted crawl can be continued with `restore()`.
+    """
+
+    def __init__(self, process_page, max_depth=2, workers=8, host_delay=1.0, host_max_in_flight=2, journal=None,
+                 visited=None, robots=None, scorer=None, links_per_page=None, max_pages=None, rate_limiter=None):
+        self.process_page = process_page
+        self.journal = journal
+        self.robots = robots
+        self.scorer = scorer or LinkScorer()
+        self.max_depth = max_depth
+        self.workers = workers
+        self.host_delay = host_delay
+        self.host_max_in_flight = host_max_in_flight
+
+        # Fetch budgets (None = unlimited)
+        self.links_per_page = links_per_page
+        self.max_pages = max_pages
+        self.taken = 0
+
+        # Frontier: host -> heap of (-score, sequence, url, depth). A URL whose
+        # score improves is pushed again; `queued` holds its current
+        # [score, inlinks, depth] and older heap entries are skipped as stale.
+        self.frontier = {}
+        self.queued = {}
+        self.sequence = itertools.count()
+        self.seen = visited if visited is not None else MemoryVisitedSet()
+        self.pending = 0
+        self.active = 0
+
+        # Politeness bookkeeping per host
+        self.in_flight = {}
+        self.host_delays = {}  # host -> Crawl-delay from robots.txt
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(host_delay, min_delay=host_delay,
+                                                                max_delay=host_delay, burst=1)
+
+    def host_of(self, url):
+        """Return the politeness key for a URL"""
+        return urlparse(url).netloc.lower()
+
+    def enqueue(self, url, depth, score=0.0):
+        """Add a URL to the frontier unless it was already seen or is too deep"""
+        if depth > self.max_depth:
+            return False
+        url = canonicalize_url(url) or url
+        if not self.seen.add(url):
+            return False
+        if self.journal:
+            self.journal.enqueued(url, depth, score)
+        self.push(url, depth, score)
+        return True
+
+    def seed(self, urls):
+        for url in urls:
+            self.enqueue(url, 0, SEED_SCORE)
+
+    def push(self, url, depth, score=0.0):
+        host = self.host_of(url)
+        heapq.heappush(self.frontier.setdefault(host, []), (-score, next(self.sequence), url, depth))
+        self.queued[url] = [score, 1, depth]
+        self.pending += 1
+
+    def relink(self, url):
+        """A queued URL was linked again: raise its score. False if it is not queued"""
+        entry = self.queued.get(url)
+        if entry is None:
+            return False
+        score, inlinks, depth = entry
+        entry[0] = score + self.scorer.inlink_bonus(inlinks + 1) - self.scorer.inlink_bonus(inlinks)
+        entry[1] = inlinks + 1
+        heapq.heappush(self.frontier[self.host_of(url)], (-entry[0], next(self.sequence), url, depth))
+        return True
+
+    def add_links(self, page_url, links, depth):
+        """Score a page's links and queue the best `links_per_page` new ones"""
+        candidates = []
+        for link in links:
+            url, anchor = link if isinstance(link, tuple) else (link, '')
+            url = canonicalize_url(url) or url
+            if self.relink(url) or url in self.seen:
+                continue
+            candidates.append((self.scorer.score(page_url, url, anchor, depth), url))
+
+        if self.links_per_page is not None:
+            candidates = heapq.nlargest(self.links_per_page, candidates)
+        for score, url in candidates:
+            self.enqueue(url, depth, score)
+
+    def budget_spent(self):
+        return self.max_pages is not None and self.taken >= self.max_pages
+
+    def head(self, heap):
+        """Best live entry of a host heap, dropping stale ones"""
+        while heap:
+            negative_score, _, url, _ = heap[0]
+            entry = self.queued.get(url)
+            if entry is not None and entry[0] == -negative_score:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def take_ready(self):
+        """Pop the best-scored URL among hosts with a free slot, or None"""
+        if self.budget_spent():
+            return None
+        now = time.monotonic()
+        best_host = None
+        best = None
+        for host, heap in self.frontier.items():
+            if self.in_flight.get(host, 0) >= self.host_max_in_flight:
+                continue
+            if self.rate_limiter.ready_at(host, now) > now:
+                continue
+            top = self.head(heap)
+            if top is not None and (best is None or top < best):
+                best_host, best = host, top
+        if best is None:
+            return None
+
+        _, _, url, depth = heapq.heappop(self.frontier[best_host])
+        del self.queued[url]
+        self.pending -= 1
+        self.active += 1
+        self.taken += 1
+        self.in_flight[best_host] = self.in_flight.get(best_host, 0) + 1
+        self.rate_limiter.acquire(best_host, now)
+        return best_host, url, depth
+
+    def seconds_until_ready(self):
+        """Time until the earliest host may send again (None = wait for a page to finish)"""
+        if self.budget_spent():
+            return None
+        now = time.monotonic()
+        waits = [
+            self.rate_limiter.ready_at(host, now) - now
+            for host, heap in self.frontier.items()
+            if self.head(heap) is not None and self.in_flight.get(host, 0) < self.host_max_in_flight
+        ]
+        if not waits:
+            return None
+        return max(0.0, min(waits))
+
+    async def worker(self, executor, wakeup):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = self.take_ready()
+            if item is None:
+                if self.active == 0 and (self.pending == 0 or self.budget_spent()):
+                    # Nothing queued (or no budget left) and nothing running: the crawl is done
+                    wakeup.set()
+                    return
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.seconds_until_ready())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            host, url, depth = item
+            if self.journal:
+                self.journal.started(url)
+            links = []
+            try:
+                if self.robots and not await loop.run_in_executor(executor, self.allowed, host, url):
+                    print(f"{'  ' * depth}Disallowed by robots.txt: {url}")
+                else:
+                    links = await loop.run_in_executor(executor, self.process_page, url, depth)
+            except Exception as e:
+                print(f"{'  ' * depth}Error processing {url}: {str(e)}")
+            finally:
+                self.active -= 1
+                self.in_flight[host] -= 1
+
+            if depth < self.max_depth and links:
+                self.add_links(url, links, depth + 1)
+
+            # Children are journaled before the page counts as completed
+            if self.journal:
+                self.journal.completed(url)
+            wakeup.set()
+
+    def allowed(self, host, url):
+        """Check robots.txt (fetched on first use) and pick up the host's Crawl-delay"""
+        if host not in self.host_delays:
+            delay = self.robots.crawl_delay(url)
+            self.host_delays[host] = delay or 0
+            if delay:
+                self.rate_limiter.set_floor(host, delay)
+                print(f"Crawl-delay for {host}: {delay}s")
+        return self.robots.allowed(url)
+
+    async def crawl(self, seed_urls=()):
+        """Crawl from the seed URLs until the frontier is exhausted"""
+        self.seed(seed_urls)
+
+        wakeup = asyncio.Event()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                await asyncio.gather(*(self.worker(executor, wakeup) for _ in range(self.workers)))
+        finally:
+            if self.journal:
+                self.journal.close()
+
+    def restore(self, pending, seen):
+        """Load a journaled frontier; completed URLs stay in `seen` and are never refetched"""
+        for url in seen:
+            self.seen.add(url)
+        for url, depth, score in pending:
+            self.push(url, depth, score)
+
+    def run(self, seed_urls=()):
+        """Blocking entry point for the scrapers"""
+        asyncio.run(self.crawl(seed_urls))
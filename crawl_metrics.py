@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# Upper bounds of the histogram buckets (Prometheus style, cumulative)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Crawl phases timed per page
+PHASES = ('ttfb', 'download', 'parse', 'extract', 'media', 'write')
+
+
+@contextmanager
+def timed(timings, phase):
+    """Add the time spent in the block to timings[phase]"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+def histogram_lines(name, hist, labels=''):
+    """Prometheus exposition lines for one histogram"""
+    prefix = labels + ',' if labels else ''
+    suffix = f'{{{labels}}}' if labels else ''
+    lines = []
+    running = 0
+    for bound, count in zip(hist.buckets, hist.counts):
+        running += count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {running}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {hist.count}')
+    lines.append(f'{name}_sum{suffix} {hist.total:.6f}')
+    lines.append(f'{name}_count{suffix} {hist.count}')
+    return lines
+
+
+class CrawlMetrics:
+    """Per-phase timings, size/latency histograms and per-host counters for a crawl.
+
+    Every page is appended to `metrics.jsonl` as one JSON record (URL,
+    host, status, bytes, retries and seconds per phase). A Prometheus text
+    exposition of the aggregates is rewritten to `metrics.prom` every
+    `live_interval` seconds and at the end of the crawl, when a live
+    throughput line is also printed, so a running crawl can be watched
+    with `tail -f` or scraped by node_exporter's textfile collector.
+    """
+
+    def __init__(self, output_dir, live_interval=10.0, write_jsonl=True, write_prometheus=True):
+        self.output_dir = Path(output_dir)
+        self.live_interval = live_interval
+        self.write_prometheus = write_prometheus
+        self.lock = threading.Lock()
+        self.jsonl = open(self.output_dir / "metrics.jsonl", 'a', encoding='utf-8') if write_jsonl else None
+
+        self.phases = {phase: Histogram(SECONDS_BUCKETS) for phase in PHASES}
+        self.latency = Histogram(SECONDS_BUCKETS)
+        self.page_bytes = Histogram(BYTES_BUCKETS)
+        self.hosts = {}  # host -> {'pages', 'errors', 'retries', 'bytes'}
+        self.statuses = {}
+        self.pages = 0
+        self.errors = 0
+        self.bytes = 0
+
+        self.started = time.monotonic()
+        self.last_report = (self.started, 0, 0)
+        self.stop = threading.Event()
+        self.reporter = None
+
+    def host_counters(self, host):
+        return self.hosts.setdefault(host, {'pages': 0, 'errors': 0, 'retries': 0, 'bytes': 0})
+
+    def page(self, url, host, status, size, timings, retries=0):
+        """Record one fetched page"""
+        latency = timings.get('ttfb', 0.0) + timings.get('download', 0.0)
+        with self.lock:
+            self.pages += 1
+            self.bytes += size
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            counters = self.host_counters(host)
+            counters['pages'] += 1
+            counters['bytes'] += size
+            counters['retries'] += retries
+            self.latency.observe(latency)
+            self.page_bytes.observe(size)
+            for phase, seconds in timings.items():
+                if phase in self.phases:
+                    self.phases[phase].observe(seconds)
+            if self.jsonl:
+                record = {'ts': round(time.time(), 3), 'url': url, 'host': host, 'status': status,
+                          'bytes': size, 'retries': retries}
+                record.update({phase: round(seconds, 4) for phase, seconds in timings.items()})
+                self.jsonl.write(json.dumps(record) + "\n")
+
+    def error(self, url, host, kind, retries=0):
+        """Record a failed fetch (exception or HTTP error status)"""
+        with self.lock:
+            self.errors += 1
+            counters = self.host_counters(host)
+            counters['errors'] += 1
+            counters['retries'] += retries
+            if self.jsonl:
+                self.jsonl.write(json.dumps({'ts': round(time.time(), 3), 'url': url, 'host': host,
+                                             'error': kind, 'retries': retries}) + "\n")
+
+    def throughput_line(self):
+        now = time.monotonic()
+        with self.lock:
+            last_time, last_pages, last_bytes = self.last_report
+            interval = max(now - last_time, 1e-9)
+            pages_per_second = (self.pages - last_pages) / interval
+            megabytes_per_second = (self.bytes - last_bytes) / interval / 1024 / 1024
+            self.last_report = (now, self.pages, self.bytes)
+            p50, p95 = self.latency.quantile(0.5), self.latency.quantile(0.95)
+            return (f"[metrics] {self.pages} pages, {self.errors} errors, {pages_per_second:.1f} pages/s, "
+                    f"{megabytes_per_second:.2f} MB/s, latency p50<={p50}s p95<={p95}s")
+
+    def summary(self):
+        """Whole-crawl totals for the final report"""
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            return (f"{self.pages} pages, {self.errors} errors, {self.pages / elapsed:.1f} pages/s overall, "
+                    f"latency p50<={self.latency.quantile(0.5)}s p95<={self.latency.quantile(0.95)}s")
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            lines += ["# HELP crawl_pages_total Pages fetched", "# TYPE crawl_pages_total counter",
+                      f"crawl_pages_total {self.pages}",
+                      "# HELP crawl_errors_total Failed fetches", "# TYPE crawl_errors_total counter",
+                      f"crawl_errors_total {self.errors}",
+                      "# HELP crawl_bytes_total Page bytes downloaded", "# TYPE crawl_bytes_total counter",
+                      f"crawl_bytes_total {self.bytes}",
+                      "# HELP crawl_responses_total Responses by HTTP status", "# TYPE crawl_responses_total counter"]
+            lines += [f'crawl_responses_total{{status="{status}"}} {count}' for status, count in sorted(self.statuses.items())]
+            for name in ('pages', 'errors', 'retries', 'bytes'):
+                lines += [f"# HELP crawl_host_{name}_total Per-host {name}", f"# TYPE crawl_host_{name}_total counter"]
+                lines += [f'crawl_host_{name}_total{{host="{host}"}} {counters[name]}'
+                          for host, counters in sorted(self.hosts.items())]
+            lines += ["# HELP crawl_page_latency_seconds Request start to last body byte",
+                      "# TYPE crawl_page_latency_seconds histogram"]
+            lines += histogram_lines("crawl_page_latency_seconds", self.latency)
+            lines += ["# HELP crawl_page_bytes Page body size", "# TYPE crawl_page_bytes histogram"]
+            lines += histogram_lines("crawl_page_bytes", self.page_bytes)
+            lines += ["# HELP crawl_phase_seconds Time per page in each crawl phase",
+                      "# TYPE crawl_phase_seconds histogram"]
+            for phase, hist in self.phases.items():
+                lines += histogram_lines("crawl_phase_seconds", hist, f'phase="{phase}"')
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        with self.lock:
+            if self.jsonl:
+                self.jsonl.flush()
+        if self.write_prometheus:
+            # Write-then-rename so readers never see a half-written file
+            path = self.output_dir / "metrics.prom"
+            temp = path.with_suffix(".prom.tmp")
+            temp.write_text(self.prometheus_text(), encoding='utf-8')
+            os.replace(temp, path)
+
+    def report_loop(self):
+        while not self.stop.wait(self.live_interval):
+            print(self.throughput_line())
+            self.flush()
+
+    def start(self):
+        """Start the live throughput reporter thread"""
+        self.reporter = threading.Thread(target=self.report_loop, daemon=True)
+        self.reporter.start()
+
+    def phase_summary(self):
+        """Mean seconds per page in each phase, slowest first"""
+        with self.lock:
+            means = [(hist.total / hist.count, phase) for phase, hist in self.phases.items() if hist.count]
+        return ", ".join(f"{phase} {mean * 1000:.1f}ms" for mean, phase in sorted(means, reverse=True))
+
+    def close(self):
+        self.stop.set()
+        if self.reporter:
+            self.reporter.join()
+        self.flush()
+        with self.lock:
+            if self.jsonl:
+                self.jsonl.close()
+                self.jsonl = None
@@ -0,0 +1,513 @@
+import re
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, CData, NavigableString, PageElement
+from bs4.dammit import UnicodeDammit
+
+from url_canon import canonicalize_url
+
+# With lxml installed the extractor walks lxml's own tree, which skips
+# BeautifulSoup's (dominant) tree-building cost; otherwise it walks a
+# BeautifulSoup tree built by the stdlib parser
+try:
+    import lxml.html
+    from lxml import etree
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# Elements dropped from the main content (they still contribute links and media)
+EXCLUDED_TAGS = {'script', 'style', 'nav', 'header', 'footer', 'aside'}
+
+# Elements whose whitespace-only text is kept verbatim
+PRESERVE_WHITESPACE_TAGS = ('pre', 'textarea')
+ASCII_SPACES = ' \n\t\f\r'
+
+# File extensions of the page resources the scrapers download as media
+MEDIA_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico',
+                    '.mp4', '.webm', '.mp3', '.wav', '.pdf', '.doc', '.docx'}
+
+# Main content candidates, in priority order
+CONTENT_SELECTORS = ['main', 'article', '.content', '.main-content', '.post-content',
+                     '.entry-content', '#content', '.container']
+
+# Elements that start a new markdown block
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'main', 'figure', 'figcaption', 'form', 'fieldset',
+              'address', 'details', 'summary', 'dl', 'dt', 'dd', 'center', 'body', 'html'}
+HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+INLINE_MARKERS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*', 'del': '~~', 's': '~~'}
+
+WHITESPACE = re.compile(r'\s+')
+CSS_URL_PATTERN = re.compile(r'url\(["\']?([^"\']+)["\']?\)')
+
+
+def parse_html(html, parser=PARSER):
+    """Parse HTML (str or bytes) and return the nodes to walk from, or [] if empty"""
+    if parser == 'lxml':
+        if isinstance(html, bytes):
+            html = UnicodeDammit(html, is_html=True).unicode_markup or ''
+        try:
+            # Re-encode so lxml does not choke on <?xml encoding=...?> declarations
+            root = lxml.html.document_fromstring(html.encode('utf-8'),
+                                                 parser=lxml.html.HTMLParser(encoding='utf-8'))
+        except (etree.ParserError, ValueError):
+            return []
+        return [root]
+    return list(BeautifulSoup(html, 'html.parser').children)
+
+
+def node_name(node, parser=PARSER):
+    """Tag name of an element; None for text, comments and other non-elements"""
+    name = node.tag if parser == 'lxml' else node.name
+    return name if type(name) is str else None
+
+
+def matches_selector(name, element, selector):
+    """Match the simple tag/.class/#id selectors used for content detection"""
+    if selector.startswith('.'):
+        classes = element.get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        return selector[1:] in classes
+    if selector.startswith('#'):
+        return element.get('id') == selector[1:]
+    return name == selector
+
+
+def text_of(element, parser=PARSER):
+    """get_text() that skips excluded subtrees, as if they had been removed"""
+    if parser == 'lxml':
+        # Collapse whitespace-only strings outside <pre>/<textarea>, as BeautifulSoup does
+        preserve = element.tag in PRESERVE_WHITESPACE_TAGS or next(element.iterancestors(*PRESERVE_WHITESPACE_TAGS), None) is not None
+        parts = []
+
+        def add(text, preserve):
+            if text:
+                if not preserve and not text.strip(ASCII_SPACES):
+                    text = '\n' if '\n' in text else ' '
+                parts.append(text)
+
+        add(element.text, preserve)
+        stack = [(child, preserve) for child in reversed(element)]
+        while stack:
+            node, preserve = stack.pop()
+            if isinstance(node, str):
+                add(node, preserve)
+                continue
+            if node.tail:
+                stack.append((node.tail, preserve))
+            if type(node.tag) is str and node.tag not in EXCLUDED_TAGS:
+                inner = preserve or node.tag in PRESERVE_WHITESPACE_TAGS
+                add(node.text, inner)
+                stack.extend((child, inner) for child in reversed(node))
+        return ''.join(parts)
+
+    parts = []
+    stack = [iter(element.children)]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+        elif node.name is not None:
+            if node.name not in EXCLUDED_TAGS:
+                stack.append(iter(node.children))
+        elif type(node) in (NavigableString, CData):
+            parts.append(str(node))
+    return ''.join(parts)
+
+
+def iter_events(element):
+    """Yield ('start', name, node), ('text', None, text) and ('end', name, node) in document order.
+
+    Works on BeautifulSoup and lxml trees alike and skips excluded subtrees.
+    """
+    if isinstance(element, PageElement):
+        yield 'start', element.name, element
+        stack = [(element, iter(element.children))]
+        while stack:
+            parent, children = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                yield 'end', parent.name, parent
+            elif node.name is not None:
+                if node.name not in EXCLUDED_TAGS:
+                    yield 'start', node.name, node
+                    stack.append((node, iter(node.children)))
+            elif type(node) in (NavigableString, CData):
+                yield 'text', None, str(node)
+        return
+
+    yield 'start', element.tag, element
+    if element.text:
+        yield 'text', None, element.text
+    stack = [(element, iter(element))]
+    while stack:
+        parent, children = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            yield 'end', parent.tag, parent
+            if stack and parent.tail:
+                yield 'text', None, parent.tail
+        elif type(node.tag) is str and node.tag not in EXCLUDED_TAGS:
+            yield 'start', node.tag, node
+            if node.text:
+                yield 'text', None, node.text
+            stack.append((node, iter(node)))
+        elif node.tail:
+            # Comments and excluded elements still own the text that follows them
+            yield 'text', None, node.tail
+
+
+class _MarkdownWriter:
+    """State for one conversion: output lines plus the open block/inline contexts"""
+
+    def __init__(self):
+        self.lines = []
+        self.inline = [[]]       # stack of inline buffers; [0] is the current block's text
+        self.quote_depth = 0
+        self.lists = []          # [{'ordered': bool, 'index': int}]
+        self.item_marker = None  # marker waiting for the first line of the current <li>
+        self.last_kind = None
+        self.last_quote_depth = 0
+        self.pre_depth = 0
+        self.pre_language = ''
+        self.tables = []         # [{'rows': [[cell, ...], ...]}]
+
+    # -- block output ------------------------------------------------------
+
+    def emit(self, block_lines, kind='block'):
+        """Append a finished block, with blank-line separation, list indent and quote prefix"""
+        quote = '> ' * self.quote_depth
+        indent = '    ' * max(len(self.lists) - 1, 0)
+
+        if self.item_marker is not None:
+            first, rest = indent + self.item_marker, indent + ' ' * len(self.item_marker)
+            self.item_marker = None
+            kind = 'item'
+        elif self.lists:
+            first = rest = indent + '    '
+        else:
+            first = rest = ''
+
+        # List items stay tight; everything else is separated by a blank line
+        if self.lines and not (kind == 'item' and self.last_kind == 'item'):
+            self.lines.append(('> ' * min(self.quote_depth, self.last_quote_depth)).rstrip())
+        for index, line in enumerate(block_lines):
+            self.lines.append(f"{quote}{first if index == 0 else rest}{line}".rstrip())
+        self.last_kind = kind
+        self.last_quote_depth = self.quote_depth
+
+    def flush(self):
+        """Turn the pending inline text into a paragraph (or list item line)"""
+        if len(self.inline) != 1:
+            return
+        text = ''.join(self.inline[0])
+        self.inline[0] = []
+        block_lines = [' '.join(line.split()) for line in text.split('\n')]
+        block_lines = [line for line in block_lines if line]
+        if block_lines:
+            self.emit(block_lines)
+
+    # -- inline output -----------------------------------------------------
+
+    def line_break(self):
+        self.inline[-1].append('\n')
+
+    def text(self, text):
+        if self.pre_depth:
+            self.inline[-1].append(text)
+        else:
+            self.inline[-1].append(WHITESPACE.sub(' ', text))
+
+    def open_inline(self):
+        self.inline.append([])
+
+    def close_inline(self):
+        return ''.join(self.inline.pop())
+
+    def wrap(self, inner, before, after):
+        """Wrap inline text, keeping surrounding spaces outside the markers"""
+        stripped = inner.strip()
+        if not stripped:
+            return inner
+        lead = ' ' if inner[:1].isspace() else ''
+        trail = ' ' if inner[-1:].isspace() else ''
+        return f"{lead}{before}{stripped}{after}{trail}"
+
+
+class MarkdownConverter:
+    """Convert an HTML element to markdown in one document-order walk.
+
+    Handles headings, paragraphs, inline emphasis/code/links/images, nested
+    ordered and unordered lists, blockquotes, fenced code blocks and tables.
+    Text is collected into list buffers and joined once, so the cost is
+    linear in the size of the DOM.
+    """
+
+    def convert(self, element):
+        if element is None:
+            return ""
+        writer = _MarkdownWriter()
+        for event, name, node in iter_events(element):
+            if event == 'text':
+                writer.text(node)
+            elif event == 'start':
+                self.start(writer, name, node)
+            else:
+                self.end(writer, name, node)
+        writer.flush()
+        return '\n'.join(writer.lines).strip('\n') + '\n' if writer.lines else ""
+
+    def start(self, w, name, node):
+        if w.pre_depth:
+            if name == 'code' and not w.pre_language:
+                w.pre_language = self.language_of(node)
+            elif name == 'br':
+                w.line_break()
+            return
+        if w.tables and name in ('td', 'th'):
+            w.open_inline()
+        elif w.tables and name == 'tr':
+            w.tables[-1]['rows'].append([])
+        elif name in HEADING_TAGS or name in BLOCK_TAGS or name in ('ul', 'ol', 'li', 'blockquote', 'hr', 'table'):
+            if len(w.inline) > 1:
+                # Block inside an inline element (e.g. <a><div>): keep it inline
+                w.text(' ')
+                return
+            w.flush()
+            if name in HEADING_TAGS:
+                w.open_inline()
+            elif name in ('ul', 'ol'):
+                if w.item_marker is not None:
+                    # A nested list before any text in its <li>
+                    w.emit([''])
+                w.lists.append({'ordered': name == 'ol', 'index': 0})
+            elif name == 'li':
+                if w.lists:
+                    current = w.lists[-1]
+                    current['index'] += 1
+                    w.item_marker = f"{current['index']}. " if current['ordered'] else "- "
+            elif name == 'blockquote':
+                w.quote_depth += 1
+            elif name == 'hr':
+                w.emit(['---'])
+            elif name == 'table':
+                w.tables.append({'rows': []})
+        elif name == 'pre':
+            if len(w.inline) == 1:
+                w.flush()
+            w.pre_depth += 1
+            w.pre_language = self.language_of(node)
+            w.open_inline()
+        elif name == 'br':
+            w.line_break()
+        elif name in INLINE_MARKERS or name in ('a', 'code'):
+            w.open_inline()
+        elif name == 'img':
+            src = node.get('src') or node.get('data-src') or ''
+            if src and not src.startswith('data:'):
+                alt = WHITESPACE.sub(' ', node.get('alt') or '').strip()
+                w.inline[-1].append(f"![{alt}]({src})")
+
+    def end(self, w, name, node):
+        if name == 'pre' and w.pre_depth:
+            w.pre_depth -= 1
+            if w.pre_depth:
+                return
+            code = w.close_inline().strip('\n').rstrip()
+            if len(w.inline) > 1:
+                w.text(f"`{code}`" if code else '')
+            elif code:
+                fence = '````' if '```' in code else '```'
+                w.emit([fence + w.pre_language] + code.split('\n') + [fence])
+            w.pre_language = ''
+            return
+        if w.pre_depth:
+            return
+
+        if w.tables and name in ('td', 'th'):
+            cell = ' '.join(w.close_inline().split()).replace('|', '\\|')
+            rows = w.tables[-1]['rows']
+            if not rows:
+                rows.append([])
+            rows[-1].append(cell)
+        elif name == 'table' and w.tables:
+            self.emit_table(w, w.tables.pop()['rows'])
+        elif w.tables and name == 'tr':
+            pass
+        elif name in HEADING_TAGS:
+            if len(w.inline) == 1:
+                return
+            text = ' '.join(w.close_inline().split())
+            if len(w.inline) > 1:
+                w.text(text)
+            elif text:
+                w.emit([f"{'#' * HEADING_TAGS[name]} {text}"])
+        elif name in ('ul', 'ol') or name in BLOCK_TAGS or name in ('li', 'blockquote'):
+            if len(w.inline) > 1:
+                w.text(' ')
+                return
+            w.flush()
+            if name in ('ul', 'ol') and w.lists:
+                w.lists.pop()
+                w.item_marker = None
+                if not w.lists:
+                    w.last_kind = 'block'
+            elif name == 'li':
+                w.item_marker = None
+            elif name == 'blockquote' and w.quote_depth:
+                w.quote_depth -= 1
+        elif name in INLINE_MARKERS:
+            marker = INLINE_MARKERS[name]
+            inner = w.close_inline()
+            w.inline[-1].append(w.wrap(inner, marker, marker))
+        elif name == 'code':
+            inner = w.close_inline()
+            ticks = '``' if '`' in inner else '`'
+            pad = ' ' if ticks == '``' else ''
+            w.inline[-1].append(w.wrap(inner, ticks + pad, pad + ticks))
+        elif name == 'a':
+            inner = w.close_inline()
+            href = node.get('href') or ''
+            if inner.strip() and href and not href.startswith('javascript:'):
+                w.inline[-1].append(w.wrap(inner, '[', f"]({href})"))
+            else:
+                w.inline[-1].append(inner)
+
+    def language_of(self, node):
+        """Fence info string from a language-xxx / lang-xxx class"""
+        classes = node.get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        for cls in classes:
+            for prefix in ('language-', 'lang-'):
+                if cls.startswith(prefix):
+                    return cls[len(prefix):]
+        return ''
+
+    def emit_table(self, w, rows):
+        rows = [row for row in rows if row]
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+        table_lines = ['| ' + ' | '.join(rows[0]) + ' |',
+                       '|' + '|'.join([' --- '] * width) + '|']
+        table_lines += ['| ' + ' | '.join(row) + ' |' for row in rows[1:]]
+        if w.inline[0]:
+            w.flush()
+        w.emit(table_lines)
+
+
+class PageExtractor:
+    """Collect title, links, media URLs and the main content in one tree walk.
+
+    Replaces the separate find_all passes the scraper used to make for
+    links, media and the content area. The winning content element is
+    then rendered by MarkdownConverter, which walks only that subtree.
+    """
+
+    def __init__(self, media_extensions, content_selectors=None, parser=PARSER):
+        self.media_extensions = tuple(media_extensions)
+        self.content_selectors = content_selectors or CONTENT_SELECTORS
+        self.parser = parser
+        self.converter = MarkdownConverter()
+
+    def text_of(self, element):
+        return text_of(element, self.parser)
+
+    def extract(self, html, base_url, timings=None):
+        """Title, links, anchors, media URLs and markdown; `timings` gets 'parse' and 'extract' seconds"""
+        parser = self.parser
+        start = time.perf_counter()
+        nodes = parse_html(html, parser)
+        parsed = time.perf_counter()
+
+        title = None
+        anchors = {}  # link -> anchor text of its first occurrence, in document order
+        media_urls = set()
+        first_match = [None] * len(self.content_selectors)
+        body = None
+
+        # Stack entries: (children iterator, inside excluded subtree)
+        stack = [(iter(nodes), False)]
+        while stack:
+            children, excluded = stack[-1]
+            element = next(children, None)
+            if element is None:
+                stack.pop()
+                continue
+            name = node_name(element, parser)
+            if name is None:
+                continue
+            if name == 'title' and title is None:
+                title = element
+
+            # Links and media are collected from the whole document
+            if name == 'a':
+                href = element.get('href')
+                if href is not None:
+                    link = self.clean_link(urljoin(base_url, href))
+                    if link and link not in anchors:
+                        anchors[link] = ' '.join(self.text_of(element).split())
+                    if href.lower().endswith(self.media_extensions):
+                        media_urls.add(urljoin(base_url, href))
+            elif name == 'img':
+                src = element.get('src') or element.get('data-src')
+                if src:
+                    media_urls.add(urljoin(base_url, src))
+            elif name in ('video', 'source'):
+                src = element.get('src')
+                if src:
+                    media_urls.add(urljoin(base_url, src))
+            style = element.get('style')
+            if style is not None:
+                for url in CSS_URL_PATTERN.findall(style):
+                    media_urls.add(urljoin(base_url, url))
+
+            excluded = excluded or name in EXCLUDED_TAGS
+            if not excluded:
+                for index, selector in enumerate(self.content_selectors):
+                    if first_match[index] is None and matches_selector(name, element, selector):
+                        first_match[index] = element
+                if name == 'body' and body is None:
+                    body = element
+
+            stack.append((iter(element), excluded))
+
+        content = next((match for match in first_match if match is not None), body)
+        markdown = ''
+        if content is not None:
+            markdown = self.converter.convert(content)
+            # If nothing renders as markdown, just get all text
+            if not markdown.strip():
+                markdown = self.text_of(content)
+
+        if timings is not None:
+            timings['parse'] = parsed - start
+            timings['extract'] = time.perf_counter() - parsed
+        return {
+            'title': self.text_of(title).strip() if title is not None else None,
+            'links': list(anchors),
+            'anchors': anchors,
+            'media_urls': media_urls,
+            'markdown': markdown
+        }
+
+    def clean_link(self, absolute_url):
+        """Keep HTTP(S) links in canonical form (see url_canon.canonicalize_url)"""
+        return canonicalize_url(absolute_url)
+
+
+def read_html_source(path):
+    """Return (source URL, HTML) from a saved html_source file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    match = re.match(r'<!-- Source URL: (.*?) -->', html)
+    url = match.group(1) if match else 'http://localhost/'
+    # Drop the three comment header lines
+    return url, html.split('\n', 4)[-1] if match else html
+
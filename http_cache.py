@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from urllib.parse import urlparse, urlunparse
+
+
+def normalize_url(url):
+    """Cache key for a URL: lowercase scheme and host, no fragment"""
+    parsed = urlparse(url.strip())
+    path = parsed.path or '/'
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, parsed.params, parsed.query, ''))
+
+
+class HttpCache:
+    """On-disk HTTP cache used to revalidate pages on re-crawls.
+
+    Entries are keyed by normalized URL and keep the ETag/Last-Modified
+    validators, the body and the links extracted from the page, so a page
+    answered with 304 Not Modified can still be followed without being
+    re-parsed or re-written. Bodies live in sharded files under
+    `cache_dir/bodies`; the index is a SQLite database. When the stored
+    bodies exceed `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir="http_cache", max_bytes=512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.body_dir = self.cache_dir / "bodies"
+        self.body_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            links TEXT,
+            body_file TEXT,
+            size INTEGER,
+            accessed REAL
+        )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        # Run statistics
+        self.lookups = 0
+        self.hits = 0
+        self.not_modified = 0
+        self.evicted = 0
+
+    def conditional_headers(self, url):
+        """Return If-None-Match/If-Modified-Since headers for a cached URL"""
+        key = normalize_url(url)
+        with self.lock:
+            self.lookups += 1
+            row = self.db.execute(
+                "SELECT etag, last_modified FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return {}
+            self.hits += 1
+
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def revalidated(self, url):
+        """Record a 304 answer and return the cached entry (links, body path)"""
+        key = normalize_url(url)
+        with self.lock:
+            self.not_modified += 1
+            row = self.db.execute(
+                "SELECT links, body_file FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+        if not row:
+            return {'links': [], 'body_file': None}
+        return {'links': json.loads(row[0] or '[]'), 'body_file': self.body_dir / row[1]}
+
+    def store(self, url, response, links):
+        """Cache a 200 response if it carries a validator"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+
+        key = normalize_url(url)
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        body_file = f"{digest[:2]}/{digest}"
+        body_path = self.body_dir / body_file
+        body_path.parent.mkdir(exist_ok=True)
+        body = response.content
+        with open(body_path, 'wb') as f:
+            f.write(body)
+
+        with self.lock:
+            old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if old:
+                self.total_bytes -= old[0]
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, json.dumps(list(links)), body_file, len(body), time.time())
+            )
+            self.total_bytes += len(body)
+            self.evict()
+            self.db.commit()
+        return True
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits (lock held)"""
+        while self.total_bytes > self.max_bytes:
+            row = self.db.execute(
+                "SELECT key, body_file, size FROM entries ORDER BY accessed LIMIT 1"
+            ).fetchone()
+            if not row:
+                break
+            key, body_file, size = row
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self.body_dir / body_file)
+            except OSError:
+                pass
+            self.total_bytes -= size
+            self.evicted += 1
+
+    def summary(self):
+        """One-line hit/revalidation report for the run summary"""
+        hit_rate = (self.hits / self.lookups * 100) if self.lookups else 0.0
+        revalidation_rate = (self.not_modified / self.hits * 100) if self.hits else 0.0
+        return (f"{self.lookups} lookups, {self.hits} hits ({hit_rate:.1f}%), "
+                f"{self.not_modified} revalidated as 304 ({revalidation_rate:.1f}% of hits), "
+                f"{self.evicted} evicted")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
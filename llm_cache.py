@@ -0,0 +1,112 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+
+def request_key(model, prompt, max_tokens, temperature):
+    """Content address of an LLM request: SHA-256 of everything that shapes the answer"""
+    payload = json.dumps([model, prompt, max_tokens, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """Persistent cache of LLM responses shared by the text analyzer and wiki builder.
+
+    Entries are keyed by a hash of (model, prompt, max_tokens, temperature)
+    and stored in a SQLite database under `cache_dir`, together with the
+    tokens the request used, so re-running over unchanged input costs
+    nothing. Entries older than `ttl` seconds are treated as misses and
+    dropped; when the stored responses exceed `max_bytes` the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir="llm_cache", max_bytes=256 * 1024 * 1024, ttl=30 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.cache_dir / "responses.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT,
+            response TEXT,
+            tokens INTEGER,
+            size INTEGER,
+            created REAL,
+            accessed REAL
+        )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        # Run statistics
+        self.lookups = 0
+        self.hits = 0
+        self.expired = 0
+        self.evicted = 0
+        self.tokens_saved = 0
+
+    def get(self, model, prompt, max_tokens, temperature):
+        """The cached response text, or None"""
+        key = request_key(model, prompt, max_tokens, temperature)
+        now = time.time()
+        with self.lock:
+            self.lookups += 1
+            row = self.db.execute("SELECT response, tokens, size, created FROM responses WHERE key = ?",
+                                  (key,)).fetchone()
+            if not row:
+                return None
+            response, tokens, size, created = row
+            if self.ttl and now - created > self.ttl:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                self.total_bytes -= size
+                self.expired += 1
+                return None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self.hits += 1
+            self.tokens_saved += tokens or 0
+        return response
+
+    def put(self, model, prompt, max_tokens, temperature, response, tokens=None):
+        """Store a successful response"""
+        key = request_key(model, prompt, max_tokens, temperature)
+        size = len(response.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            old = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old:
+                self.total_bytes -= old[0]
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (key, model, response, tokens, size, now, now))
+            self.total_bytes += size
+            self.evict()
+            self.db.commit()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits (lock held)"""
+        while self.total_bytes > self.max_bytes:
+            row = self.db.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 1").fetchone()
+            if not row:
+                break
+            self.db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self.total_bytes -= row[1]
+            self.evicted += 1
+
+    def summary(self):
+        """One-line hit-rate report for the run summary"""
+        hit_rate = (self.hits / self.lookups * 100) if self.lookups else 0.0
+        return (f"{self.lookups} lookups, {self.hits} hits ({hit_rate:.1f}%), ~{self.tokens_saved} tokens saved, "
+                f"{self.expired} expired, {self.evicted} evicted")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
@@ -0,0 +1,68 @@
+import time
+import threading
+
+
+class TokenRateLimiter:
+    """Token bucket over LLM tokens per minute, shared by every request thread.
+
+    A request first `acquire`s its estimated tokens (prompt plus
+    max_tokens), waiting until the bucket has refilled enough; the bucket
+    holds at most one minute's budget, so a burst never exceeds it. Once
+    the response reports its real usage, `settle` returns or charges the
+    difference. A request estimated above one minute's budget can never
+    fit and is refused with a ValueError. A 429 `pause`s every request
+    until the server's Retry-After has passed.
+    """
+
+    def __init__(self, tokens_per_minute=400000):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.spent = 0
+        self.waited = 0.0
+        self.throttled = 0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens):
+        """Block until `tokens` may be spent, then spend them"""
+        if tokens > self.capacity:
+            raise ValueError(f"request of ~{tokens} tokens exceeds the budget of {self.capacity} tokens per minute")
+        start = time.monotonic()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.refill(now)
+                wait = max(self.blocked_until - now, (tokens - self.tokens) / self.rate)
+                if wait <= 0:
+                    self.tokens -= tokens
+                    self.requests += 1
+                    self.spent += tokens
+                    self.waited += now - start
+                    return
+            time.sleep(min(wait, 5.0))
+
+    def settle(self, estimated, actual):
+        """Correct an estimate with the usage the response reported"""
+        if not actual:
+            return
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + estimated - actual)
+            self.spent += actual - estimated
+
+    def pause(self, seconds):
+        """Hold every request for `seconds` (after a 429)"""
+        with self.lock:
+            self.throttled += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def summary(self):
+        return (f"{self.requests} requests, ~{self.spent} tokens, {self.waited:.1f}s waiting for budget, "
+                f"{self.throttled} throttled")
+
@@ -0,0 +1,111 @@
+import os
+import shutil
+import hashlib
+import mimetypes
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class MediaStore:
+    """Content-addressed media downloads shared by every crawl run.
+
+    Bodies are streamed to disk in chunks while their SHA-256 is computed, so
+    memory stays flat for large PDFs and videos. Each distinct body is kept
+    once under `store_dir/objects/<sha[:2]>/<sha><ext>` and hard-linked (or
+    copied when linking is not possible) into the run's media directory.
+    Downloads run on a bounded thread pool shared by all pages.
+    """
+
+    def __init__(self, session, media_dir, store_dir="media_store", max_workers=4, chunk_size=1024 * 1024):
+        self.session = session
+        self.media_dir = Path(media_dir)
+        self.store_dir = Path(store_dir)
+        self.objects_dir = self.store_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # url -> Future, so a URL referenced by many pages is fetched once per run
+        self.url_futures = {}
+        self.lock = threading.Lock()
+        self.downloaded = 0
+        self.reused = 0
+        self.linked = 0
+
+    def guess_extension(self, url, content_type):
+        """File extension from the URL path, falling back to the Content-Type"""
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if not ext and content_type:
+            ext = mimetypes.guess_extension(content_type.split(';')[0].strip()) or ''
+        return ext
+
+    def fetch(self, url, page_url):
+        """Stream one URL into the store and link it into the media directory"""
+        with self.session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            ext = self.guess_extension(url, response.headers.get('content-type', ''))
+
+            digest = hashlib.sha256()
+            fd, temp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            digest.update(chunk)
+                            f.write(chunk)
+                sha = digest.hexdigest()
+                blob = self.objects_dir / sha[:2] / f"{sha}{ext}"
+                blob.parent.mkdir(exist_ok=True)
+                if blob.exists():
+                    os.remove(temp_path)
+                    is_new = False
+                else:
+                    os.replace(temp_path, blob)
+                    os.chmod(blob, 0o644)  # mkstemp creates owner-only files
+                    is_new = True
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+        domain = urlparse(page_url).netloc.replace('.', '_')
+        target = self.media_dir / f"{domain}_{sha[:16]}{ext}"
+        linked = self.link(blob, target)
+
+        with self.lock:
+            if is_new:
+                self.downloaded += 1
+            else:
+                self.reused += 1
+            if linked:
+                self.linked += 1
+        if linked:
+            print(f"{'  ' * 2}{'Downloaded' if is_new else 'Linked stored'} media: {target.name}")
+        return target
+
+    def link(self, blob, target):
+        """Hard-link a stored blob into the run directory; False if it was already there"""
+        if target.exists():
+            return False
+        try:
+            os.link(blob, target)
+        except FileExistsError:
+            return False
+        except OSError:
+            shutil.copyfile(blob, target)
+        return True
+
+    def submit(self, url, page_url):
+        """Schedule a download, reusing the in-flight or finished one for the same URL"""
+        with self.lock:
+            future = self.url_futures.get(url)
+            if future is None:
+                future = self.executor.submit(self.fetch, url, page_url)
+                self.url_futures[url] = future
+            return future
+
+    def close(self):
+        self.executor.shutdown(wait=True)
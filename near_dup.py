@@ -0,0 +1,107 @@
+import re
+import zlib
+import random
+import threading
+from array import array
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Universal hashing (a*x + b) mod p over a Mersenne prime
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingle_hashes(text, shingle_size=3):
+    """Set of 32-bit hashes of the text's word shingles"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + shingle_size]).encode('utf-8'))
+            for i in range(len(words) - shingle_size + 1)}
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index that flags pages whose main content is nearly identical.
+
+    Each page's word 3-shingles are reduced to a `num_perm`-value MinHash
+    signature, whose fraction of equal values estimates the Jaccard
+    similarity of two pages. Signatures are split into `bands` bands; pages
+    sharing a band are candidates, and a candidate whose estimated
+    similarity reaches `threshold` is reported as the duplicate. With the
+    defaults (64 values, 8 bands of 8) pairs above ~0.8 are almost always
+    caught and pairs below ~0.5 almost never compared. Pages with fewer
+    than `min_words` words are never flagged.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=8, min_words=20):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_words = min_words
+
+        # Fixed seed: signatures stay comparable across runs (see --resume)
+        rng = random.Random(1)
+        self.permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+        self.buckets = [{} for _ in range(bands)]
+        self.lock = threading.Lock()
+        self.size = 0
+
+    def signature(self, text):
+        """MinHash signature of the text, or None if it is too short to judge"""
+        if len(TOKEN_PATTERN.findall(text)) < self.min_words:
+            return None
+        hashes = shingle_hashes(text)
+        prime = MERSENNE_PRIME
+        return array('Q', (min((a * h + b) % prime for h in hashes) for a, b in self.permutations))
+
+    def band_keys(self, signature):
+        rows = self.rows
+        return [hash(tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def similarity(self, first, second):
+        return sum(1 for a, b in zip(first, second) if a == b) / self.num_perm
+
+    def find(self, signature, keys):
+        """URL of the most similar indexed page above the threshold (lock held)"""
+        best_url, best = None, self.threshold
+        checked = set()
+        for band, key in enumerate(keys):
+            for url, other in self.buckets[band].get(key, ()):
+                if url in checked:
+                    continue
+                checked.add(url)
+                similarity = self.similarity(signature, other)
+                if similarity >= best:
+                    best_url, best = url, similarity
+        return best_url
+
+    def insert(self, url, signature, keys):
+        for band, key in enumerate(keys):
+            self.buckets[band].setdefault(key, []).append((url, signature))
+        self.size += 1
+
+    def add(self, url, signature):
+        with self.lock:
+            self.insert(url, signature, self.band_keys(signature))
+
+    def check(self, url, text):
+        """Return (signature, URL of the page it duplicates or None); new pages are indexed"""
+        signature = self.signature(text)
+        if signature is None:
+            return None, None
+        keys = self.band_keys(signature)
+        with self.lock:
+            original = self.find(signature, keys)
+            if original is None:
+                self.insert(url, signature, keys)
+        return signature, original
+
+    @staticmethod
+    def encode(signature):
+        """Compact text form of a signature for the crawl journal"""
+        return signature.tobytes().hex()
+
+    @staticmethod
+    def decode(text):
+        return array('Q', bytes.fromhex(text))
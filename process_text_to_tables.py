@@ -2,34 +2,64 @@ import os
 import re
 import json
 import time
+import hashlib
+import threading
 import requests
 from pathlib import Path
 from datetime import datetime
 import tkinter as tk
 from tkinter import filedialog, simpledialog
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
 import pandas as pd
 import csv
+from concurrent.futures import ThreadPoolExecutor
+from rate_limiter import THROTTLE_STATUSES, parse_retry_after
+from llm_throttle import TokenRateLimiter
+from llm_cache import LLMResponseCache
+from analysis_manifest import AnalysisManifest, text_hash
+from text_chunker import chunk_stream, read_text_blocks, TokenCounter, MODEL_CONTEXT_TOKENS, DEFAULT_CONTEXT_TOKENS
 
 class TextAnalyzer:
-    def __init__(self):
+    def __init__(self, output_dir="text_analysis_output", cache_dir="llm_cache"):
         # Hardcoded API key for development
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.selected_files = []
-        self.output_dir = Path("text_analysis_output")
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # OpenRouter API endpoint
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
+        # OpenRouter API endpoint (OPENROUTER_API_URL points it at a compatible server)
+        self.api_url = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
         
         # Use Google's Gemini 2.5 Pro with enhanced capabilities
         self.model = "google/gemini-2.5-pro"
         
-        # Chunk size (50,000 characters)
-        self.chunk_size = 50000
-        
-        # File truncation size (100,000 characters max per file)
-        self.max_file_size = 100000
+        # Chunks are sized in tokens to fill the model's context (see chunk_budget);
+        # chunk_tokens caps them lower, chunk_overlap repeats that many tokens of the previous chunk
+        self.chunk_tokens = None
+        self.chunk_overlap = 0
+        self.chunk_max_tokens = 2000  # answer length per chunk
+        self.token_counter = TokenCounter()
+        # Tokenizers differ between model families: leave part of the context unused
+        self.budget_margin = 0.9
+        
+        # Files are streamed and analyzed completely; set a character count to stop reading after it
+        self.max_file_size = None
+        
+        # Concurrency: LLM requests in flight at once across all files, files
+        # analyzed at once, and a tokens-per-minute budget instead of fixed sleeps
+        self.max_concurrent_requests = 6
+        self.files_in_flight = 3
+        self.token_limiter = TokenRateLimiter(tokens_per_minute=400000)
+        self.llm_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+        self.executor = None  # chunk request pool, set up by process_files
+        self.max_retries = 3
+        self.request_timeout = 300
+        
+        # Responses of earlier runs, keyed by model, prompt and parameters
+        self.llm_cache = LLMResponseCache(cache_dir)
+        
+        # File and chunk hashes with their analyses, so re-runs only send what changed
+        self.manifest = AnalysisManifest(self.output_dir / "analysis_manifest.sqlite")
         
         # Storage for analysis results
         self.analysis_results = []
@@ -105,30 +135,22 @@ Format as valid JSON."""
             "keywords": ["unknown", "unprocessed", "general", "document", "content"]
         }
     
-    def chunk_text(self, text, chunk_size=50000):
-        """Split text into chunks of specified size"""
-        chunks = []
-        
-        # Try to split at sentence boundaries
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) + 1 <= chunk_size:
-                current_chunk += sentence + " "
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + " "
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        # If no sentences found, fall back to character splitting
-        if not chunks:
-            chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-        
-        return chunks
+    def chunk_budget(self, filename):
+        """Tokens of text per chunk: the model's context (or the per-minute token budget, if smaller)
+        less the prompt around the chunk and the answer"""
+        context = MODEL_CONTEXT_TOKENS.get(self.model, DEFAULT_CONTEXT_TOKENS)
+        # A chunk request larger than one minute's budget would never be let through
+        context = min(context, self.token_limiter.capacity)
+        overhead = self.token_counter.count(self.chunk_prompt("", 99999, 99999, filename))
+        budget = int((context - overhead - self.chunk_max_tokens) * self.budget_margin)
+        if self.chunk_tokens:
+            budget = min(budget, self.chunk_tokens)
+        return max(budget, 100)
+    
+    def chunk_text(self, text, chunk_tokens=None):
+        """Split text into chunks of at most chunk_tokens (default: the model's budget) at sentence boundaries"""
+        return list(chunk_stream([text], chunk_tokens or self.chunk_budget(""), self.chunk_overlap,
+                                 self.token_counter.count))
     
     def call_llm(self, prompt, max_tokens=2000):
         """Call OpenRouter API"""
@@ -148,22 +170,42 @@ Format as valid JSON."""
             "temperature": 0.3  # Lower temperature for more consistent analysis
         }
         
+        # Unchanged input: answer from the cache at no API cost
+        cached = self.llm_cache.get(self.model, prompt, max_tokens, data['temperature'])
+        if cached is not None:
+            return cached
+        
+        estimated = self.token_counter.count(prompt) + max_tokens
         try:
-            response = requests.post(self.api_url, headers=headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            return result['choices'][0]['message']['content']
+            for attempt in range(self.max_retries + 1):
+                # Wait for token budget, then for one of the request slots
+                self.token_limiter.acquire(estimated)
+                with self.llm_slots:
+                    response = requests.post(self.api_url, headers=headers, json=data, timeout=self.request_timeout)
+                if response.status_code in THROTTLE_STATUSES and attempt < self.max_retries:
+                    pause = parse_retry_after(response.headers.get('Retry-After'))
+                    print(f"  Rate limited ({response.status_code}), retrying...")
+                    self.token_limiter.pause(pause if pause is not None else 5 * 2 ** attempt)
+                    continue
+                response.raise_for_status()
+                
+                result = response.json()
+                tokens = result.get('usage', {}).get('total_tokens')
+                self.token_limiter.settle(estimated, tokens)
+                content = result['choices'][0]['message']['content']
+                if content:
+                    self.llm_cache.put(self.model, prompt, max_tokens, data['temperature'], content, tokens)
+                return content
         except Exception as e:
             print(f"API Error: {str(e)}")
             return None
     
-    def analyze_chunk(self, chunk_text, chunk_number, total_chunks, filename):
-        """Analyze a single chunk of text"""
-        prompt = f"""Analyze this text chunk (chunk {chunk_number} of {total_chunks} from file: {filename}).
+    def chunk_prompt(self, chunk_text, chunk_number, total_chunks, filename):
+        """Prompt analyzing one chunk; chunks are sized so the whole prompt fits the model"""
+        return f"""Analyze this text chunk (chunk {chunk_number} of {total_chunks} from file: {filename}).
 
 Text chunk:
-{chunk_text[:45000]}  # Limit to ensure we don't exceed token limits
+{chunk_text}
 
 Provide a structured analysis with the following:
 
@@ -185,8 +227,10 @@ Format your response as JSON with these exact keys:
     "keywords": ["keyword1", "keyword2", ...],
     "tags": ["tag1", "tag2", "tag3", "tag4", "tag5"]
 }}"""
-
-        response = self.call_llm(prompt, max_tokens=2000)
+    
+    def analyze_chunk(self, prompt):
+        """Analyze a single chunk of text, given its chunk_prompt"""
+        response = self.call_llm(prompt, max_tokens=self.chunk_max_tokens)
         
         if response:
             try:
@@ -233,64 +277,171 @@ Format your response as JSON with these exact keys:
         
         return result
     
+    def process_files(self, files):
+        """Analyze the files concurrently and add their results in selection order"""
+        self.llm_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent_requests)
+        start = time.time()
+        try:
+            # File threads wait on their chunk requests; the requests never wait on each other
+            with ThreadPoolExecutor(max_workers=self.files_in_flight) as file_pool:
+                futures = [file_pool.submit(self.process_file, filepath) for filepath in files]
+                for future in futures:
+                    file_result = future.result()
+                    if file_result:
+                        self.analysis_results.append(file_result)
+                        # Add to themed collections
+                        self.organize_by_theme(file_result)
+        finally:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        print(f"\nAnalyzed {len(files)} files in {time.time() - start:.1f}s ({self.token_limiter.summary()})")
+        print(f"Response cache: {self.llm_cache.summary()}")
+        print(f"Manifest: {self.manifest.summary()}")
+    
+    def analysis_settings(self):
+        """Settings an earlier analysis must share to be reused"""
+        return (f"{self.model}|{self.chunk_tokens}|{self.chunk_overlap}|{self.chunk_max_tokens}|"
+                f"{self.budget_margin}|{self.token_limiter.capacity}|{self.token_counter.name}|{self.max_file_size}")
+    
+    def scan_file(self, filepath, budget):
+        """One streaming pass over a file: (content hash, first 2000 characters, length, chunk count)"""
+        digest = hashlib.sha256()
+        preview = ''
+        size = 0
+        
+        def blocks():
+            nonlocal preview, size
+            for block in read_text_blocks(filepath, self.max_file_size):
+                digest.update(block.encode('utf-8'))
+                if len(preview) < 2000:
+                    preview += block[:2000 - len(preview)]
+                size += len(block)
+                yield block
+        
+        chunks = chunk_stream(blocks(), budget, self.chunk_overlap, self.token_counter.count)
+        chunk_total = sum(1 for _ in chunks)
+        return digest.hexdigest(), preview, size, chunk_total
+    
     def process_file(self, filepath):
-        """Process a single file"""
+        """Process a single file; its LLM requests run on the pool set up by process_files.
+        
+        The file is read twice as a stream, once to hash and count its chunks
+        and once to analyze them, with only a bounded window of chunks in
+        memory. Whatever the manifest already holds for the file
+        (categorization, chunk analyses, overall summary) is reused; only
+        new or changed parts are sent to the LLM."""
         print(f"\nProcessing: {filepath}")
+        filename = Path(filepath).name
+        settings = self.analysis_settings()
         
         # Read file content
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+            stat = os.stat(filepath)
+            reused = self.manifest.unchanged(filepath, settings, stat.st_size, stat.st_mtime)
+            if reused:
+                print(f"  {filename}: unchanged since the last run")
+                return reused
+            budget = self.chunk_budget(filename)
+            content_hash, preview, size, chunk_total = self.scan_file(filepath, budget)
         except Exception as e:
             print(f"Error reading file: {str(e)}")
             return None
         
-        # Truncate file if too large
-        if len(content) > self.max_file_size:
-            print(f"  Truncating file from {len(content)} to {self.max_file_size} characters")
-            content = content[:self.max_file_size]
+        if self.max_file_size and size >= self.max_file_size:
+            print(f"  Analyzing only the first {self.max_file_size} characters (max_file_size)")
         
-        filename = Path(filepath).name
+        # Touched but not edited
+        known = self.manifest.file_entry(filepath)
+        if known and known['settings'] != settings:
+            known = None
+        if known and known['content_hash'] == content_hash:
+            self.manifest.touch(filepath, stat.st_size, stat.st_mtime)
+            print(f"  {filename}: content unchanged since the last run")
+            return known['result']
         
         # Get intelligent categorization
         file_data = {
             'filename': filename,
             'filepath': str(filepath),
-            'content': content,
-            'size': len(content)
+            'content': preview,
+            'size': size
         }
         
-        print("  Getting smart categorization...")
-        categorization = self.categorize_content_with_llm(file_data)
-        
-        # Chunk the content
-        chunks = self.chunk_text(content, self.chunk_size)
-        print(f"  Split into {len(chunks)} chunks")
+        # Categorization only looks at the name and the first 2000 characters
+        preview_hash = text_hash(filename, preview)
+        categorization_future = None
+        if not known or known['preview_hash'] != preview_hash:
+            categorization_future = self.executor.submit(self.categorize_content_with_llm, file_data)
         
-        # Process each chunk
+        # Collect the chunk analyses in chunk order, whatever order they finished in
         chunk_summaries = []
+        summary_length = 0
         all_themes = []
         all_keywords = []
-        all_tags = categorization.get('tags', [])
+        chunk_tags = []
         all_key_points = []
-        
-        for i, chunk in enumerate(chunks, 1):
-            print(f"  Analyzing chunk {i}/{len(chunks)}...")
-            
-            analysis = self.analyze_chunk(chunk, i, len(chunks), filename)
+        complete = True
+        
+        def collect(key, analysis, future):
+            nonlocal summary_length, complete
+            if future is not None:
+                analysis = future.result()
+                if analysis:
+                    self.manifest.put_chunk(key, analysis)
+                else:
+                    complete = False
             
             if analysis:
-                chunk_summaries.append(analysis.get('summary', ''))
+                # The overall summary only reads the first 40,000 characters of them
+                if summary_length < 40000:
+                    chunk_summaries.append(analysis.get('summary', ''))
+                    summary_length += len(chunk_summaries[-1]) + 2
                 all_themes.extend(analysis.get('themes', []))
                 all_keywords.extend(analysis.get('keywords', []))
-                all_tags.extend(analysis.get('tags', []))
-                all_key_points.extend(analysis.get('key_points', []))
-            
-            # Rate limiting
-            time.sleep(2)
-        
-        # Generate overall file summary
-        overall_summary = self.generate_file_summary(filename, chunk_summaries)
+                chunk_tags.extend(analysis.get('tags', []))
+                if len(all_key_points) < 5:
+                    all_key_points.extend(analysis.get('key_points', []))
+        
+        # Stream the chunks; ones analyzed before with the same prompt are not sent again,
+        # and only a bounded window of chunks is held while requests are in flight
+        print(f"  {filename}: {chunk_total} chunks of up to {budget} tokens...")
+        chunk_keys = []
+        window = deque()
+        analyzed = 0
+        chunks = chunk_stream(read_text_blocks(filepath, self.max_file_size), budget, self.chunk_overlap,
+                              self.token_counter.count)
+        for i, chunk in enumerate(chunks, 1):
+            # Keyed on everything the model is sent: the prompt (template, file name,
+            # position and text) and the answer length
+            prompt = self.chunk_prompt(chunk, i, chunk_total, filename)
+            key = text_hash(self.model, str(self.chunk_max_tokens), prompt)
+            chunk_keys.append(key)
+            analysis = self.manifest.chunk_analyses([key]).get(key)
+            future = None
+            if analysis is None:
+                future = self.executor.submit(self.analyze_chunk, prompt)
+                analyzed += 1
+            window.append((key, analysis, future))
+            while len(window) > 2 * self.max_concurrent_requests:
+                collect(*window.popleft())
+        while window:
+            collect(*window.popleft())
+        print(f"  {filename}: analyzed {analyzed} of {len(chunk_keys)} chunks")
+        
+        categorization = categorization_future.result() if categorization_future else known['categorization']
+        all_tags = categorization.get('tags', []) + chunk_tags
+        categorized = 'unprocessed' not in categorization.get('tags', [])
+        if not categorized:
+            complete = False
+        
+        # Generate overall file summary (unless every chunk is as before)
+        if known and known['chunk_keys'] == chunk_keys and known['summary']:
+            overall_summary = known['summary']
+        else:
+            overall_summary = self.generate_file_summary(filename, chunk_summaries)
+            if overall_summary == "Summary generation failed":
+                complete = False
         
         # Get the 5 keywords from categorization
         five_keywords = categorization.get('keywords', [])[:5]
@@ -303,8 +454,8 @@ Format your response as JSON with these exact keys:
         file_result = {
             'filename': filename,
             'filepath': str(filepath),
-            'file_size': len(content),
-            'chunk_count': len(chunks),
+            'file_size': size,
+            'chunk_count': len(chunk_keys),
             'category': categorization.get('category', 'General'),
             'subcategory': categorization.get('subcategory', 'Uncategorized'),
             'primary_theme': categorization.get('primary_theme', 'Unknown'),
@@ -319,10 +470,14 @@ Format your response as JSON with these exact keys:
             'processed_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
-        self.analysis_results.append(file_result)
-        
-        # Add to themed collections
-        self.organize_by_theme(file_result)
+        # Failed requests are not recorded, so the next run retries them; the
+        # chunks that did succeed stay in the manifest for that run to reuse
+        if complete:
+            self.manifest.put_file(filepath, stat.st_size, stat.st_mtime, content_hash, settings, chunk_keys,
+                                   preview_hash, categorization, overall_summary, file_result)
+        else:
+            self.manifest.put_partial(filepath, settings, chunk_keys, preview_hash if categorized else None,
+                                      categorization if categorized else None)
         
         return file_result
     
@@ -574,8 +729,11 @@ Format as clear text, not JSON."""
             
             # Process each file
             print("\nStarting intelligent content analysis...")
-            for filepath in files:
-                self.process_file(filepath)
+            self.process_files(files)
+            
+            self.llm_cache.close()
+            self.manifest.prune()
+            self.manifest.close()
             
             # Export results
             csv_dir = self.export_results()
@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def throttled_retries(response):
+    """How many 429/503 answers urllib3 retried away before this response"""
+    retries = getattr(response.raw, 'retries', None)
+    if not retries:
+        return 0
+    return sum(1 for attempt in retries.history if attempt.status in THROTTLE_STATUSES)
+
+
+class HostBucket:
+    """Token bucket state of one host"""
+
+    def __init__(self, interval, capacity):
+        self.interval = interval  # seconds per token
+        self.capacity = capacity
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.floor = 0.0  # robots.txt Crawl-delay
+
+    def refill(self, now):
+        if self.interval <= 0:
+            self.tokens = self.capacity
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+        self.updated = now
+
+
+class AdaptiveRateLimiter:
+    """Per-host token buckets whose rate follows the server's responses.
+
+    Every host starts at one request per `initial_delay` seconds with a
+    burst of `burst` requests. Responses faster than `target_latency` speed
+    the host up by `speedup` (down to `min_delay` between requests), slow
+    ones (over twice the target) and failed fetches ease it off, and a
+    429/503 doubles the delay and pauses the host for its Retry-After (or
+    the new delay), so repeated throttling backs off exponentially up to
+    `max_delay`. A robots.txt Crawl-delay is a hard floor.
+
+    Learned delays are saved to `state_path` (JSON) on close and reused by
+    the next run for `max_age` seconds. The crawl engine asks `ready_at`
+    and `acquire` before each request, worker threads fetching outside
+    the engine block in `wait`; scrapers report each response with
+    `observe`.
+    """
+
+    def __init__(self, initial_delay=1.0, min_delay=0.1, max_delay=60.0, burst=2, target_latency=1.0,
+                 speedup=1.1, state_path=None, max_age=7 * 24 * 3600):
+        self.initial_delay = initial_delay
+        self.min_delay = min(min_delay, initial_delay)
+        self.max_delay = max(max_delay, initial_delay)
+        self.burst = burst
+        self.target_latency = target_latency
+        self.speedup = speedup
+        self.state_path = Path(state_path) if state_path else None
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.learned = self.load()
+        self.throttled = 0
+
+    def load(self):
+        """host -> {'delay', 'updated'} saved by earlier runs (stale entries dropped)"""
+        if not self.state_path or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {host: entry for host, entry in saved.items() if now - entry.get('updated', 0) < self.max_age}
+
+    def bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            delay = self.learned.get(host, {}).get('delay', self.initial_delay)
+            bucket = self.buckets[host] = HostBucket(min(self.max_delay, max(self.min_delay, delay)), self.burst)
+        return bucket
+
+    def ready_at(self, host, now=None):
+        """Monotonic time at which the host's next request may start"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            bucket = self.bucket(host)
+            bucket.refill(now)
+            ready = now if bucket.tokens >= 1 else now + (1 - bucket.tokens) * bucket.interval
+            return max(ready, bucket.blocked_until)
+
+    def acquire(self, host, now=None):
+        """Spend a token for a request starting now (after ready_at said it may)"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            bucket = self.bucket(host)
+            bucket.refill(now)
+            bucket.tokens -= 1
+
+    def wait(self, host):
+        """Block until the host's next request may start, then spend its token (for worker threads)"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                bucket = self.bucket(host)
+                bucket.refill(now)
+                ready = now if bucket.tokens >= 1 else now + (1 - bucket.tokens) * bucket.interval
+                ready = max(ready, bucket.blocked_until)
+                if ready <= now:
+                    bucket.tokens -= 1
+                    return
+            time.sleep(ready - now)
+
+    def set_floor(self, host, delay):
+        """Never go faster than one request per `delay` seconds (robots.txt Crawl-delay)"""
+        with self.lock:
+            bucket = self.bucket(host)
+            bucket.floor = delay
+            bucket.interval = max(bucket.interval, delay)
+            bucket.capacity = 1  # no bursts under a Crawl-delay
+
+    def observe(self, host, status, latency=None, retry_after=None, throttled=0):
+        """Adapt the host's rate to a response (status None = the fetch failed)"""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.bucket(host)
+            floor = max(self.min_delay, bucket.floor)
+            if status in THROTTLE_STATUSES or throttled:
+                self.throttled += 1
+                bucket.interval = min(self.max_delay, max(floor, bucket.interval * 2 ** max(1, throttled)))
+                pause = parse_retry_after(retry_after)
+                bucket.blocked_until = max(bucket.blocked_until, now + min(self.max_delay, pause if pause is not None
+                                                                          else bucket.interval))
+                bucket.tokens = min(bucket.tokens, 0.0)
+            elif status is None or (latency is not None and latency > 2 * self.target_latency):
+                bucket.interval = min(self.max_delay, max(floor, bucket.interval * 1.25))
+            elif latency is not None and latency <= self.target_latency:
+                bucket.interval = max(floor, bucket.interval / self.speedup)
+
+    def delay(self, host):
+        with self.lock:
+            return self.bucket(host).interval
+
+    def summary(self):
+        with self.lock:
+            if not self.buckets:
+                return "no hosts"
+            delays = sorted(bucket.interval for bucket in self.buckets.values())
+        return (f"{len(delays)} hosts, delay {delays[0]:.2f}s-{delays[-1]:.2f}s "
+                f"(median {delays[len(delays) // 2]:.2f}s), {self.throttled} throttled responses")
+
+    def close(self):
+        """Save the learned per-host delays for the next run"""
+        if not self.state_path:
+            return
+        now = time.time()
+        with self.lock:
+            saved = dict(self.learned)
+            saved.update({host: {'delay': round(bucket.interval, 4), 'updated': now}
+                          for host, bucket in self.buckets.items()})
+        # Write-then-rename so a crash never leaves a half-written file
+        temp = self.state_path.with_suffix(".tmp")
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=1, sort_keys=True)
+        os.replace(temp, self.state_path)
@@ -0,0 +1,246 @@
+import time
+import zlib
+import heapq
+import threading
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+
+from url_canon import canonicalize_url
+
+# Uncompressed size limit from the sitemaps protocol
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+
+def origin_of(url):
+    """scheme://host of a URL, the scope of a robots.txt file"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+
+def parse_crawl_delays(lines):
+    """{user-agent: seconds} from Crawl-delay lines (RobotFileParser ignores fractional delays)"""
+    delays = {}
+    agents = []
+    in_rules = False
+    for line in lines:
+        field, _, value = line.split('#', 1)[0].partition(':')
+        field, value = field.strip().lower(), value.strip()
+        if field == 'user-agent':
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif field:
+            in_rules = True
+            if field == 'crawl-delay':
+                try:
+                    for agent in agents:
+                        delays[agent] = float(value)
+                except ValueError:
+                    pass
+    return delays
+
+
+class RobotsCache:
+    """Per-host robots.txt rules, fetched once and cached for `ttl` seconds.
+
+    Follows RFC 9309: a missing robots.txt (4xx) allows everything, a server
+    error (5xx) disallows the host until the entry expires. If robots.txt
+    cannot be fetched at all the host is treated as unrestricted.
+    """
+
+    def __init__(self, session, user_agent="*", ttl=24 * 3600, timeout=15):
+        self.session = session
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.host_locks = {}
+        self.rules = {}  # scheme://host -> (RobotFileParser, fetched_at)
+        self.delays = {}  # scheme://host -> {user-agent: Crawl-delay}
+        self.disallowed = 0
+
+    def parser_for(self, url):
+        """Return the RobotFileParser for a URL's host, fetching it on first use"""
+        origin = origin_of(url)
+        with self.lock:
+            entry = self.rules.get(origin)
+            if entry and time.time() - entry[1] < self.ttl:
+                return entry[0]
+            host_lock = self.host_locks.setdefault(origin, threading.Lock())
+
+        # Only one thread fetches a given host's robots.txt; the others wait for it
+        with host_lock:
+            with self.lock:
+                entry = self.rules.get(origin)
+            if entry and time.time() - entry[1] < self.ttl:
+                return entry[0]
+            parser = self.fetch(origin)
+            with self.lock:
+                self.rules[origin] = (parser, time.time())
+            return parser
+
+    def fetch(self, origin):
+        parser = RobotFileParser(origin + "/robots.txt")
+        try:
+            response = self.session.get(origin + "/robots.txt", timeout=self.timeout)
+        except Exception as e:
+            print(f"Could not fetch {origin}/robots.txt: {str(e)}")
+            parser.allow_all = True
+            return parser
+
+        if response.status_code >= 500:
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            lines = response.text.splitlines()
+            parser.parse(lines)
+            with self.lock:
+                self.delays[origin] = parse_crawl_delays(lines)
+        parser.modified()
+        return parser
+
+    def allowed(self, url):
+        """True if robots.txt lets us fetch the URL"""
+        if self.parser_for(url).can_fetch(self.user_agent, url):
+            return True
+        with self.lock:
+            self.disallowed += 1
+        return False
+
+    def crawl_delay(self, url):
+        """Crawl-delay (or 1/Request-rate) in seconds for the URL's host, or None"""
+        parser = self.parser_for(url)
+        delays = self.delays.get(origin_of(url), {})
+        # Same agent matching as RobotFileParser: product token, then the * group
+        token = self.user_agent.split('/')[0].lower()
+        delay = next((value for agent, value in delays.items() if agent != '*' and agent in token), delays.get('*'))
+        if delay is not None:
+            return delay
+        rate = parser.request_rate(self.user_agent)
+        if rate and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    def sitemaps(self, url):
+        """Sitemap URLs listed in the host's robots.txt"""
+        return self.parser_for(url).site_maps() or []
+
+
+def local_name(tag):
+    """Element name without the XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapSeeder:
+    """Seed the frontier from sitemap.xml files, best priority first.
+
+    Sitemaps and sitemap indexes (plain or gzip-compressed) are
+    stream-parsed chunk by chunk with XMLPullParser, clearing each <url> as it is read, so
+    memory stays bounded by `max_urls` however large the sitemap is. Only
+    URLs on the seed's host that robots.txt allows are kept (every URL on
+    the host when `robots` is None); the `max_urls` highest <priority>
+    entries are enqueued, scored by that priority.
+    """
+
+    def __init__(self, session, robots, max_urls=10000, max_sitemaps=50, timeout=30):
+        self.session = session
+        self.robots = robots
+        self.max_urls = max_urls
+        self.max_sitemaps = max_sitemaps
+        self.timeout = timeout
+
+    def sitemap_urls_for(self, seed_url):
+        listed = self.robots.sitemaps(seed_url) if self.robots else []
+        return listed or [urljoin(seed_url, "/sitemap.xml")]
+
+    def iter_chunks(self, response):
+        """Body chunks, transparently gunzipping .xml.gz sitemaps"""
+        decompressor = None
+        total = 0
+        for index, chunk in enumerate(response.iter_content(64 * 1024)):
+            if index == 0 and chunk[:2] == b'\x1f\x8b':
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            total += len(chunk)
+            if total > MAX_SITEMAP_BYTES:
+                raise ValueError("sitemap larger than the protocol's 50 MB limit")
+            yield chunk
+
+    def iter_entries(self, sitemap_url, fetched):
+        """Yield (priority, url) from a sitemap, following sitemap indexes"""
+        if sitemap_url in fetched or len(fetched) >= self.max_sitemaps:
+            return
+        fetched.add(sitemap_url)
+        try:
+            response = self.session.get(sitemap_url, timeout=self.timeout, stream=True)
+        except Exception as e:
+            print(f"Could not fetch sitemap {sitemap_url}: {str(e)}")
+            return
+        if response.status_code != 200:
+            response.close()
+            return
+
+        children = []
+        try:
+            loc = None
+            priority = 0.5
+            parser = ET.XMLPullParser(events=('end',))
+            for chunk in self.iter_chunks(response):
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    name = local_name(element.tag)
+                    if name == 'loc':
+                        loc = (element.text or '').strip()
+                    elif name == 'priority':
+                        try:
+                            priority = float((element.text or '').strip())
+                        except ValueError:
+                            pass
+                    elif name == 'url':
+                        if loc:
+                            yield priority, loc
+                        loc, priority = None, 0.5
+                        element.clear()
+                    elif name == 'sitemap':
+                        if loc:
+                            children.append(loc)
+                        loc = None
+                        element.clear()
+        except (ET.ParseError, ValueError, OSError, zlib.error) as e:
+            print(f"Error parsing sitemap {sitemap_url}: {str(e)}")
+        finally:
+            response.close()
+
+        for child in children:
+            yield from self.iter_entries(child, fetched)
+
+    def urls_for(self, seed_url):
+        """The best `max_urls` (url, priority) sitemap entries for the seed's host, highest priority first"""
+        host = urlparse(canonicalize_url(seed_url) or seed_url).netloc
+        fetched = set()
+
+        def candidates():
+            for sitemap_url in self.sitemap_urls_for(seed_url):
+                for priority, loc in self.iter_entries(sitemap_url, fetched):
+                    url = canonicalize_url(loc)
+                    if url and urlparse(url).netloc == host and (self.robots is None or self.robots.allowed(url)):
+                        yield priority, url
+
+        best = heapq.nlargest(self.max_urls, candidates(), key=lambda entry: entry[0])
+        if fetched:
+            print(f"Sitemaps for {host}: {len(fetched)} files, {len(best)} URLs queued")
+        return [(url, priority) for priority, url in best]
+
+    def seed(self, engine, seed_urls, depth=1):
+        """Enqueue sitemap URLs for every seed host (one pass per host)"""
+        hosts = set()
+        for seed_url in seed_urls:
+            origin = origin_of(seed_url)
+            if origin in hosts:
+                continue
+            hosts.add(origin)
+            for url, priority in self.urls_for(seed_url):
+                engine.enqueue(url, depth, engine.scorer.sitemap_score(url, priority, depth))
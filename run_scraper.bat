@@ -13,7 +13,7 @@ if errorlevel 1 (
 
 REM Install required packages
 echo Installing required packages...
-pip install requests beautifulsoup4 urllib3
+pip install requests beautifulsoup4 urllib3 brotli lxml
 
 echo.
 echo ============================================================
@@ -27,7 +27,7 @@ echo ============================================================
 echo.
 
 REM Run the scraper
-python web_scraper.py
+python web_scraper.py %*
 
 echo.
 pause
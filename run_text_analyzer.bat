@@ -13,7 +13,7 @@ if errorlevel 1 (
 
 REM Install required packages
 echo Installing required packages...
-pip install requests pandas openpyxl
+pip install requests pandas openpyxl tiktoken
 
 echo.
 echo ============================================================
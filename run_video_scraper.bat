@@ -13,7 +13,7 @@ if errorlevel 1 (
 
 REM Install required packages
 echo Installing required packages...
-pip install requests beautifulsoup4
+pip install requests beautifulsoup4 brotli
 
 echo.
 echo ============================================================
@@ -26,7 +26,7 @@ echo ============================================================
 echo.
 
 REM Run the video scraper
-python video_scraper.py
+python video_scraper.py %*
 
 echo.
 pause
@@ -0,0 +1,50 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# urllib3 decodes brotli transparently when one of these is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+# Status codes worth retrying with backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_session(headers=None, pool_size=10, pool_hosts=20, retries=3, backoff_factor=0.5):
+    """Create a pooled keep-alive session shared by all requests of a scraper.
+
+    pool_size is the number of connections kept open per host, pool_hosts the
+    number of per-host pools cached at once. GET/HEAD requests answered with
+    429/5xx are retried with exponential backoff, honoring Retry-After.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive'
+    })
+    if headers:
+        session.headers.update(headers)
+    return session
+
@@ -0,0 +1,162 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlparse
+
+from rate_limiter import throttled_retries
+from robots_sitemap import origin_of
+
+# Quoted .json URLs and fetch()/XHR targets inside JavaScript
+JSON_REFERENCE = re.compile(r'["\']((?:https?:)?/{0,2}[^"\'\s<>]*\.json(?:\?[^"\'\s<>]*)?)["\']', re.IGNORECASE)
+FETCH_REFERENCE = re.compile(r'(?:fetch|\.open\(\s*["\']GET["\']\s*,|axios\.get|\$\.getJSON)\s*\(?\s*["\']([^"\'\s<>]+)["\']',
+                             re.IGNORECASE)
+
+# Response types worth mining
+MINED_TYPES = ('javascript', 'ecmascript', 'json', 'text/plain')
+
+
+class ResourceMiner:
+    """Fetch a page's same-origin JS and JSON resources and mine them for video URLs.
+
+    Candidates are external <script src>, <link rel=preload|prefetch> with
+    as=script/fetch, and .json / fetch() targets named in inline scripts;
+    endpoints named inside a fetched JS bundle are followed one level.
+    Only resources on the page's origin (and allowed by robots.txt when
+    `robots` is given) are fetched, each at most once per crawl: pages that
+    share a bundle reuse the in-flight or finished result. Fetches run on a
+    bounded thread pool, bodies are capped at `max_bytes`, and `mine_text`
+    (the scraper's regex extraction) turns each body into video URLs.
+    With a `rate_limiter` (the crawl's rate_limiter.AdaptiveRateLimiter)
+    each fetch waits for its host's turn and reports the response back,
+    so resource fetches share the page fetches' per-host budget.
+    """
+
+    def __init__(self, session, mine_text, robots=None, max_workers=4, max_per_page=20,
+                 max_bytes=2 * 1024 * 1024, timeout=20, rate_limiter=None):
+        self.session = session
+        self.mine_text = mine_text
+        self.robots = robots
+        self.rate_limiter = rate_limiter
+        self.max_per_page = max_per_page
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # url -> Future of (videos, endpoints), so shared bundles are fetched once
+        self.url_futures = {}
+        self.lock = threading.Lock()
+        self.fetched = 0
+        self.reused = 0
+        self.bytes = 0
+
+    def references(self, soup, page_url):
+        """Same-origin JS/JSON resource URLs referenced by a parsed page"""
+        candidates = []
+        for script in soup.find_all('script'):
+            if script.get('src'):
+                candidates.append(script['src'])
+            elif script.string:
+                candidates += self.text_references(script.string)
+        for link in soup.find_all('link', href=True):
+            rel = ' '.join(link.get('rel') or []).lower()
+            if ('preload' in rel or 'prefetch' in rel) and link.get('as') in ('script', 'fetch'):
+                candidates.append(link['href'])
+        return self.same_origin(candidates, page_url)
+
+    def text_references(self, text):
+        return JSON_REFERENCE.findall(text) + FETCH_REFERENCE.findall(text)
+
+    def same_origin(self, candidates, base_url):
+        origin = origin_of(base_url)
+        urls = []
+        for candidate in candidates:
+            url = urljoin(base_url, candidate.strip()).split('#', 1)[0]
+            if url.startswith(('http://', 'https://')) and origin_of(url) == origin and url not in urls:
+                urls.append(url)
+        return urls[:self.max_per_page]
+
+    def read_body(self, response):
+        """Decoded text of a streamed response, or None if it is too large"""
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                return None
+            chunks.append(chunk)
+        with self.lock:
+            self.bytes += size
+        return b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')
+
+    def fetch(self, url):
+        """Mine one resource: ({video url: resource url}, same-origin JSON endpoints it names)"""
+        if self.robots and not self.robots.allowed(url):
+            return {}, []
+        host = urlparse(url).netloc.lower()
+        if self.rate_limiter:
+            self.rate_limiter.wait(host)
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                if self.rate_limiter:
+                    self.rate_limiter.observe(host, response.status_code, response.elapsed.total_seconds(),
+                                              response.headers.get('Retry-After'), throttled_retries(response))
+                content_type = response.headers.get('content-type', '').lower()
+                if response.status_code != 200 or (content_type and not any(kind in content_type for kind in MINED_TYPES)):
+                    return {}, []
+                text = self.read_body(response)
+        except Exception as e:
+            if self.rate_limiter and getattr(e, 'response', None) is None:
+                self.rate_limiter.observe(host, None)
+            print(f"    Error fetching resource {url}: {str(e)}")
+            return {}, []
+        if text is None:
+            return {}, []
+        with self.lock:
+            self.fetched += 1
+
+        found = {}
+        for video_url in self.mine_text(text):
+            if not video_url.startswith(('http://', 'https://', 'data:', 'blob:')):
+                video_url = urljoin(url, video_url)
+            found.setdefault(video_url, url)
+        endpoints = [] if 'json' in content_type else self.same_origin(self.text_references(text), url)
+        return found, endpoints
+
+    def submit(self, url):
+        """Schedule a resource, reusing the in-flight or finished fetch of the same URL"""
+        with self.lock:
+            future = self.url_futures.get(url)
+            if future is None:
+                future = self.executor.submit(self.fetch, url)
+                self.url_futures[url] = future
+            else:
+                self.reused += 1
+            return future
+
+    def mine(self, soup, page_url):
+        """{video url: resource url} from every resource the page references"""
+        found = {}
+        urls = self.references(soup, page_url)
+        requested = set(urls)
+        # Two rounds: the page's resources, then JSON endpoints their bundles name.
+        # The page's worker thread does the waiting, never a pool thread.
+        for _ in range(2):
+            futures = [self.submit(url) for url in urls]
+            wait(futures)
+            urls = []
+            for future in futures:
+                videos, endpoints = future.result()
+                for video_url, resource in videos.items():
+                    found.setdefault(video_url, resource)
+                for endpoint in endpoints:
+                    if endpoint not in requested and len(requested) < 2 * self.max_per_page:
+                        requested.add(endpoint)
+                        urls.append(endpoint)
+        return found
+
+    def summary(self):
+        return (f"{self.fetched} fetched ({self.bytes / 1024 / 1024:.1f} MB), "
+                f"{self.reused} references served from earlier fetches")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
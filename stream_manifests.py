@@ -0,0 +1,291 @@
+import re
+import json
+import math
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin
+
+from robots_sitemap import local_name
+
+# HLS attribute lists: KEY=value or KEY="quoted, value"
+HLS_ATTRIBUTE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+ISO_DURATION = re.compile(r'P(?:(\d+(?:\.\d+)?)D)?(?:T(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?)?$')
+
+MAX_MANIFEST_BYTES = 5 * 1024 * 1024
+
+
+def parse_attributes(text):
+    """{KEY: value} from an HLS attribute list, quotes removed"""
+    return {key: value.strip('"') for key, value in HLS_ATTRIBUTE.findall(text)}
+
+
+def parse_iso_duration(text):
+    """Seconds in an ISO 8601 duration (PT1H2M3.5S), or None"""
+    match = ISO_DURATION.match((text or '').strip())
+    if not text or not match:
+        return None
+    days, hours, minutes, seconds = (float(group or 0) for group in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + seconds
+
+
+def parse_hls(text, base_url):
+    """Master playlist -> {'variants': [...]}; media playlist -> segment count and duration"""
+    variants = []
+    segments = 0
+    duration = 0.0
+    ended = False
+    encrypted = False
+    pending_variant = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            pending_variant = parse_attributes(line[len('#EXT-X-STREAM-INF:'):])
+        elif line.startswith('#EXTINF:'):
+            try:
+                duration += float(line[len('#EXTINF:'):].split(',', 1)[0])
+            except ValueError:
+                pass
+            segments += 1
+        elif line.startswith('#EXT-X-ENDLIST'):
+            ended = True
+        elif line.startswith('#EXT-X-KEY:'):
+            encrypted = encrypted or parse_attributes(line[len('#EXT-X-KEY:'):]).get('METHOD', 'NONE') != 'NONE'
+        elif not line.startswith('#') and pending_variant is not None:
+            variants.append({
+                'url': urljoin(base_url, line),
+                'bandwidth': int(pending_variant['BANDWIDTH']) if pending_variant.get('BANDWIDTH', '').isdigit() else None,
+                'resolution': pending_variant.get('RESOLUTION'),
+                'codecs': pending_variant.get('CODECS'),
+                'frame_rate': pending_variant.get('FRAME-RATE')
+            })
+            pending_variant = None
+    if variants:
+        return {'format': 'hls', 'variants': variants}
+    return {'format': 'hls', 'segments': segments, 'duration': round(duration, 3), 'live': not ended,
+            'encrypted': encrypted}
+
+
+def inherited(elements, name):
+    """Attribute from the innermost element that sets it (Representation > AdaptationSet > Period)"""
+    for element in elements:
+        if element is not None and element.get(name) is not None:
+            return element.get(name)
+    return None
+
+
+def child(element, name):
+    if element is None:
+        return None
+    return next((node for node in element if local_name(node.tag) == name), None)
+
+
+def count_segments(levels, period_duration):
+    """Segments of one Representation in one Period, from its SegmentTimeline/Template/List/Base"""
+    for level in levels:
+        segment_list = child(level, 'SegmentList')
+        if segment_list is not None:
+            return sum(1 for node in segment_list if local_name(node.tag) == 'SegmentURL')
+        template = child(level, 'SegmentTemplate')
+        if template is None:
+            continue
+        timescale = float(template.get('timescale', 1))
+        timeline = child(template, 'SegmentTimeline')
+        if timeline is not None:
+            count = 0
+            position = 0
+            for entry in timeline:
+                if local_name(entry.tag) != 'S':
+                    continue
+                position = int(entry.get('t', position))
+                length = int(entry.get('d', 0))
+                repeat = int(entry.get('r', 0))
+                if repeat < 0:
+                    # Repeat until the end of the period
+                    end = (period_duration or 0) * timescale
+                    repeat = max(0, math.ceil((end - position) / length) - 1) if length else 0
+                count += repeat + 1
+                position += length * (repeat + 1)
+            return count
+        if template.get('duration') and period_duration:
+            return math.ceil(period_duration * timescale / float(template.get('duration')))
+    return 1 if any(child(level, 'SegmentBase') is not None or child(level, 'BaseURL') is not None
+                    for level in levels) else None
+
+
+def parse_dash(data, base_url):
+    """{'variants': [...]} with one entry per Representation of an MPD"""
+    root = ET.fromstring(data)
+    total = parse_iso_duration(root.get('mediaPresentationDuration'))
+    live = root.get('type') == 'dynamic'
+    representations = {}
+    for period in (node for node in root if local_name(node.tag) == 'Period'):
+        period_duration = parse_iso_duration(period.get('duration')) or total
+        for adaptation in (node for node in period if local_name(node.tag) == 'AdaptationSet'):
+            for representation in (node for node in adaptation if local_name(node.tag) == 'Representation'):
+                levels = (representation, adaptation, period)
+                width, height = inherited(levels, 'width'), inherited(levels, 'height')
+                key = representation.get('id') or f"{len(representations)}"
+                entry = representations.setdefault(key, {
+                    'url': base_url,
+                    'id': representation.get('id'),
+                    'bandwidth': int(representation.get('bandwidth')) if (representation.get('bandwidth') or '').isdigit() else None,
+                    'resolution': f"{width}x{height}" if width and height else None,
+                    'codecs': inherited(levels, 'codecs'),
+                    'mime_type': inherited(levels, 'mimeType') or inherited(levels, 'contentType'),
+                    'frame_rate': inherited(levels, 'frameRate'),
+                    'segments': 0,
+                    'duration': 0.0,
+                    'live': live
+                })
+                segments = count_segments(levels, period_duration)
+                if segments is not None:
+                    entry['segments'] += segments
+                entry['duration'] = round(entry['duration'] + (period_duration or 0), 3)
+    return {'format': 'dash', 'variants': list(representations.values())}
+
+
+class ManifestProber:
+    """Expand discovered HLS/DASH manifests into per-variant stream records.
+
+    `submit(url, page_url)` queues a manifest on a bounded thread pool and
+    returns at once, so crawl workers never wait on it. HLS master
+    playlists fan out to their variant playlists (at most `max_variants`)
+    through completion callbacks, never by blocking a pool thread; a
+    variant may itself be a master or a DASH MPD. DASH MPDs list every
+    Representation directly. Each stream's resolution, bandwidth, codecs,
+    segment count and total duration is appended to `streams.jsonl` as it
+    completes, once per (url, Representation id). Every manifest URL is
+    fetched at most once (the cache maps URL -> future), however many
+    pages or masters reference it.
+    """
+
+    def __init__(self, session, output_dir, max_workers=8, max_variants=20, timeout=20):
+        self.session = session
+        self.path = Path(output_dir) / "streams.jsonl"
+        self.max_variants = max_variants
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # url -> Future of the parsed manifest
+        self.cache = {}
+        # Master playlists already expanded, and (url, id) of the streams written
+        self.masters = set()
+        self.written = set()
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.outstanding = 0
+        self.fetched = 0
+        self.cached = 0
+        self.failed = 0
+        self.streams = 0
+
+    def fetch(self, url):
+        """Download and parse one manifest (None if it is neither HLS nor DASH)"""
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            data = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                data += chunk
+                if len(data) > MAX_MANIFEST_BYTES:
+                    raise ValueError("manifest too large")
+        with self.lock:
+            self.fetched += 1
+        data = bytes(data)
+        head = data[:1024].lstrip(b'\xef\xbb\xbf \t\r\n')
+        if head.startswith(b'#EXTM3U'):
+            return parse_hls(data.decode('utf-8', errors='replace'), url)
+        if b'<MPD' in head:
+            return parse_dash(data, url)
+        return None
+
+    def manifest(self, url):
+        """Future of a parsed manifest, shared by every reference to the URL (lock held)"""
+        future = self.cache.get(url)
+        if future is None:
+            future = self.cache[url] = self.executor.submit(self.fetch, url)
+        else:
+            self.cached += 1
+        self.outstanding += 1
+        return future
+
+    def submit(self, url, page_url):
+        """Probe a manifest found on a page; results land in streams.jsonl (once per manifest)"""
+        with self.lock:
+            if url in self.cache:
+                self.cached += 1
+                return
+            future = self.manifest(url)
+        future.add_done_callback(lambda done: self.expand(done, url, page_url))
+
+    def expand(self, future, url, page_url, variant=None):
+        try:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"    Could not probe manifest {url}: {str(e)}")
+                with self.lock:
+                    self.failed += 1
+                return
+            if result is None:
+                return
+            if 'segments' in result:
+                # A media playlist: one stream, with the master's attributes if it had one
+                record = dict(variant or {'url': url, 'bandwidth': None, 'resolution': None, 'codecs': None})
+                record.update(url=url, segments=result['segments'], duration=result['duration'], live=result['live'],
+                              encrypted=result['encrypted'])
+                self.write(record, result['format'], page_url)
+            elif result['format'] == 'dash':
+                # Every Representation, filling what the MPD leaves out from the master's variant entry
+                for representation in result['variants']:
+                    record = dict(variant or {})
+                    record.update((key, value) for key, value in representation.items()
+                                  if value is not None or key not in record)
+                    self.write(record, 'dash', page_url)
+            elif result.get('variants'):
+                # A master playlist (possibly nested in another): probe its variants
+                with self.lock:
+                    if url in self.masters:
+                        return
+                    self.masters.add(url)
+                for entry in result['variants'][:self.max_variants]:
+                    entry = dict(entry, manifest=url)
+                    with self.lock:
+                        variant_future = self.manifest(entry['url'])
+                    variant_future.add_done_callback(
+                        lambda done, entry=entry: self.expand(done, entry['url'], page_url, entry))
+            else:
+                print(f"    Could not probe manifest {url}: unexpected {result['format']} playlist")
+                with self.lock:
+                    self.failed += 1
+        finally:
+            with self.lock:
+                self.outstanding -= 1
+                if self.outstanding == 0:
+                    self.idle.notify_all()
+
+    def write(self, record, manifest_format, page_url):
+        record = dict(record, format=manifest_format, found_on=page_url)
+        record.setdefault('manifest', record['url'])
+        with self.lock:
+            if (record['url'], record.get('id')) in self.written:
+                return
+            self.written.add((record['url'], record.get('id')))
+            self.streams += 1
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        return (f"{self.fetched} manifests fetched, {self.cached} served from cache, {self.failed} failed, "
+                f"{self.streams} streams in {self.path.name}")
+
+    def close(self):
+        """Wait for every queued manifest and its variants, then stop the pool"""
+        with self.lock:
+            while self.outstanding:
+                self.idle.wait()
+        self.executor.shutdown(wait=True)
+
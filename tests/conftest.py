@@ -0,0 +1,145 @@
+import re
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# The tools are flat scripts in the repository root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def serve():
+    """Start local HTTP servers for request handler classes; serve(handler) returns the base URL"""
+    servers = []
+
+    def start(handler):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class StandInOpenRouter(BaseHTTPRequestHandler):
+    """Stand-in OpenRouter chat/completions endpoint with canned analysis answers"""
+    protocol_version = 'HTTP/1.1'
+    latency = 0.05
+    throttle_every = 0  # answer every Nth request with a 429
+    fail_matching = None  # answer prompts containing this text with a 500
+    count = 0
+    in_flight = 0
+    peak = 0  # most requests in flight at once
+    count_lock = threading.Lock()
+
+    def do_POST(self):
+        with self.count_lock:
+            type(self).in_flight += 1
+            type(self).peak = max(type(self).peak, type(self).in_flight)
+        try:
+            self.answer()
+        finally:
+            with self.count_lock:
+                type(self).in_flight -= 1
+
+    def answer(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        prompt = body['messages'][0]['content']
+        with self.count_lock:
+            type(self).count += 1
+            number = type(self).count
+        if self.throttle_every and number % self.throttle_every == 0:
+            self.send_json(429, {'error': {'message': 'rate limited'}}, {'Retry-After': '1'})
+            return
+        if self.fail_matching and self.fail_matching in prompt:
+            self.send_json(500, {'error': {'message': 'internal error'}})
+            return
+        time.sleep(self.latency)
+
+        chunk = re.search(r'\(chunk (\d+) of (\d+) from file: ([^)]+)\)', prompt)
+        if chunk:
+            number, total, filename = chunk.groups()
+            content = json.dumps({
+                'summary': f"{filename} chunk {number}",
+                'themes': [f"theme {filename}"],
+                'key_points': [f"point {number}"],
+                'keywords': [f"keyword {number}"],
+                'tags': ['stand-in'],
+            })
+        elif prompt.startswith('Based on these chunk summaries'):
+            # Echo the order the chunk summaries arrived in
+            content = ' '.join(re.findall(r'chunk (\d+)', prompt.split('Chunk summaries:', 1)[1]))
+        else:
+            content = json.dumps({'category': 'Test', 'subcategory': 'Stand-in', 'keywords': ['a', 'b', 'c', 'd', 'e']})
+        usage = {'total_tokens': (len(prompt) + len(content)) // 4 + 2}
+        self.send_json(200, {'choices': [{'message': {'role': 'assistant', 'content': content}}], 'usage': usage})
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def openrouter(serve):
+    """A stand-in OpenRouter server of the test's own: .api_url, .count and .peak of requests, .throttle_every, .fail_matching"""
+    handler = type('OpenRouter', (StandInOpenRouter,), {'count': 0, 'in_flight': 0, 'peak': 0,
+                                                        'count_lock': threading.Lock()})
+    handler.api_url = serve(handler) + "/api/v1/chat/completions"
+    return handler
+
+
+@pytest.fixture
+def make_analyzer(openrouter, tmp_path):
+    """make_analyzer(output, cache): a TextAnalyzer on the stand-in server, writing under tmp_path.
+
+    Analyzers sharing `output` share a manifest, ones sharing `cache` share
+    a response cache; small chunks make a few hundred sentences several requests.
+    """
+    from process_text_to_tables import TextAnalyzer
+
+    analyzers = []
+
+    def make(output="output", cache="llm_cache"):
+        analyzer = TextAnalyzer(output_dir=tmp_path / output, cache_dir=tmp_path / cache)
+        analyzer.api_url = openrouter.api_url
+        analyzer.chunk_tokens = 500
+        analyzers.append(analyzer)
+        return analyzer
+
+    yield make
+    for analyzer in analyzers:
+        analyzer.llm_cache.close()
+        analyzer.manifest.close()
+
+
+@pytest.fixture
+def documents(tmp_path):
+    """write(count, sentences): text files whose every sentence differs, as a list of paths"""
+    def write(count, sentences=120):
+        files = []
+        for number in range(count):
+            path = tmp_path / f"doc{number}.txt"
+            path.write_text(''.join(f"Document {number} sentence {line} says something worth analyzing. "
+                                    for line in range(sentences)), encoding='utf-8')
+            files.append(str(path))
+        return files
+
+    return write
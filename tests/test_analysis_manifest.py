@@ -0,0 +1,82 @@
+import time
+from pathlib import Path
+
+from analysis_manifest import AnalysisManifest, text_hash
+
+
+def analyze(make_analyzer, openrouter, files, run):
+    """Requests one run made and its results by file name; only the manifest is shared between runs"""
+    analyzer = make_analyzer(cache=f"llm_cache_{run}")
+    before = openrouter.count
+    analyzer.process_files(files)
+    return openrouter.count - before, {result['filename']: result for result in analyzer.analysis_results}
+
+
+def test_rerun_only_sends_changed_chunks(make_analyzer, openrouter, documents):
+    files = documents(20)
+    first_requests, first = analyze(make_analyzer, openrouter, files, 1)
+    assert first_requests > 20 * 3
+
+    # Append to one file, reword a sentence in the middle of another (same
+    # length, so the chunks after it keep their boundaries)
+    time.sleep(0.05)
+    with open(files[0], 'a', encoding='utf-8') as f:
+        f.write("A new closing sentence was added. ")
+    text = Path(files[1]).read_text(encoding='utf-8')
+    Path(files[1]).write_text(text.replace("sentence 60 says", "sentence 60 adds"), encoding='utf-8')
+    second_requests, second = analyze(make_analyzer, openrouter, files, 2)
+    # Each edited file: its changed chunk and a new overall summary
+    assert second_requests == 4
+    assert all(first[name] == second[name] for name in first if name not in ('doc0.txt', 'doc1.txt'))
+    assert second['doc1.txt']['chunk_count'] == first['doc1.txt']['chunk_count']
+
+    third_requests, third = analyze(make_analyzer, openrouter, files, 3)
+    assert third_requests == 0 and third == second
+
+
+def test_failed_chunk_keeps_the_others(make_analyzer, openrouter, documents, tmp_path):
+    files = documents(3)
+    openrouter.fail_matching = "(chunk 3 of"
+    first_requests, first = analyze(make_analyzer, openrouter, files, 1)
+    # The finished chunks of the failed files are still referenced
+    manifest = AnalysisManifest(tmp_path / "output" / "analysis_manifest.sqlite")
+    manifest.prune()
+    manifest.close()
+
+    openrouter.fail_matching = None
+    second_requests, second = analyze(make_analyzer, openrouter, files, 2)
+    # Per file: the failed chunk and a new overall summary
+    assert second_requests == 3 * 2
+    assert all(result['chunk_count'] > 3 for result in second.values())
+
+    third_requests, third = analyze(make_analyzer, openrouter, files, 3)
+    assert third_requests == 0 and third == second
+
+
+def test_prune_drops_unreferenced_chunks(tmp_path):
+    manifest = AnalysisManifest(tmp_path / "manifest.sqlite")
+    kept, dropped = text_hash("model", "kept"), text_hash("model", "dropped")
+    manifest.put_chunk(kept, {'summary': 'kept'})
+    manifest.put_chunk(dropped, {'summary': 'dropped'})
+    manifest.put_file("a.txt", 10, 1.0, "hash", "settings", [kept], "preview", {}, "summary", {})
+    assert manifest.prune() == 1
+    assert manifest.chunk_analyses([kept, dropped]) == {kept: {'summary': 'kept'}}
+    manifest.close()
+
+
+def test_chunks_are_keyed_on_the_whole_prompt(make_analyzer, openrouter, documents):
+    files = documents(2)
+    first_requests, first = analyze(make_analyzer, openrouter, files, 1)
+
+    # The same text under another name is a different prompt
+    renamed = Path(files[0]).with_name("renamed.txt")
+    renamed.write_text(Path(files[0]).read_text(encoding='utf-8'), encoding='utf-8')
+    renamed_requests, renamed_results = analyze(make_analyzer, openrouter, [str(renamed)], 2)
+    assert renamed_requests == renamed_results['renamed.txt']['chunk_count'] + 2
+
+    # A longer answer limit invalidates every chunk
+    analyzer = make_analyzer(cache="llm_cache_3")
+    analyzer.chunk_max_tokens += 1
+    before = openrouter.count
+    analyzer.process_files(files)
+    assert openrouter.count - before == first_requests
@@ -0,0 +1,46 @@
+from llm_cache import LLMResponseCache
+
+
+def test_size_eviction_and_ttl(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache", max_bytes=1000, ttl=60)
+    for number in range(10):
+        cache.put("model", f"prompt {number}", 100, 0.3, "x" * 200, tokens=50)
+    assert cache.total_bytes <= 1000 and cache.evicted == 5, cache.summary()
+    # Least recently used first
+    assert cache.get("model", "prompt 0", 100, 0.3) is None
+    assert cache.get("model", "prompt 9", 100, 0.3) == "x" * 200
+    # Every request parameter is part of the key
+    assert cache.get("model", "prompt 9", 100, 0.7) is None
+    assert cache.get("other", "prompt 9", 100, 0.3) is None
+
+    cache.db.execute("UPDATE responses SET created = created - 120")
+    assert cache.get("model", "prompt 9", 100, 0.3) is None and cache.expired == 1
+    cache.close()
+
+
+def test_entries_survive_reopening(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache")
+    cache.put("model", "prompt", 100, 0.3, "answer", tokens=42)
+    cache.close()
+
+    cache = LLMResponseCache(tmp_path / "cache")
+    assert cache.total_bytes == len("answer")
+    assert cache.get("model", "prompt", 100, 0.3) == "answer"
+    assert (cache.hits, cache.tokens_saved) == (1, 42)
+    cache.close()
+
+
+def test_rerun_is_served_from_the_cache(make_analyzer, openrouter, documents):
+    files = documents(4)
+    results = []
+    for run in ('first', 'second'):
+        # A manifest of its own, so the second run has only the cache to go on
+        analyzer = make_analyzer(output=f"output_{run}")
+        before = openrouter.count
+        analyzer.process_files(files)
+        requests = openrouter.count - before
+        results.append([{k: v for k, v in result.items() if k != 'processed_date'}
+                        for result in analyzer.analysis_results])
+    assert requests == 0
+    assert analyzer.llm_cache.hits == analyzer.llm_cache.lookups > 0
+    assert results[0] == results[1]
@@ -0,0 +1,51 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler
+
+from rate_limiter import AdaptiveRateLimiter
+from scraper_http import create_session
+from script_resources import ResourceMiner
+
+
+class _ThrottlingHandler(BaseHTTPRequestHandler):
+    """Answers /busy.js with a 429 and anything else with a small script, recording request times"""
+    starts = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.starts.append(time.monotonic())
+        if self.path == '/busy.js':
+            status, body = 429, b''
+        else:
+            status, body = 200, b'var src = "/clip.mp4";'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/javascript')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_fetches_wait_for_the_host_limiter(serve):
+    handler = type('Handler', (_ThrottlingHandler,), {'starts': []})
+    base = serve(handler)
+    limiter = AdaptiveRateLimiter(0.2, min_delay=0.2, max_delay=0.2, burst=1)
+    session = create_session({}, retries=0)
+    miner = ResourceMiner(session, lambda text: {'/clip.mp4'}, max_workers=4, rate_limiter=limiter)
+    try:
+        futures = [miner.submit(f"{base}/bundle{i}.js") for i in range(4)]
+        assert all(future.result()[0] for future in futures)
+        assert miner.submit(f"{base}/busy.js").result() == ({}, [])
+    finally:
+        miner.close()
+        session.close()
+
+    # Four workers, but one request per 0.2s to the host
+    gaps = [later - earlier for earlier, later in zip(handler.starts, handler.starts[1:])]
+    assert min(gaps) > 0.15
+    assert limiter.throttled == 1
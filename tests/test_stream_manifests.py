@@ -0,0 +1,182 @@
+import json
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from scraper_http import create_session
+from stream_manifests import ManifestProber, parse_dash, parse_hls, parse_iso_duration
+
+# Manifests served by the stand-in streaming server
+FIXTURES = {
+    '/master.m3u8': ('application/vnd.apple.mpegurl', """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=2800000,RESOLUTION=1280x720,CODECS="avc1.4d401f,mp4a.40.2",FRAME-RATE=30
+hd/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.42c01e,mp4a.40.2"
+/sd/index.m3u8
+"""),
+    # A master whose variants are another master, an MPD and a media playlist that master lists too
+    '/nested.m3u8': ('application/vnd.apple.mpegurl', """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=3000000
+master.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=6000000,FRAME-RATE=25
+movie.mpd
+#EXT-X-STREAM-INF:BANDWIDTH=2800000,RESOLUTION=1280x720
+hd/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=100
+nested.m3u8
+"""),
+    '/hd/index.m3u8': ('application/vnd.apple.mpegurl', """#EXTM3U
+#EXT-X-TARGETDURATION:10
+#EXT-X-KEY:METHOD=AES-128,URI="key.bin"
+#EXTINF:10.0,
+seg0.ts
+#EXTINF:10.0,
+seg1.ts
+#EXTINF:4.5,
+seg2.ts
+#EXT-X-ENDLIST
+"""),
+    '/sd/index.m3u8': ('application/vnd.apple.mpegurl', """#EXTM3U
+#EXTINF:6.0,
+a.ts
+#EXTINF:6.0,
+b.ts
+"""),
+    '/movie.mpd': ('application/dash+xml', """<?xml version="1.0"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" mediaPresentationDuration="PT1M0.0S">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" codecs="avc1.640028">
+      <SegmentTemplate timescale="1000" duration="4000" media="$Number$.m4s"/>
+      <Representation id="1080" bandwidth="5000000" width="1920" height="1080"/>
+      <Representation id="480" bandwidth="1000000" width="854" height="480" codecs="avc1.4d401e"/>
+    </AdaptationSet>
+    <AdaptationSet mimeType="audio/mp4" codecs="mp4a.40.2">
+      <Representation id="audio" bandwidth="128000">
+        <SegmentTemplate timescale="48000" media="a$Time$.m4s">
+          <SegmentTimeline><S t="0" d="96000" r="9"/><S d="48000"/></SegmentTimeline>
+        </SegmentTemplate>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""),
+}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Stand-in streaming server: the fixtures plus /gen/N.m3u8 media playlists"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith('/gen/'):
+            content_type = 'application/vnd.apple.mpegurl'
+            body = "#EXTM3U\n" + "#EXTINF:2.0,\ns.ts\n" * 5 + "#EXT-X-ENDLIST\n"
+        elif self.path in FIXTURES:
+            content_type, body = FIXTURES[self.path]
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base(serve):
+    return serve(_FixtureHandler)
+
+
+@pytest.fixture
+def session():
+    session = create_session(pool_size=16)
+    yield session
+    session.close()
+
+
+def read_streams(prober):
+    with open(prober.path, encoding='utf-8') as f:
+        return {(record['url'], record.get('id')): record for record in map(json.loads, f)}
+
+
+def test_parse_iso_duration():
+    assert parse_iso_duration('PT1H2M3.5S') == 3723.5
+    assert parse_iso_duration('P1DT1S') == 86401
+    assert parse_iso_duration('soon') is None
+    assert parse_iso_duration(None) is None
+
+
+def test_parse_hls_master_resolves_variants():
+    result = parse_hls(FIXTURES['/master.m3u8'][1], 'http://cdn.test/live/master.m3u8')
+    assert [variant['url'] for variant in result['variants']] == \
+        ['http://cdn.test/live/hd/index.m3u8', 'http://cdn.test/sd/index.m3u8']
+    assert result['variants'][0]['frame_rate'] == '30'
+
+
+def test_parse_dash_counts_segments():
+    result = parse_dash(FIXTURES['/movie.mpd'][1].encode(), 'http://cdn.test/movie.mpd')
+    variants = {variant['id']: variant for variant in result['variants']}
+    assert variants['1080']['segments'] == 15
+    assert variants['audio']['segments'] == 11
+
+
+def test_prober_expands_fixtures(base, session, tmp_path):
+    prober = ManifestProber(session, tmp_path, max_workers=16)
+    for page in range(50):
+        # Every page references the same manifests: each is fetched once
+        prober.submit(base + '/master.m3u8', f"{base}/page{page}")
+        prober.submit(base + '/movie.mpd', f"{base}/page{page}")
+    prober.submit(base + '/missing.m3u8', base + '/page0')
+    prober.close()
+    records = read_streams(prober)
+
+    hd = records[(base + '/hd/index.m3u8', None)]
+    assert (hd['resolution'], hd['bandwidth'], hd['codecs']) == ('1280x720', 2800000, 'avc1.4d401f,mp4a.40.2')
+    assert (hd['segments'], hd['duration'], hd['live'], hd['encrypted']) == (3, 24.5, False, True)
+    assert hd['manifest'] == base + '/master.m3u8'
+    sd = records[(base + '/sd/index.m3u8', None)]
+    assert (sd['resolution'], sd['segments'], sd['duration'], sd['live']) == ('640x360', 2, 12.0, True)
+    full_hd = records[(base + '/movie.mpd', '1080')]
+    assert (full_hd['resolution'], full_hd['codecs'], full_hd['segments'], full_hd['duration']) == \
+        ('1920x1080', 'avc1.640028', 15, 60.0)
+    assert records[(base + '/movie.mpd', '480')]['codecs'] == 'avc1.4d401e'
+    audio = records[(base + '/movie.mpd', 'audio')]
+    assert (audio['resolution'], audio['segments'], audio['mime_type']) == (None, 11, 'audio/mp4')
+    assert (prober.fetched, prober.failed, prober.streams) == (4, 1, 5), prober.summary()
+
+
+def test_prober_under_load(base, session, tmp_path):
+    manifest_count = 2000
+    prober = ManifestProber(session, tmp_path, max_workers=16)
+    for number in range(manifest_count):
+        prober.submit(f"{base}/gen/{number}.m3u8", base + '/page')
+    prober.close()
+    assert prober.fetched == manifest_count and prober.streams == manifest_count, prober.summary()
+    assert len(read_streams(prober)) == manifest_count
+
+
+def test_prober_expands_nested_masters_and_mpds(base, session, tmp_path):
+    prober = ManifestProber(session, tmp_path)
+    prober.submit(base + '/nested.m3u8', base + '/page')
+    prober.close()
+    with open(prober.path, encoding='utf-8') as f:
+        lines = f.readlines()
+    records = read_streams(prober)
+
+    # hd/index.m3u8 is reached twice and nested.m3u8 lists itself: each stream is written once
+    assert len(lines) == len(records) == 5
+    assert set(records) == {(base + '/hd/index.m3u8', None), (base + '/sd/index.m3u8', None),
+                            (base + '/movie.mpd', '1080'), (base + '/movie.mpd', '480'), (base + '/movie.mpd', 'audio')}
+    full_hd = records[(base + '/movie.mpd', '1080')]
+    assert (full_hd['bandwidth'], full_hd['resolution'], full_hd['segments']) == (5000000, '1920x1080', 15)
+    assert (full_hd['frame_rate'], full_hd['manifest'], full_hd['format']) == ('25', base + '/nested.m3u8', 'dash')
+    assert records[(base + '/sd/index.m3u8', None)]['manifest'] == base + '/master.m3u8'
+    assert (prober.fetched, prober.failed, prober.streams) == (5, 0, 5), prober.summary()
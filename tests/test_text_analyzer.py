@@ -0,0 +1,86 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from llm_throttle import TokenRateLimiter
+from process_text_to_tables import TextAnalyzer
+
+
+def test_token_bucket_waits_for_refill():
+    limiter = TokenRateLimiter(tokens_per_minute=6000)
+    limiter.acquire(6000)
+    start = time.monotonic()
+    # 100 tokens at 100 per second
+    limiter.acquire(100)
+    assert 0.8 < time.monotonic() - start < 1.5
+
+
+def test_throttle_pauses_every_request():
+    limiter = TokenRateLimiter(tokens_per_minute=6000)
+    limiter.pause(0.5)
+    start = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - start >= 0.45
+    assert limiter.throttled == 1
+
+
+def test_request_over_the_minute_budget_is_refused():
+    limiter = TokenRateLimiter(tokens_per_minute=6000)
+    with pytest.raises(ValueError):
+        limiter.acquire(6001)
+    assert limiter.requests == 0
+
+
+@pytest.mark.parametrize('model, tokens_per_minute', [('google/gemini-2.5-pro', 400000),
+                                                      ('anthropic/claude-sonnet-4', 400000),
+                                                      ('anthropic/claude-sonnet-4', 50000)])
+def test_chunk_requests_fit_the_token_budget(tmp_path, model, tokens_per_minute):
+    analyzer = TextAnalyzer(output_dir=tmp_path / "output", cache_dir=tmp_path / "llm_cache")
+    analyzer.model = model
+    analyzer.token_limiter = TokenRateLimiter(tokens_per_minute=tokens_per_minute)
+    budget = analyzer.chunk_budget("doc.txt")
+    overhead = analyzer.token_counter.count(analyzer.chunk_prompt("", 99999, 99999, "doc.txt"))
+    assert budget + overhead + analyzer.chunk_max_tokens <= tokens_per_minute
+    # Models with a context below the budget are still filled to their context
+    if tokens_per_minute == 400000 and 'claude' in model:
+        assert budget > 150000
+    analyzer.llm_cache.close()
+    analyzer.manifest.close()
+
+
+def analyze(make_analyzer, files, name, requests_in_flight, files_in_flight):
+    # A cache and manifest of its own, so one run is not answered from another
+    analyzer = make_analyzer(output=f"output_{name}", cache=f"llm_cache_{name}")
+    analyzer.max_concurrent_requests = requests_in_flight
+    analyzer.files_in_flight = files_in_flight
+    analyzer.process_files(files)
+    return analyzer
+
+
+def test_results_keep_file_and_chunk_order(make_analyzer, openrouter, documents):
+    files = documents(6, sentences=200)
+    # Some requests are rate limited and retried after Retry-After
+    openrouter.throttle_every = 17
+    analyzer = analyze(make_analyzer, files, 'run', 8, 3)
+    assert analyzer.token_limiter.throttled > 0
+
+    results = analyzer.analysis_results
+    assert [result['filename'] for result in results] == [Path(f).name for f in files]
+    for result in results:
+        assert result['chunk_count'] > 3
+        # The stand-in echoes the order the chunk summaries were combined in
+        assert result['summary'] == ' '.join(str(number) for number in range(1, result['chunk_count'] + 1))
+        assert result['key_points'].startswith('point 1 | point 2')
+
+
+def test_requests_overlap_up_to_the_limit(make_analyzer, openrouter, documents):
+    files = documents(6, sentences=200)
+    openrouter.latency = 0.1
+    sequential = analyze(make_analyzer, files, 'sequential', 1, 1)
+    assert openrouter.peak == 1
+    openrouter.peak = 0
+    concurrent = analyze(make_analyzer, files, 'concurrent', 8, 3)
+    assert 1 < openrouter.peak <= concurrent.max_concurrent_requests
+    assert [result['summary'] for result in concurrent.analysis_results] == \
+        [result['summary'] for result in sequential.analysis_results]
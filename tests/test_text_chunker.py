@@ -0,0 +1,61 @@
+import pytest
+
+from benchmarks.bench_text_chunker import concat_chunk_text, transcript
+from text_chunker import TokenCounter, chunk_stream, read_text_blocks, sentence_stream
+
+CHUNK_SIZE = 50000
+
+
+def small_blocks(text, size=999):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.fixture(scope='module')
+def text():
+    return transcript(2)
+
+
+@pytest.mark.parametrize('sample', ["One. Two!  Three?\nFour", " Leading and trailing.  ", "No end", ""])
+def test_matches_the_old_chunker(sample):
+    assert list(chunk_stream(small_blocks(sample), CHUNK_SIZE)) == \
+        [chunk for chunk in concat_chunk_text(sample, CHUNK_SIZE) if chunk]
+
+
+def test_matches_the_old_chunker_across_blocks(text):
+    sample = text[:2 * CHUNK_SIZE + 17]
+    assert list(chunk_stream(small_blocks(sample), CHUNK_SIZE)) == concat_chunk_text(sample, CHUNK_SIZE)
+    assert list(chunk_stream(small_blocks(text, 1024 * 1024), CHUNK_SIZE)) == concat_chunk_text(text, CHUNK_SIZE)
+
+
+def test_block_boundary_inside_sentence_end():
+    # The whitespace after a sentence end is split over two blocks
+    assert list(sentence_stream(["One.  ", "  Two. Three"], 100)) == ["One.", "Two.", "Three"]
+
+
+def test_run_without_sentence_ends_is_cut_at_spaces():
+    run = "no sentence end at all " * 5000
+    chunks = list(chunk_stream(small_blocks(run), CHUNK_SIZE))
+    assert len(chunks) > 1
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+    assert ' '.join(chunks).split() == run.split()
+
+
+def test_overlap_repeats_the_end_of_the_previous_chunk(text):
+    chunks = list(chunk_stream(small_blocks(text[:3 * CHUNK_SIZE]), CHUNK_SIZE, overlap=500))
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+    assert all(previous[-200:] in chunk[:600] for previous, chunk in zip(chunks, chunks[1:]))
+
+
+def test_token_budget(text):
+    counter = TokenCounter()
+    sample = text[:200000]
+    chunks = list(chunk_stream([sample], 2000, measure=counter.count))
+    assert all(counter.count(chunk) <= 2000 for chunk in chunks)
+    assert ' '.join(chunks).split() == sample.split()
+
+
+def test_read_text_blocks_stops_at_limit(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text("x" * 2500, encoding='utf-8')
+    assert [len(block) for block in read_text_blocks(path, block_size=1000)] == [1000, 1000, 500]
+    assert [len(block) for block in read_text_blocks(path, limit=1500, block_size=1000)] == [1000, 500]
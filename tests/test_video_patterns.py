@@ -0,0 +1,104 @@
+import re
+import random
+from urllib.parse import urljoin
+
+import pytest
+from bs4 import BeautifulSoup
+
+from video_patterns import VIDEO_PATTERNS, VideoUrlMatcher
+from video_scraper import VideoScraper
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.m3u8', '.webm', '.mpg', '.mpeg'}
+
+# Pieces the random texts are built from: URL starts, the literals the
+# prefilter looks for, and the characters that end a URL-like run
+TOKENS = ['https://', 'http://', 'HTTPS://', 'blob:', 'BLOB:', '.mp4', '.MP4', '.m3u8', '.mpg', '.ogv', '/video/',
+          '/stream/', '/media/', '/content/', '.cloudfront.net/', '.amazonaws.com/', 'a', 'b', 'x.com', ' ', '\n',
+          '"', "'", '?', ':', '/', '.', '<', '{', '"url"', ': ', 'data:video/mp4;base64,AAA=']
+
+
+# Reference: the one-scan-per-pattern extraction VideoScraper used before VideoUrlMatcher
+def multi_pass_text_urls(text, extensions):
+    """The original VideoScraper.extract_video_urls_from_text: one full scan per pattern"""
+    video_urls = set()
+    for pattern in VIDEO_PATTERNS:
+        video_urls.update(re.findall(pattern, text, re.IGNORECASE))
+    video_urls.update(re.findall(r'["\']([^"\']+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']', text, re.IGNORECASE))
+    video_urls.update(re.findall(r'["\']\s*:\s*["\']([^"\']+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']', text, re.IGNORECASE))
+    video_urls.update(re.findall(r'data:video/[^;]+;base64,[A-Za-z0-9+/=]+', text))
+    for url in re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text):
+        if any(ext in url.lower() for ext in extensions):
+            video_urls.add(url)
+    for match in re.findall(r'["\']([^"\']*\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']', text, re.IGNORECASE):
+        if not match.startswith(('http://', 'https://', 'data:')):
+            video_urls.add(match)
+    return video_urls
+
+
+def multi_pass_attribute_urls(soup, base_url, extensions):
+    """The original attribute/script/style scans of extract_video_urls_from_html"""
+    video_urls = set()
+    for script in soup.find_all('script'):
+        if script.string:
+            for pattern in VIDEO_PATTERNS:
+                video_urls.update(re.findall(pattern, script.string, re.IGNORECASE))
+            json_pattern = r'\{[^{}]*"(?:url|src|source|video|file|stream)"[^{}]*:[^{}]*"([^"]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"]*)"[^{}]*\}'
+            for match in re.findall(json_pattern, script.string, re.IGNORECASE):
+                video_urls.add(urljoin(base_url, match))
+    for element in soup.find_all(True):
+        for attr, value in element.attrs.items():
+            if isinstance(value, str):
+                if any(keyword in attr.lower() for keyword in ['video', 'media', 'src', 'source', 'file', 'url']):
+                    if any(ext in value.lower() for ext in extensions):
+                        video_urls.add(urljoin(base_url, value))
+                for pattern in VIDEO_PATTERNS:
+                    video_urls.update(re.findall(pattern, value, re.IGNORECASE))
+    for element in soup.find_all(style=True):
+        for pattern in VIDEO_PATTERNS:
+            video_urls.update(re.findall(pattern, element['style'], re.IGNORECASE))
+    return video_urls
+
+
+def random_text(rng):
+    return ''.join(rng.choice(TOKENS) for _ in range(rng.randint(1, 14)))
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    scraper = VideoScraper(resume_dir=tmp_path, respect_robots=False, rate_state_path=None)
+    yield scraper
+    scraper.found_videos.close()
+    scraper.journal.close()
+    scraper.visited_urls.close()
+    scraper.session.close()
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_text_urls_match_one_scan_per_pattern(seed):
+    matcher = VideoUrlMatcher(VIDEO_PATTERNS, VIDEO_EXTENSIONS)
+    rng = random.Random(seed)
+    for _ in range(20000):
+        text = random_text(rng)
+        assert matcher.text_urls(text) == multi_pass_text_urls(text, VIDEO_EXTENSIONS), text
+
+
+@pytest.mark.parametrize('text', [
+    'https://a.com/page blob:https://a.com/x',
+    'https://a.com/ablob:https://b.com/v',
+    'HTTPS://x.comhttp://BLOB:HTTPS://cdn.cloudfront.net/v.mp4',
+])
+def test_blob_inside_a_run(text):
+    matcher = VideoUrlMatcher(VIDEO_PATTERNS, VIDEO_EXTENSIONS)
+    assert matcher.text_urls(text) == multi_pass_text_urls(text, VIDEO_EXTENSIONS)
+
+
+def test_attribute_urls_match_one_scan_per_pattern(scraper):
+    rng = random.Random(7)
+    base_url = 'https://example.com/page'
+    for _ in range(500):
+        value = random_text(rng).replace('"', '&quot;')
+        html = (f'<div data-video="{value}" style="background: url({value})"><source src="{value}"></div>'
+                f'<script>var player = {{"file": "{random_text(rng)}"}};</script>')
+        soup = BeautifulSoup(html, 'html.parser')
+        assert scraper.attribute_video_urls(soup, base_url) == \
+            multi_pass_attribute_urls(soup, base_url, scraper.video_extensions), html
@@ -0,0 +1,153 @@
+import re
+from collections import deque
+
+# tiktoken is optional; without it (or its encoding files) tokens are estimated
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Whitespace after a sentence-ending mark: where chunks may be cut
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Context window (tokens) of the OpenRouter models the tools use; others get DEFAULT_CONTEXT_TOKENS
+MODEL_CONTEXT_TOKENS = {
+    'google/gemini-2.5-pro': 1048576,
+    'google/gemini-2.5-flash': 1048576,
+    'anthropic/claude-3-haiku': 200000,
+    'anthropic/claude-3.5-sonnet': 200000,
+    'anthropic/claude-sonnet-4': 200000,
+    'openai/gpt-4o': 128000,
+    'openai/gpt-4o-mini': 128000,
+    'meta-llama/llama-3.1-70b-instruct': 131072,
+    'mistralai/mistral-large': 128000,
+}
+DEFAULT_CONTEXT_TOKENS = 32768
+
+
+class TokenCounter:
+    """Counts tokens with a local tiktoken encoding, or estimates them at three characters each.
+
+    Other model families tokenize differently, so budgets built on these
+    counts keep a safety margin (see TextAnalyzer.chunk_budget).
+    """
+
+    def __init__(self, encoding='o200k_base'):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                # The encoding files are downloaded on first use
+                print(f"tiktoken encoding {encoding} unavailable ({e.__class__.__name__}), estimating tokens")
+        self.name = encoding if self.encoding else "estimate"
+
+    def count(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(text) // 3 + 1
+
+
+def read_text_blocks(filepath, limit=None, block_size=1024 * 1024):
+    """Read a text file in blocks of `block_size` characters, stopping after `limit` characters"""
+    read = 0
+    with open(filepath, 'r', encoding='utf-8') as f:
+        while limit is None or read < limit:
+            block = f.read(block_size if limit is None else min(block_size, limit - read))
+            if not block:
+                break
+            read += len(block)
+            yield block
+
+
+def split_long(text, max_length):
+    """Cut text longer than max_length at the last whitespace of each piece (or hard)"""
+    while len(text) > max_length:
+        cut = text.rfind(' ', max_length // 2, max_length)
+        if cut <= 0:
+            cut = max_length
+        yield text[:cut]
+        text = text[cut:].lstrip()
+    if text:
+        yield text
+
+
+def sentence_stream(blocks, max_length):
+    """Sentences of a stream of text blocks, none longer than max_length.
+
+    Only the unfinished sentence at the end of a block is carried over to
+    the next one, and a run without any sentence end is cut once it
+    reaches max_length, so the carried text stays bounded and every
+    character is scanned a constant number of times.
+    """
+    carry = ''
+    at_break = False  # the last block ended in sentence-ending whitespace
+    for block in blocks:
+        if at_break:
+            # The rest of that whitespace
+            block = block.lstrip()
+        text = carry + block
+        if not text:
+            continue
+        sentences = SENTENCE_END.split(text)
+        carry = sentences.pop()
+        at_break = not carry and bool(sentences)
+        if any(len(sentence) > max_length for sentence in sentences):
+            for sentence in sentences:
+                yield from split_long(sentence, max_length)
+        else:
+            yield from sentences
+        if len(carry) > max_length:
+            pieces = list(split_long(carry, max_length))
+            yield from pieces[:-1]
+            carry = pieces[-1]
+    if carry:
+        yield from split_long(carry, max_length)
+
+
+def fitted(sentence, limit, measure):
+    """(piece, size) pairs of a sentence, halved until each measures at most limit"""
+    size = measure(sentence)
+    if size <= limit or len(sentence) < 2:
+        yield sentence, size
+        return
+    for piece in split_long(sentence, (len(sentence) + 1) // 2):
+        yield from fitted(piece, limit, measure)
+
+
+def chunk_stream(blocks, chunk_size=50000, overlap=0, measure=len):
+    """Chunks of at most chunk_size, cut at sentence boundaries.
+
+    Sizes are characters, or whatever `measure` counts (tokens, with a
+    TokenCounter's count); a sentence measuring more than a chunk is cut
+    into pieces that fit. Each chunk is a list of sentence spans joined
+    once when it is full. With `overlap`, a chunk starts with the last
+    sentences of the one before it, up to `overlap` of them in size.
+    """
+    spans = deque()  # (sentence, size)
+    length = 0  # size of the spans, with one separator after each
+    # A token rarely covers less than a character, so cutting sentences at
+    # chunk_size characters first leaves few to measure and halve
+    for sentence in sentence_stream(blocks, chunk_size - 1):
+        size = measure(sentence)
+        pieces = [(sentence, size)] if size < chunk_size else fitted(sentence, chunk_size - 1, measure)
+        for sentence, size in pieces:
+            if spans and length + size + 1 > chunk_size:
+                chunk = ' '.join(span for span, _ in spans).strip()
+                if chunk:
+                    yield chunk
+                carried = 0
+                kept = deque()
+                while spans and carried + spans[-1][1] + 1 <= overlap:
+                    carried += spans[-1][1] + 1
+                    kept.appendleft(spans.pop())
+                spans, length = kept, carried
+                # The next sentence must still fit beside the overlap
+                while spans and length + size + 1 > chunk_size:
+                    length -= spans.popleft()[1] + 1
+            spans.append((sentence, size))
+            length += size + 1
+    chunk = ' '.join(span for span, _ in spans).strip()
+    if chunk:
+        yield chunk
+
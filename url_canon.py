@@ -0,0 +1,275 @@
+import re
+import math
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+# Query parameters that never change the page content
+TRACKING_PREFIXES = ('utm_',)
+TRACKING_PARAMS = {'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+                   'igshid', 'ref_src', 'jsessionid', 'phpsessid', 'aspsessionid', 'sessionid', 'sid'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+PERCENT_ESCAPE = re.compile(r'%[0-9a-fA-F]{2}')
+UNRESERVED = set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+
+def _normalize_escape(match):
+    """Decode escaped unreserved characters, uppercase the rest (%7e -> ~, %2f -> %2F)"""
+    char = chr(int(match.group(0)[1:], 16))
+    return char if char in UNRESERVED else match.group(0).upper()
+
+
+def _remove_dot_segments(path):
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    # Keep the trailing slash of "dir/." and "dir/.."
+    if path.endswith(('/.', '/..')):
+        output.append('')
+    return '/'.join(output) or '/'
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """Canonical form of an HTTP(S) URL, or None for anything else.
+
+    Lowercases scheme and host, drops default ports, the fragment, session
+    path parameters and tracking/session query parameters, resolves dot
+    segments, normalizes percent-escapes and sorts the query.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        netloc = f"{userinfo}@{netloc}"
+
+    # ;jsessionid=... style session ids live in the path
+    path = ';'.join(segment for segment in parts.path.split(';')
+                    if not is_tracking_param(segment.split('=', 1)[0])) if ';' in parts.path else parts.path
+    path = PERCENT_ESCAPE.sub(_normalize_escape, path)
+    path = _remove_dot_segments(path if path.startswith('/') else '/' + path)
+
+    query = ''
+    if parts.query:
+        params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                  if not is_tracking_param(name)]
+        params.sort()
+        query = urlencode(params, quote_via=quote, safe='/:@!$\'()*,;')
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def url_key(url):
+    """Visited-set key: the canonical URL without scheme or trailing slash.
+
+    http/https variants and "/docs" vs "/docs/" count as the same page.
+    """
+    canonical = canonicalize_url(url) or url.strip()
+    rest = canonical.split('://', 1)[-1]
+    path, sep, query = rest.partition('?')
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+    return path + sep + query
+
+
+def key_digest(key):
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+class MemoryVisitedSet:
+    """Exact visited set of canonical URL keys (default; memory grows with the crawl)"""
+
+    def __init__(self):
+        self.keys = set()
+        self.lock = threading.Lock()
+
+    def add(self, url):
+        """Mark a URL visited; True if it had not been seen before"""
+        key = url_key(url)
+        with self.lock:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+    def __contains__(self, url):
+        return url_key(url) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def close(self):
+        pass
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 128-bit digests (double hashing)"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bit_count = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(math.ceil(-math.log2(error_rate))))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def positions(self, digest):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bit_count for i in range(self.hash_count)]
+
+    def contains(self, positions):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def add(self, positions):
+        bits = self.bits
+        for p in positions:
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class BloomVisitedSet:
+    """Scalable Bloom filter visited set with bounded false-positive rate.
+
+    Starts with one filter sized for `initial_capacity` URLs; each time the
+    newest filter fills up a larger one (x `growth`) with a tighter error
+    rate (x `tightening`) is added, so the overall false-positive rate stays
+    below `error_rate` however many URLs the crawl sees. Uses roughly
+    2 bytes per URL at 0.1% error instead of ~100+ for a set of strings.
+    A false positive means a page is skipped, never fetched twice.
+    """
+
+    def __init__(self, initial_capacity=1000000, error_rate=0.001, growth=2, tightening=0.5):
+        self.growth = growth
+        self.tightening = tightening
+        # Geometric series: the sum of all filters' error rates stays below error_rate
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def add(self, url):
+        """Mark a URL visited; True if it (probably) had not been seen before"""
+        digest = key_digest(url_key(url))
+        with self.lock:
+            for bloom in self.filters:
+                if bloom.contains(bloom.positions(digest)):
+                    return False
+            newest = self.filters[-1]
+            if newest.count >= newest.capacity:
+                newest = BloomFilter(newest.capacity * self.growth, newest.error_rate * self.tightening)
+                self.filters.append(newest)
+            newest.add(newest.positions(digest))
+            self.count += 1
+            return True
+
+    def __contains__(self, url):
+        digest = key_digest(url_key(url))
+        return any(bloom.contains(bloom.positions(digest)) for bloom in self.filters)
+
+    def __len__(self):
+        return self.count
+
+    def memory_bytes(self):
+        return sum(len(bloom.bits) for bloom in self.filters)
+
+    def close(self):
+        pass
+
+
+class DiskVisitedSet:
+    """Exact visited set in SQLite with a bounded in-memory cache.
+
+    Keys are 16-byte digests of the canonical URL. Recently added keys are
+    kept in an LRU of `cache_size` entries so repeated links (navigation,
+    footers) rarely touch the database; inserts are committed in batches.
+    """
+
+    def __init__(self, path, cache_size=100000, commit_every=1000):
+        self.path = Path(path)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS visited (key BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.db.commit()
+        self.count = self.db.execute("SELECT COUNT(*) FROM visited").fetchone()[0]
+
+    def remember(self, digest):
+        self.cache[digest] = True
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def add(self, url):
+        """Mark a URL visited; True if it had not been seen before"""
+        digest = key_digest(url_key(url))
+        with self.lock:
+            if digest in self.cache:
+                self.cache.move_to_end(digest)
+                return False
+            cursor = self.db.execute("INSERT OR IGNORE INTO visited VALUES (?)", (digest,))
+            self.remember(digest)
+            if cursor.rowcount != 1:
+                return False
+            self.count += 1
+            self.uncommitted += 1
+            if self.uncommitted >= self.commit_every:
+                self.db.commit()
+                self.uncommitted = 0
+            return True
+
+    def __contains__(self, url):
+        digest = key_digest(url_key(url))
+        with self.lock:
+            if digest in self.cache:
+                return True
+            return self.db.execute("SELECT 1 FROM visited WHERE key = ?", (digest,)).fetchone() is not None
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+VISITED_BACKENDS = ('memory', 'bloom', 'disk')
+
+
+def create_visited_set(backend="memory", directory="."):
+    """Visited set for the scrapers' --visited option"""
+    if backend == 'bloom':
+        return BloomVisitedSet()
+    if backend == 'disk':
+        return DiskVisitedSet(Path(directory) / "visited.sqlite")
+    return MemoryVisitedSet()
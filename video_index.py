@@ -0,0 +1,110 @@
+import csv
+import json
+import threading
+from pathlib import Path
+
+from url_canon import url_key, key_digest
+
+
+def video_key(url):
+    """Dedup key of a video URL: canonical for http(s), the URL itself for data:/blob:"""
+    if url[:8].lower().startswith(('http://', 'https://')):
+        return key_digest(url_key(url))
+    return key_digest(url)
+
+
+class VideoIndex:
+    """Found videos, deduplicated in O(1) by normalized URL and written out as they are found.
+
+    Only a 16-byte digest per known video stays in memory. Each new video
+    is appended at once to `video_links.jsonl` (one JSON record per line)
+    and `video_links.csv` (a csv.writer row), and a page's new videos are
+    written together so every source page forms one contiguous block.
+    Later sightings of a known video on another page go to
+    `video_sightings.tsv`. Files are flushed after every page, so a crash
+    loses at most the line being written; iterating the index streams the
+    records back from disk in discovery order.
+    """
+
+    CSV_HEADER = ['Video URL', 'Found On', 'Type', 'Depth', 'Timestamp']
+
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / "video_links.jsonl"
+        self.csv_path = Path(output_dir) / "video_links.csv"
+        self.sightings_path = Path(output_dir) / "video_sightings.tsv"
+        self.lock = threading.Lock()
+        self.keys = set()  # digests of every known video
+        self.sightings = 0
+        self.files = None  # (jsonl, csv, tsv) handles, opened on the first write
+        self.csv_writer = None
+
+    def load(self):
+        """Pick up the videos an earlier (interrupted) run already wrote"""
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.keys.add(video_key(json.loads(line)['url']))
+                    except (ValueError, KeyError):
+                        # A torn last line from a hard kill
+                        continue
+        if self.sightings_path.exists():
+            with open(self.sightings_path, 'r', encoding='utf-8') as f:
+                self.sightings = sum(1 for _ in f)
+
+    def open_locked(self):
+        new_csv = not self.csv_path.exists() or self.csv_path.stat().st_size == 0
+        jsonl = open(self.path, 'a', encoding='utf-8')
+        csv_file = open(self.csv_path, 'a', encoding='utf-8', newline='')
+        tsv = open(self.sightings_path, 'a', encoding='utf-8')
+        self.files = (jsonl, csv_file, tsv)
+        self.csv_writer = csv.writer(csv_file)
+        if new_csv:
+            self.csv_writer.writerow(self.CSV_HEADER)
+
+    def add_page(self, page_url, videos):
+        """Record the videos seen on one page; returns the ones not seen before"""
+        new = []
+        with self.lock:
+            if self.files is None:
+                self.open_locked()
+            jsonl, csv_file, tsv = self.files
+            for video_info in videos:
+                key = video_key(video_info['url'])
+                if key in self.keys:
+                    tsv.write(f"{video_info['url']}\t{page_url}\n")
+                    self.sightings += 1
+                    continue
+                self.keys.add(key)
+                jsonl.write(json.dumps(video_info, ensure_ascii=False) + "\n")
+                self.csv_writer.writerow([video_info['url'], video_info['found_on'], video_info.get('type', 'unknown'),
+                                          video_info['depth'], video_info['timestamp']])
+                new.append(video_info)
+            for f in self.files:
+                f.flush()
+        return new
+
+    def add(self, video_info):
+        """Record one sighting; True if the video had not been seen before"""
+        return bool(self.add_page(video_info['found_on'], [video_info]))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        """Every record in discovery order, read back one line at a time"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def close(self):
+        with self.lock:
+            if self.files is not None:
+                for f in self.files:
+                    f.close()
+                self.files = None
@@ -0,0 +1,134 @@
+import re
+
+# Characters allowed in a URL by the video patterns
+URL_CHARS = r'[^\s<>"{}|\\^`\[\]]'
+
+VIDEO_FORMATS = 'mp4|mov|avi|mkv|wmv|flv|m3u8|webm'
+
+# Common video URL patterns. Each must start with https?:// or blob:https?://
+# so it can only match inside one URL-like run of the text (see VideoUrlMatcher)
+VIDEO_PATTERNS = [
+    # Direct video file URLs
+    r'https?://[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm|mpg|mpeg|3gp|ogv)',
+    # Video URLs with query parameters
+    r'https?://[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)\?[^\s<>"{}|\\^`\[\]]*',
+    # Common video paths
+    r'https?://[^\s<>"{}|\\^`\[\]]+/video/[^\s<>"{}|\\^`\[\]]+',
+    r'https?://[^\s<>"{}|\\^`\[\]]+/stream/[^\s<>"{}|\\^`\[\]]+',
+    r'https?://[^\s<>"{}|\\^`\[\]]+/media/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
+    r'https?://[^\s<>"{}|\\^`\[\]]+/content/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
+    # M3U8 streaming
+    r'https?://[^\s<>"{}|\\^`\[\]]+\.m3u8[^\s<>"{}|\\^`\[\]]*',
+    # Blob URLs
+    r'blob:https?://[^\s<>"{}|\\^`\[\]]+',
+    # CDN patterns
+    r'https?://[^\s<>"{}|\\^`\[\]]+\.cloudfront\.net/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
+    r'https?://[^\s<>"{}|\\^`\[\]]+\.amazonaws\.com/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
+]
+
+# Quoted strings naming a video file: absolute/relative URLs and relative paths
+QUOTED_VIDEO = re.compile(r'["\']([^"\']+\.(?:' + VIDEO_FORMATS + r')[^"\']*)["\']', re.IGNORECASE)
+RELATIVE_VIDEO = re.compile(r'["\']([^"\']*\.(?:' + VIDEO_FORMATS + r')[^"\']*)["\']', re.IGNORECASE)
+BASE64_VIDEO = re.compile(r'data:video/[^;]+;base64,[A-Za-z0-9+/=]+')
+PLAIN_URL = re.compile(r'https?://' + URL_CHARS + '+')
+
+# Pattern prefix shared by the URL patterns, and the literal text or
+# extension group that must follow it
+PATTERN_PREFIX = r'https?://' + URL_CHARS + '+'
+EXTENSION_GROUP = re.compile(r'\\\.\(\?:([a-z0-9|]+)\)')
+LITERAL = re.compile(r'(?:\\[./]|[A-Za-z0-9/_-])+')
+
+
+def required_literals(pattern):
+    """Lowercase strings of which a match of the pattern must contain one, or None if unknown"""
+    if pattern.startswith('blob:'):
+        return ('blob:',)
+    if not pattern.startswith(PATTERN_PREFIX):
+        return None
+    rest = pattern[len(PATTERN_PREFIX):]
+    group = EXTENSION_GROUP.match(rest)
+    if group:
+        return tuple('.' + ext for ext in group.group(1).split('|'))
+    literal = LITERAL.match(rest)
+    if literal:
+        return (literal.group(0).replace('\\', '').lower(),)
+    return None
+
+
+# JSON objects in scripts whose url/src/... key holds a video file
+SCRIPT_JSON_VIDEO = re.compile(
+    r'\{[^{}]*"(?:url|src|source|video|file|stream)"[^{}]*:[^{}]*"([^"]+\.(?:' + VIDEO_FORMATS + r')[^"]*)"[^{}]*\}',
+    re.IGNORECASE)
+
+
+class VideoUrlMatcher:
+    """Precompiled, prefiltered matcher for the VideoScraper URL patterns.
+
+    One linear scan finds every URL-like run of the text (from its first
+    http(s):// or blob: to the next character a URL cannot contain). Every
+    video pattern can only match inside such a run, so the patterns are
+    applied to the runs alone, and only to runs that contain a video
+    extension, /video/, /stream/ or blob: (anywhere in the run), and each
+    pattern only to runs holding the literal text it requires (its
+    extension group, "/video/", ".cloudfront.net/", ...). On a typical
+    page that is a handful of short strings instead of ten scans of the
+    whole text. The quoted-string scans run only when the text names a
+    video extension at all. The results are those of running every
+    pattern over the whole text (tests/test_video_patterns.py compares
+    the two on random input).
+    """
+
+    def __init__(self, patterns=VIDEO_PATTERNS, extensions=()):
+        # Each pattern is only tried on runs containing one of its required literals
+        self.patterns = [(re.compile(pattern, re.IGNORECASE), required_literals(pattern)) for pattern in patterns]
+        self.extensions = tuple(extensions)
+        self.url_run = re.compile(r'(?:blob:)?https?://' + URL_CHARS + '+', re.IGNORECASE)
+        hints = [r'\.(?:' + VIDEO_FORMATS + r'|mpg|mpeg|3gp|ogv)', '/video/', '/stream/', 'blob:']
+        hints += [re.escape(ext) for ext in self.extensions]
+        self.hint = re.compile('|'.join(hints), re.IGNORECASE)
+
+    def url_runs(self, text):
+        """URL-like runs of the text that could hold a video URL"""
+        return [run for run in self.url_run.findall(text) if self.hint.search(run)]
+
+    def pattern_matches(self, text, runs=None):
+        """Everything the video patterns match in the text"""
+        found = set()
+        if '://' not in text:
+            return found
+        for run in self.url_runs(text) if runs is None else runs:
+            lowered = run.lower()
+            for pattern, literals in self.patterns:
+                if literals is None or any(literal in lowered for literal in literals):
+                    found.update(pattern.findall(run))
+        return found
+
+    def text_urls(self, text):
+        """Video URLs, quoted paths and base64 videos in raw page or script text"""
+        runs = self.url_runs(text) if '://' in text else []
+        found = self.pattern_matches(text, runs)
+
+        # Any URL that names a video extension
+        for run in runs:
+            match = PLAIN_URL.search(run)
+            if match:
+                url = match.group(0)
+                if any(ext in url.lower() for ext in self.extensions):
+                    found.add(url)
+
+        if self.hint.search(text):
+            found.update(QUOTED_VIDEO.findall(text))
+            # Relative paths are resolved against the page later
+            found.update(match for match in RELATIVE_VIDEO.findall(text)
+                         if not match.startswith(('http://', 'https://', 'data:')))
+
+        if 'data:video/' in text:
+            found.update(BASE64_VIDEO.findall(text))
+        return found
+
+    def script_json_urls(self, text):
+        """Video files named by url/src/file/... keys of JSON objects in a script"""
+        if not self.hint.search(text):
+            return []
+        return SCRIPT_JSON_VIDEO.findall(text)
+
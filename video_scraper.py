@@ -1,54 +1,100 @@
-import requests
 from bs4 import BeautifulSoup
 import os
 import re
 from urllib.parse import urljoin, urlparse, unquote
+import sys
 import time
+import argparse
+import threading
 from pathlib import Path
 from datetime import datetime
-import json
+from scraper_http import create_session
+from crawl_engine import CrawlEngine, CrawlJournal
+from url_canon import create_visited_set, VISITED_BACKENDS
+from robots_sitemap import RobotsCache, SitemapSeeder
+from warc_archive import WarcWriter
+from rate_limiter import AdaptiveRateLimiter, throttled_retries
+from script_resources import ResourceMiner
+from video_patterns import VIDEO_PATTERNS, VideoUrlMatcher
+from video_index import VideoIndex
+from stream_manifests import ManifestProber
 
 class VideoScraper:
-    def __init__(self, max_depth=2):
+    def __init__(self, max_depth=2, pool_size=10, workers=8, host_delay=1.0, host_max_in_flight=2, resume_dir=None,
+                 visited_backend="memory", respect_robots=True, use_sitemaps=False, sitemap_max_urls=10000,
+                 links_per_page=20, max_pages=None, archive=None, adaptive_rate=True, rate_state_path="host_rates.json",
+                 mine_resources=False, resource_workers=4, probe_streams=False, manifest_workers=8):
         self.max_depth = max_depth
-        self.visited_urls = set()
-        self.found_videos = []
         
-        # Create unique output directory with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.output_dir = Path(f"video_links_{timestamp}")
+        # Crawl concurrency: worker count and per-host politeness
+        self.workers = workers
+        self.host_delay = host_delay
+        self.host_max_in_flight = host_max_in_flight
+        
+        # Per-host request rate, starting at host_delay and adapted to latency and 429/503s
+        # (learned rates are kept in rate_state_path across runs); None = fixed host_delay
+        self.rate_limiter = AdaptiveRateLimiter(host_delay, state_path=rate_state_path) if adaptive_rate else None
+        # The limiter the crawl engine and the resource miner both pace their requests with
+        self.host_limiter = self.rate_limiter or AdaptiveRateLimiter(host_delay, min_delay=host_delay,
+                                                                     max_delay=host_delay, burst=1)
+        
+        # Fetch budgets: best-scored links kept per page, and pages per scan (None = unlimited)
+        self.links_per_page = links_per_page
+        self.max_pages = max_pages
+        
+        # Pages are processed on worker threads
+        self.lock = threading.Lock()
+        
+        # Create unique output directory with timestamp, or continue an interrupted scan
+        self.resume_dir = resume_dir
+        if resume_dir:
+            self.output_dir = Path(resume_dir)
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.output_dir = Path(f"video_links_{timestamp}")
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.html_dir = self.output_dir / "html_source"
         self.html_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Found videos: O(1) dedup by normalized URL, each appended to video_links.jsonl/.csv as found
+        self.found_videos = VideoIndex(self.output_dir)
+        
+        # Optional compressed WARC archive replacing the per-page html_source files
+        self.archive = WarcWriter(self.output_dir / "archive", compression=archive) if archive else None
         self.file_counter = 0
         
+        # Checkpoint journal of the crawl frontier and found videos (see --resume)
+        self.journal = CrawlJournal(self.output_dir / "crawl_journal.jsonl")
+        
+        # Canonical-URL visited set shared with the crawl engine (memory, bloom or disk)
+        self.visited_urls = create_visited_set(visited_backend, self.output_dir)
+        
         # Headers to mimic a real browser
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
+        # Pooled keep-alive session with retry/backoff
+        self.session = create_session(self.headers, pool_size=pool_size)
+        
+        # robots.txt rules per host, and optional sitemap.xml seeding of the frontier
+        self.robots = RobotsCache(self.session, self.headers['User-Agent']) if respect_robots else None
+        self.sitemap_seeder = SitemapSeeder(self.session, self.robots, max_urls=sitemap_max_urls) if use_sitemaps else None
+        
+        # Optional second stage: same-origin JS bundles and JSON endpoints mined for video URLs
+        self.resource_miner = ResourceMiner(self.session, self.extract_video_urls_from_text, self.robots,
+                                            max_workers=resource_workers,
+                                            rate_limiter=self.host_limiter) if mine_resources else None
+        
+        # Optional HLS/DASH manifest expansion into per-variant stream records (streams.jsonl)
+        self.stream_prober = ManifestProber(self.session, self.output_dir, max_workers=manifest_workers) if probe_streams else None
+        
         # Video extensions to search for
-        self.video_extensions = {'.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.m3u8', '.webm', '.mpg', '.mpeg'}
-        
-        # Common video URL patterns - expanded for better detection
-        self.video_patterns = [
-            # Direct video file URLs
-            r'https?://[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm|mpg|mpeg|3gp|ogv)',
-            # Video URLs with query parameters
-            r'https?://[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)\?[^\s<>"{}|\\^`\[\]]*',
-            # Common video paths
-            r'https?://[^\s<>"{}|\\^`\[\]]+/video/[^\s<>"{}|\\^`\[\]]+',
-            r'https?://[^\s<>"{}|\\^`\[\]]+/stream/[^\s<>"{}|\\^`\[\]]+',
-            r'https?://[^\s<>"{}|\\^`\[\]]+/media/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
-            r'https?://[^\s<>"{}|\\^`\[\]]+/content/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
-            # M3U8 streaming
-            r'https?://[^\s<>"{}|\\^`\[\]]+\.m3u8[^\s<>"{}|\\^`\[\]]*',
-            # Blob URLs
-            r'blob:https?://[^\s<>"{}|\\^`\[\]]+',
-            # CDN patterns
-            r'https?://[^\s<>"{}|\\^`\[\]]+\.cloudfront\.net/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
-            r'https?://[^\s<>"{}|\\^`\[\]]+\.amazonaws\.com/[^\s<>"{}|\\^`\[\]]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)',
-        ]
+        self.video_extensions = {'.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.m3u8', '.mpd', '.webm', '.mpg', '.mpeg'}
+        
+        # Common video URL patterns, applied through one prefiltered matcher
+        self.video_patterns = list(VIDEO_PATTERNS)
+        self.matcher = VideoUrlMatcher(self.video_patterns, self.video_extensions)
     
     def get_user_urls(self):
         """Get URLs from user input"""
@@ -121,16 +167,23 @@ class VideoScraper:
         text = text[:100]  # Limit length
         return text
     
-    def save_html_source(self, url, html_content, depth):
-        """Save the raw HTML source to a text file"""
+    def save_html_source(self, url, html_content, depth, response=None):
+        """Save the raw HTML source to a text file, or append the response to the WARC archive"""
         try:
+            if self.archive and response is not None:
+                archive_file = self.archive.write(url, response)
+                print(f"{'  ' * depth}Archived HTML source: {archive_file}")
+                return
+            
             # Generate filename based on URL
             parsed_url = urlparse(url)
             domain = parsed_url.netloc.replace('.', '_')
             path_part = self.clean_filename(parsed_url.path.replace('/', '_'))
             
-            self.file_counter += 1
-            filename = f"{self.file_counter:04d}_D{depth}_{domain}_{path_part}.html"
+            with self.lock:
+                self.file_counter += 1
+                file_number = self.file_counter
+            filename = f"{file_number:04d}_D{depth}_{domain}_{path_part}.html"
             filepath = self.html_dir / filename
             
             # Save HTML content
@@ -144,12 +197,13 @@ class VideoScraper:
         except Exception as e:
             print(f"{'  ' * depth}Error saving HTML source: {str(e)}")
     
-    def extract_video_urls_from_html(self, html_content, base_url):
+    def extract_video_urls_from_html(self, html_content, base_url, soup=None):
         """Extract video URLs from HTML content"""
         video_urls = set()
         
         # Search in HTML attributes
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if soup is None:
+            soup = BeautifulSoup(html_content, 'html.parser')
         
         # Look for video tags
         for video in soup.find_all(['video', 'source']):
@@ -171,20 +225,29 @@ class VideoScraper:
             if src and any(provider in src.lower() for provider in ['youtube', 'vimeo', 'dailymotion', 'video', 'player', 'embed']):
                 video_urls.add(urljoin(base_url, src))
         
+        # Scripts and attribute values (style attributes included)
+        video_urls.update(self.attribute_video_urls(soup, base_url))
+        
+        # Look for meta tags with video content
+        for meta in soup.find_all('meta'):
+            content = meta.get('content', '')
+            if any(ext in content.lower() for ext in self.video_extensions):
+                video_urls.add(urljoin(base_url, content))
+        
+        return video_urls
+    
+    def attribute_video_urls(self, soup, base_url):
+        """Video URLs in inline scripts and in the attribute values of every element"""
+        video_urls = set()
+        
         # Search in JavaScript content
-        scripts = soup.find_all('script')
-        for script in scripts:
+        for script in soup.find_all('script'):
             if script.string:
                 # Look for video URLs in JavaScript
-                for pattern in self.video_patterns:
-                    matches = re.findall(pattern, script.string, re.IGNORECASE)
-                    for match in matches:
-                        video_urls.add(match)
+                video_urls.update(self.matcher.pattern_matches(script.string))
                 
                 # Look for JSON objects containing video URLs
-                json_pattern = r'\{[^{}]*"(?:url|src|source|video|file|stream)"[^{}]*:[^{}]*"([^"]+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"]*)"[^{}]*\}'
-                json_matches = re.findall(json_pattern, script.string, re.IGNORECASE)
-                for match in json_matches:
+                for match in self.matcher.script_json_urls(script.string):
                     video_urls.add(urljoin(base_url, match))
         
         # Search in all data attributes
@@ -197,88 +260,37 @@ class VideoScraper:
                             video_urls.add(urljoin(base_url, value))
                     
                     # Also check attribute values for video URLs
-                    for pattern in self.video_patterns:
-                        matches = re.findall(pattern, value, re.IGNORECASE)
-                        for match in matches:
-                            video_urls.add(match)
-        
-        # Look for meta tags with video content
-        for meta in soup.find_all('meta'):
-            content = meta.get('content', '')
-            if any(ext in content.lower() for ext in self.video_extensions):
-                video_urls.add(urljoin(base_url, content))
-        
-        # Search in style attributes for background videos
-        for element in soup.find_all(style=True):
-            style = element['style']
-            for pattern in self.video_patterns:
-                matches = re.findall(pattern, style, re.IGNORECASE)
-                for match in matches:
-                    video_urls.add(match)
+                    video_urls.update(self.matcher.pattern_matches(value))
         
         return video_urls
     
     def extract_video_urls_from_text(self, text):
-        """Extract video URLs from plain text using regex"""
-        video_urls = set()
-        
-        # Apply each video pattern
-        for pattern in self.video_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            video_urls.update(matches)
-        
-        # Look for URLs in quotes (single or double)
-        quoted_url_pattern = r'["\']([^"\']+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']'
-        quoted_matches = re.findall(quoted_url_pattern, text, re.IGNORECASE)
-        video_urls.update(quoted_matches)
-        
-        # Look for URLs in JSON-style strings
-        json_url_pattern = r'["\']\s*:\s*["\']([^"\']+\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']'
-        json_matches = re.findall(json_url_pattern, text, re.IGNORECASE)
-        video_urls.update(json_matches)
-        
-        # Look for base64 encoded URLs (sometimes used for video sources)
-        base64_pattern = r'data:video/[^;]+;base64,[A-Za-z0-9+/=]+'
-        base64_matches = re.findall(base64_pattern, text)
-        video_urls.update(base64_matches)
-        
-        # Also look for any URL ending with video extensions
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        all_urls = re.findall(url_pattern, text)
-        for url in all_urls:
-            if any(ext in url.lower() for ext in self.video_extensions):
-                video_urls.add(url)
-        
-        # Look for relative paths to video files
-        relative_pattern = r'["\']([^"\']*\.(?:mp4|mov|avi|mkv|wmv|flv|m3u8|webm)[^"\']*)["\']'
-        relative_matches = re.findall(relative_pattern, text, re.IGNORECASE)
-        for match in relative_matches:
-            if not match.startswith(('http://', 'https://', 'data:')):
-                video_urls.add(match)  # Will be converted to absolute URL later
-        
-        return video_urls
+        """Extract video URLs from plain text in one prefiltered scan (see video_patterns)"""
+        return self.matcher.text_urls(text)
     
     def scrape_url(self, url, depth=0):
         """Scrape a single URL for video links"""
         try:
-            # Skip if already visited
-            if url in self.visited_urls:
-                return None
-            
             print(f"{'  ' * depth}Scanning: {url}")
-            self.visited_urls.add(url)
             
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = self.session.get(url, timeout=30)
+            if self.rate_limiter:
+                self.rate_limiter.observe(urlparse(url).netloc.lower(), response.status_code,
+                                          response.elapsed.total_seconds(), response.headers.get('Retry-After'),
+                                          throttled_retries(response))
             response.raise_for_status()
             
             # Get the content
             content = response.text
             
             # Save HTML source
-            self.save_html_source(url, content, depth)
+            self.save_html_source(url, content, depth, response)
+            
+            # Parse once: video tags, attributes and links all come from the same tree
+            soup = BeautifulSoup(content, 'html.parser')
             
             # Extract video URLs from HTML
-            video_urls = self.extract_video_urls_from_html(content, url)
+            video_urls = self.extract_video_urls_from_html(content, url, soup)
             
             # Also extract from raw text (catches things BeautifulSoup might miss)
             text_videos = self.extract_video_urls_from_text(content)
@@ -307,52 +319,63 @@ class VideoScraper:
             video_urls = cleaned_urls
             
             # Parse page for more links to follow
-            soup = BeautifulSoup(content, 'html.parser')
-            page_links = set()
+            page_links = {}  # link -> anchor text
             for link in soup.find_all('a', href=True):
                 href = link['href']
                 absolute_url = urljoin(url, href)
                 parsed = urlparse(absolute_url)
                 if parsed.scheme in ['http', 'https'] and parsed.netloc:
-                    page_links.add(absolute_url)
+                    page_links.setdefault(absolute_url, link.get_text(' ', strip=True))
+            
+            # Videos named only in the page's scripts and JSON resources
+            resource_videos = self.resource_miner.mine(soup, url) if self.resource_miner else {}
+            video_urls.update(resource_videos)
             
-            # Store found videos
+            # Store found videos (the index writes the new ones out at once and
+            # records the extra page for ones already found)
+            page_videos = []
             for video_url in video_urls:
-                # Check if we've already found this video
-                if not any(v['url'] == video_url for v in self.found_videos):
-                    # Determine video type
-                    video_type = 'unknown'
-                    if video_url.startswith('data:'):
-                        video_type = 'base64'
-                    elif video_url.startswith('blob:'):
-                        video_type = 'blob'
-                    elif '.m3u8' in video_url.lower():
-                        video_type = 'streaming'
-                    else:
-                        for ext in self.video_extensions:
-                            if ext in video_url.lower():
-                                video_type = ext[1:]  # Remove the dot
-                                break
-                    
-                    video_info = {
-                        'url': video_url,
-                        'found_on': url,
-                        'depth': depth,
-                        'type': video_type,
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    self.found_videos.append(video_info)
-                    print(f"{'  ' * (depth + 1)}Found {video_type} video: {video_url[:100]}...")
+                # Determine video type
+                video_type = 'unknown'
+                if video_url.startswith('data:'):
+                    video_type = 'base64'
+                elif video_url.startswith('blob:'):
+                    video_type = 'blob'
+                elif '.m3u8' in video_url.lower() or '.mpd' in video_url.lower():
+                    video_type = 'streaming'
+                else:
+                    for ext in self.video_extensions:
+                        if ext in video_url.lower():
+                            video_type = ext[1:]  # Remove the dot
+                            break
+                
+                video_info = {
+                    'url': video_url,
+                    'found_on': url,
+                    'depth': depth,
+                    'type': video_type,
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+                }
+                if video_url in resource_videos:
+                    video_info['via'] = resource_videos[video_url]
+                page_videos.append(video_info)
+            for video_info in self.found_videos.add_page(url, page_videos):
+                print(f"{'  ' * (depth + 1)}Found {video_info['type']} video: {video_info['url'][:100]}...")
+                if self.stream_prober and video_info['type'] == 'streaming':
+                    self.stream_prober.submit(video_info['url'], url)
             
             return {
                 'url': url,
                 'video_count': len(video_urls),
                 'links': list(page_links),
+                'anchors': page_links,
                 'success': True
             }
             
         except Exception as e:
             print(f"{'  ' * depth}Error scanning {url}: {str(e)}")
+            if self.rate_limiter and getattr(e, 'response', None) is None:
+                self.rate_limiter.observe(urlparse(url).netloc.lower(), None)
             return {
                 'url': url,
                 'video_count': 0,
@@ -360,76 +383,90 @@ class VideoScraper:
                 'success': False
             }
     
-    def scrape_recursive(self, url, depth=0):
-        """Recursively scrape URL and its links"""
-        if depth > self.max_depth:
-            return
-        
+    def crawl_page(self, url, depth=0):
+        """Scan one page and return the links to follow from it"""
         # Scrape the current URL
         result = self.scrape_url(url, depth)
         if not result:
-            return
+            return []
+        
+        # Follow links if we haven't reached max depth
+        if depth >= self.max_depth or not result.get('success') or not result.get('links'):
+            return []
+        
+        # Only follow links from the same domain; the crawl engine scores
+        # them and keeps the best links_per_page
+        anchors = result.get('anchors', {})
+        page_domain = urlparse(url).netloc.lower()
+        return [(link, anchors.get(link, '')) for link in result['links']
+                if urlparse(link).netloc.lower() == page_domain]
+    
+    def crawl(self, urls, resume_state=None):
+        """Crawl the source URLs concurrently with per-host politeness"""
+        engine = CrawlEngine(
+            self.crawl_page,
+            max_depth=self.max_depth,
+            workers=self.workers,
+            host_delay=self.host_delay,
+            host_max_in_flight=self.host_max_in_flight,
+            journal=self.journal,
+            visited=self.visited_urls,
+            robots=self.robots,
+            links_per_page=self.links_per_page,
+            max_pages=self.max_pages,
+            rate_limiter=self.host_limiter
+        )
+        if resume_state:
+            engine.restore(resume_state['pending'], resume_state['seen'])
+        engine.seed(urls)
+        if self.sitemap_seeder and urls:
+            self.sitemap_seeder.seed(engine, urls)
+        engine.run()
+    
+    def load_resume_state(self):
+        """Rebuild frontier and found videos from the journal of an interrupted scan"""
+        pending, seen, completed, notes = self.journal.load()
         
-        # Be respectful - add delay
-        time.sleep(1)
+        # Videos already written to video_links.jsonl
+        self.found_videos.load()
         
-        # Recursively scrape links if we haven't reached max depth
-        if depth < self.max_depth and result.get('success') and result.get('links'):
-            # Limit number of links to follow
-            links_to_follow = result['links'][:20]
-            
-            for link in links_to_follow:
-                # Only follow links from the same domain
-                if urlparse(link).netloc == urlparse(url).netloc:
-                    self.scrape_recursive(link, depth + 1)
+        # Continue file numbering after the files already written
+        numbers = [int(f.name[:4]) for f in self.html_dir.iterdir() if f.name[:4].isdigit()]
+        self.file_counter = max(numbers, default=0)
+        
+        return {'pending': pending, 'seen': seen, 'completed': completed}
     
     def save_results(self):
-        """Save found video URLs to files"""
-        # Save as JSON
-        json_file = self.output_dir / 'video_links.json'
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(self.found_videos, f, indent=2)
-        
-        # Save as text file
+        """Build the grouped text listing and summary from video_links.jsonl"""
+        # video_links.jsonl and video_links.csv were written as videos were found;
+        # both files here are built in one streaming pass over the records
+        total = 0
+        type_counts = {}
         txt_file = self.output_dir / 'video_links.txt'
         with open(txt_file, 'w', encoding='utf-8') as f:
             f.write(f"Video Links Found - {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write("=" * 60 + "\n\n")
             
-            # Group by source page
-            by_source = {}
-            for video in self.found_videos:
-                source = video['found_on']
-                if source not in by_source:
-                    by_source[source] = []
-                by_source[source].append(video['url'])
-            
-            for source, videos in by_source.items():
-                f.write(f"\nSource: {source}\n")
-                f.write("-" * 40 + "\n")
-                for video_url in videos:
-                    f.write(f"{video_url}\n")
-        
-        # Save as CSV
-        csv_file = self.output_dir / 'video_links.csv'
-        with open(csv_file, 'w', encoding='utf-8') as f:
-            f.write("Video URL,Found On,Type,Depth,Timestamp\n")
+            # Group by source page: a page's videos are written as one block
+            source = None
             for video in self.found_videos:
-                f.write(f'"{video["url"]}","{video["found_on"]}",{video.get("type", "unknown")},{video["depth"]},{video["timestamp"]}\n')
+                total += 1
+                vtype = video.get('type', 'unknown')
+                type_counts[vtype] = type_counts.get(vtype, 0) + 1
+                if video['found_on'] != source:
+                    source = video['found_on']
+                    f.write(f"\nSource: {source}\n")
+                    f.write("-" * 40 + "\n")
+                f.write(f"{video['url']}\n")
         
         # Save summary
         summary_file = self.output_dir / 'summary.txt'
         with open(summary_file, 'w', encoding='utf-8') as f:
             f.write(f"Video Scraping Summary - {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write("=" * 60 + "\n\n")
-            f.write(f"Total videos found: {len(self.found_videos)}\n")
-            f.write(f"URLs scanned: {len(self.visited_urls)}\n\n")
-            
-            # Count by type
-            type_counts = {}
-            for video in self.found_videos:
-                vtype = video.get('type', 'unknown')
-                type_counts[vtype] = type_counts.get(vtype, 0) + 1
+            f.write(f"Total videos found: {total}\n")
+            f.write(f"URLs scanned: {len(self.visited_urls)}\n")
+            f.write(f"Repeat sightings on other pages: {self.found_videos.sightings}\n\n")
             
             f.write("Videos by type:\n")
             for vtype, count in sorted(type_counts.items()):
@@ -441,35 +478,97 @@ class VideoScraper:
     
     def run(self):
         """Main scraping process"""
-        urls = self.get_user_urls()
-        
-        if not urls:
-            print("No URLs provided.")
-            return
+        resume_state = None
+        if self.resume_dir:
+            resume_state = self.load_resume_state()
+            urls = []
+            print(f"Resuming scan in {self.output_dir.absolute()}")
+            print(f"  Completed: {len(resume_state['completed'])} pages, pending: {len(resume_state['pending'])} URLs")
+            print(f"  Videos found so far: {len(self.found_videos)}")
+        else:
+            urls = self.get_user_urls()
+            
+            if not urls:
+                print("No URLs provided.")
+                return
         
-        print(f"\nStarting video scan of {len(urls)} URLs")
+        print(f"\nStarting video scan of {len(urls) or len(resume_state['pending'])} URLs")
         print(f"Max depth: {self.max_depth}")
+        print(f"Workers: {self.workers} (per host: {self.host_max_in_flight} in flight, {self.host_delay}s delay{', adaptive' if self.rate_limiter else ''})")
         print(f"Output directory: {self.output_dir.absolute()}")
         print("-" * 60)
         
-        for url in urls:
-            self.scrape_recursive(url, depth=0)
+        try:
+            self.crawl(urls, resume_state)
+        finally:
+            # Found videos and learned host rates are kept even if the scan is interrupted
+            self.found_videos.close()
+            if self.rate_limiter:
+                self.rate_limiter.close()
+        
+        if self.resource_miner:
+            self.resource_miner.close()
+        if self.stream_prober:
+            print("Waiting for stream manifests...")
+            self.stream_prober.close()
         
         print("-" * 60)
         print(f"\nScan complete!")
         print(f"Total video links found: {len(self.found_videos)}")
         print(f"URLs scanned: {len(self.visited_urls)}")
+        if self.archive:
+            self.archive.close()
+            print(f"HTML archive: {self.archive.summary()}")
+        if self.robots:
+            print(f"Disallowed by robots.txt: {self.robots.disallowed}")
+        if self.rate_limiter:
+            print(f"Host rates: {self.rate_limiter.summary()}")
+        if self.resource_miner:
+            print(f"Script/JSON resources: {self.resource_miner.summary()}")
+        if self.stream_prober:
+            print(f"Stream manifests: {self.stream_prober.summary()}")
         
         if self.found_videos:
             self.save_results()
         else:
             print("No video links were found.")
+        self.visited_urls.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Video Link Scraper")
+    parser.add_argument('--resume', metavar='OUTPUT_DIR',
+                        help="continue an interrupted scan from its video_links_* directory")
+    parser.add_argument('--ignore-robots', action='store_true',
+                        help="do not fetch or honor robots.txt")
+    parser.add_argument('--sitemaps', action='store_true',
+                        help="also seed the crawl from each source site's sitemap.xml")
+    parser.add_argument('--links-per-page', type=int, default=20,
+                        help="follow at most this many of the best-scored new links from each page (default: 20)")
+    parser.add_argument('--max-pages', type=int,
+                        help="stop after scanning this many pages")
+    parser.add_argument('--archive', choices=('gzip', 'zstd'),
+                        help="store HTML sources as compressed WARC records in archive/ instead of one file per page")
+    parser.add_argument('--visited', choices=VISITED_BACKENDS, default='memory',
+                        help="visited-URL set: exact in memory, Bloom filter, or SQLite on disk for very large crawls")
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help="keep a fixed delay between requests to a host instead of adapting it to the server")
+    parser.add_argument('--scripts', action='store_true',
+                        help="also fetch same-origin JS and JSON resources and search them for video URLs")
+    parser.add_argument('--probe-streams', action='store_true',
+                        help="fetch found HLS/DASH manifests and record each variant's resolution, bitrate and length")
+    args = parser.parse_args()
+    
+    scraper = None
     try:
-        scraper = VideoScraper(max_depth=1)
+        scraper = VideoScraper(max_depth=1, resume_dir=args.resume, visited_backend=args.visited,
+                               respect_robots=not args.ignore_robots, use_sitemaps=args.sitemaps,
+                               links_per_page=args.links_per_page, max_pages=args.max_pages,
+                               archive=args.archive, adaptive_rate=not args.fixed_rate,
+                               mine_resources=args.scripts, probe_streams=args.probe_streams)
         scraper.run()
     except KeyboardInterrupt:
         print("\n\nScanning interrupted by user.")
+        if scraper:
+            print(f"Resume with: python {sys.argv[0]} --resume {scraper.output_dir}")
     except Exception as e:
         print(f"\n\nError: {str(e)}")
@@ -0,0 +1,243 @@
+import io
+import sys
+import gzip
+import time
+import uuid
+import base64
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+# zstd is optional; gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+INDEX_NAME = "index.tsv"
+
+# Headers that describe the wire encoding, not the decoded body we store
+HOP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+
+
+def http_block(response, body):
+    """Serialize a requests response as an HTTP/1.1 message with the decoded body"""
+    reason = response.reason or ''
+    lines = [f"HTTP/1.1 {response.status_code} {reason}".rstrip()]
+    for name, value in response.headers.items():
+        if name.lower() not in HOP_HEADERS:
+            lines.append(f"{name}: {value}")
+    lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1', 'replace') + body
+
+
+def parse_headers(block):
+    """Header dict from the lines of a WARC or HTTP header block"""
+    headers = {}
+    for line in block.split(b"\r\n")[1:]:
+        name, sep, value = line.decode('latin-1').partition(':')
+        if sep:
+            headers[name.strip()] = value.strip()
+    return headers
+
+
+class WarcWriter:
+    """Append fetched pages to rotating, compressed WARC files.
+
+    Each page becomes a WARC/1.1 `response` record (HTTP status line,
+    headers and decoded body) compressed as its own gzip member or zstd
+    frame, so a record can be read back by seeking to its offset.
+    `index.tsv` maps URL -> (file, offset, length, date) for random access.
+    A new `pages-NNNNN.warc.gz` (or .warc.zst) is started once the current
+    file passes `max_bytes`, and on every run, so a torn record from a
+    crash never sits in front of new ones.
+    """
+
+    def __init__(self, archive_dir, max_bytes=1024 * 1024 * 1024, compression="gzip", prefix="pages"):
+        if compression == "zstd" and zstandard is None:
+            print("zstandard is not installed, archiving with gzip")
+            compression = "gzip"
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.extension = ".warc.zst" if compression == "zstd" else ".warc.gz"
+        self.prefix = prefix
+        self.lock = threading.Lock()
+
+        existing = [int(p.name[len(prefix) + 1:len(prefix) + 6]) for p in self.archive_dir.glob(f"{prefix}-*.warc.*")
+                    if p.name[len(prefix) + 1:len(prefix) + 6].isdigit()]
+        self.file_number = max(existing, default=0)
+        self.file = None
+        self.path = None
+        self.index = open(self.archive_dir / INDEX_NAME, 'a', encoding='utf-8')
+        self.records = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def compress(self, data):
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=9).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def open_next(self):
+        if self.file:
+            self.file.close()
+        self.file_number += 1
+        self.path = self.archive_dir / f"{self.prefix}-{self.file_number:05d}{self.extension}"
+        self.file = open(self.path, 'ab')
+
+    def write(self, url, response, body=None):
+        """Append a response record; returns the archive file name"""
+        body = response.content if body is None else body
+        payload = http_block(response, body)
+        date = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        digest = base64.b32encode(hashlib.sha1(body).digest()).decode('ascii')
+        header = (
+            "WARC/1.1\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {date}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Payload-Digest: sha1:{digest}\r\n"
+            "Content-Type: application/http;msgtype=response\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        record = self.compress(header + payload + b"\r\n\r\n")
+
+        with self.lock:
+            if self.file is None or self.file.tell() >= self.max_bytes:
+                self.open_next()
+            offset = self.file.tell()
+            self.file.write(record)
+            self.index.write(f"{url}\t{self.path.name}\t{offset}\t{len(record)}\t{date}\n")
+            self.records += 1
+            self.raw_bytes += len(header) + len(payload)
+            self.stored_bytes += len(record)
+        return self.path.name
+
+    def summary(self):
+        ratio = (self.raw_bytes / self.stored_bytes) if self.stored_bytes else 0.0
+        return (f"{self.records} records, {self.stored_bytes / 1024 / 1024:.1f} MB compressed "
+                f"({ratio:.1f}x) in {self.archive_dir}")
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+            self.index.close()
+
+
+class WarcReader:
+    """Read pages back from a WarcWriter archive, sequentially or by URL"""
+
+    def __init__(self, archive_dir):
+        self.archive_dir = Path(archive_dir)
+        self.index = None
+
+    def load_index(self):
+        """URL -> (file, offset, length) of its latest record"""
+        if self.index is None:
+            self.index = {}
+            index_path = self.archive_dir / INDEX_NAME
+            if index_path.exists():
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        parts = line.rstrip('\n').split('\t')
+                        if len(parts) >= 4:
+                            self.index[parts[0]] = (parts[1], int(parts[2]), int(parts[3]))
+        return self.index
+
+    def decompress(self, name, data):
+        if name.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .warc.zst archives")
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        return gzip.decompress(data)
+
+    def parse_record(self, record):
+        """(url, WARC headers, HTTP headers, body) from an uncompressed record"""
+        warc_head, _, rest = record.partition(b"\r\n\r\n")
+        warc_headers = parse_headers(warc_head)
+        length = int(warc_headers.get('Content-Length', len(rest)))
+        http_head, _, body = rest[:length].partition(b"\r\n\r\n")
+        return warc_headers.get('WARC-Target-URI'), warc_headers, parse_headers(http_head), body
+
+    def get(self, url):
+        """(url, WARC headers, HTTP headers, body) of a URL's record, or None"""
+        entry = self.load_index().get(url)
+        if entry is None:
+            return None
+        name, offset, length = entry
+        with open(self.archive_dir / name, 'rb') as f:
+            f.seek(offset)
+            return self.parse_record(self.decompress(name, f.read(length)))
+
+    def open_stream(self, path, f):
+        """Decompressed stream over all records of an archive file"""
+        if path.name.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .warc.zst archives")
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True))
+        return gzip.GzipFile(fileobj=f)
+
+    def records(self):
+        """Every record in archive order, streamed one record at a time"""
+        for path in sorted(self.archive_dir.glob("*.warc.*")):
+            with open(path, 'rb') as f:
+                stream = self.open_stream(path, f)
+                try:
+                    while True:
+                        version = stream.readline()
+                        if not version:
+                            break
+                        head = [version]
+                        while head[-1] not in (b"\r\n", b""):
+                            head.append(stream.readline())
+                        warc_headers = parse_headers(b"".join(head).rstrip(b"\r\n"))
+                        length = int(warc_headers.get('Content-Length', 0))
+                        block = stream.read(length)
+                        stream.read(4)  # record separator
+                        http_head, _, body = block.partition(b"\r\n\r\n")
+                        yield warc_headers.get('WARC-Target-URI'), warc_headers, parse_headers(http_head), body
+                except (EOFError, OSError):
+                    # Torn last record from a crash
+                    print(f"Truncated archive file: {path.name}")
+
+    def pages(self):
+        """(url, HTML bytes) for every archived page"""
+        for url, warc_headers, http_headers, body in self.records():
+            yield url, body
+
+
+def replay(archive_dir):
+    """Run every archived page through the extraction pipeline, offline"""
+    from html_extract import MEDIA_EXTENSIONS, PageExtractor
+
+    extractor = PageExtractor(MEDIA_EXTENSIONS)
+    pages = 0
+    start = time.perf_counter()
+    for url, html in WarcReader(archive_dir).pages():
+        page = extractor.extract(html, url)
+        pages += 1
+        print(f"{url}: {page['title']!r}, {len(page['links'])} links, {len(page['markdown'])} chars of markdown")
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {pages} pages in {elapsed:.2f}s ({pages / elapsed if elapsed else 0:.1f} pages/s)")
+
+
+if __name__ == "__main__":
+    # Usage: python warc_archive.py <archive dir> [url]
+    if len(sys.argv) == 3:
+        found = WarcReader(sys.argv[1]).get(sys.argv[2])
+        if not found:
+            print(f"{sys.argv[2]} is not in the archive")
+            sys.exit(1)
+        sys.stdout.buffer.write(found[3])
+    elif len(sys.argv) == 2:
+        replay(sys.argv[1])
+    else:
+        print("Usage: python warc_archive.py <archive directory> [url]")
+        sys.exit(1)
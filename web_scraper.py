@@ -1,23 +1,63 @@
-import requests
-from bs4 import BeautifulSoup
 import os
 import re
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
+import sys
 import time
+import argparse
+import threading
 from pathlib import Path
 from datetime import datetime
-import mimetypes
+from crawl_engine import CrawlEngine, CrawlJournal
+from scraper_http import create_session
+from media_store import MediaStore
+from http_cache import HttpCache
+from html_extract import MEDIA_EXTENSIONS, PageExtractor, read_html_source
+from url_canon import create_visited_set, VISITED_BACKENDS
+from robots_sitemap import RobotsCache, SitemapSeeder
+from warc_archive import WarcWriter, WarcReader
+from near_dup import NearDuplicateIndex
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from crawl_metrics import CrawlMetrics, timed
+from rate_limiter import AdaptiveRateLimiter, throttled_retries
 
 class WebScraper:
-    def __init__(self, max_depth=2):
+    def __init__(self, max_depth=2, workers=8, host_delay=1.0, host_max_in_flight=2, pool_size=10,
+                 media_workers=4, media_store_dir="media_store",
+                 http_cache_dir="http_cache", http_cache_max_mb=512, resume_dir=None, visited_backend="memory",
+                 respect_robots=True, use_sitemaps=False, sitemap_max_urls=10000, links_per_page=10, max_pages=None,
+                 near_dup_threshold=0.8, archive=None, metrics="both", adaptive_rate=True,
+                 rate_state_path="host_rates.json"):
         self.max_depth = max_depth
-        self.visited_urls = set()
         self.file_counter = 0
         self.media_counter = 0
+        self.successful = 0
+        self.failed = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        
+        # Crawl concurrency: worker count and per-host politeness
+        self.workers = workers
+        self.host_delay = host_delay
+        self.host_max_in_flight = host_max_in_flight
+        
+        # Per-host request rate, starting at host_delay and adapted to latency and 429/503s
+        # (learned rates are kept in rate_state_path across runs); None = fixed host_delay
+        self.rate_limiter = AdaptiveRateLimiter(host_delay, state_path=rate_state_path) if adaptive_rate else None
+        
+        # Fetch budgets: best-scored links kept per page, and pages per crawl (None = unlimited)
+        self.links_per_page = links_per_page
+        self.max_pages = max_pages
+        
+        # Pages are processed on worker threads, so counters need a lock
+        self.counter_lock = threading.Lock()
         
-        # Create unique output directory with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.base_output_dir = Path(f"scraped_content_{timestamp}")
+        # Create unique output directory with timestamp, or continue an interrupted crawl
+        self.resume_dir = resume_dir
+        if resume_dir:
+            self.base_output_dir = Path(resume_dir)
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.base_output_dir = Path(f"scraped_content_{timestamp}")
         self.output_dir = self.base_output_dir / "content"
         self.media_dir = self.base_output_dir / "media"
         
@@ -27,14 +67,45 @@ class WebScraper:
         self.html_dir = self.base_output_dir / "html_source"
         self.html_dir.mkdir(parents=True, exist_ok=True)
         
+        # Optional compressed WARC archive replacing the per-page html_source files
+        self.archive = WarcWriter(self.base_output_dir / "archive", compression=archive) if archive else None
+        
+        # Per-phase timings and per-host counters in metrics.jsonl / metrics.prom ("off" = none)
+        self.metrics = CrawlMetrics(self.base_output_dir, write_jsonl=metrics in ("both", "jsonl"),
+                                    write_prometheus=metrics in ("both", "prometheus"))
+        
+        # Checkpoint journal of the crawl frontier (see --resume)
+        self.journal = CrawlJournal(self.base_output_dir / "crawl_journal.jsonl")
+        
+        # Canonical-URL visited set shared with the crawl engine (memory, bloom or disk)
+        self.visited_urls = create_visited_set(visited_backend, self.base_output_dir)
+        
         # Headers to mimic a real browser
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
+        # Pooled keep-alive session shared by page and media requests
+        self.session = create_session(self.headers, pool_size=pool_size)
+        
+        # Content-addressed media downloads on a bounded thread pool
+        self.media_store = MediaStore(self.session, self.media_dir, media_store_dir, max_workers=media_workers)
+        
+        # Persistent HTTP cache for conditional revalidation on re-crawls
+        self.http_cache = HttpCache(http_cache_dir, max_bytes=http_cache_max_mb * 1024 * 1024)
+        
+        # robots.txt rules per host, and optional sitemap.xml seeding of the frontier
+        self.robots = RobotsCache(self.session, self.headers['User-Agent']) if respect_robots else None
+        self.sitemap_seeder = SitemapSeeder(self.session, self.robots, max_urls=sitemap_max_urls) if use_sitemaps else None
+        
+        # MinHash index of saved pages' main content (None = keep every page)
+        self.near_dup = NearDuplicateIndex(near_dup_threshold) if near_dup_threshold is not None else None
+        
         # Media extensions to download
-        self.media_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico',
-                                '.mp4', '.webm', '.mp3', '.wav', '.pdf', '.doc', '.docx'}
+        self.media_extensions = set(MEDIA_EXTENSIONS)
+        
+        # Single-pass extraction of title, links, media and markdown
+        self.extractor = PageExtractor(self.media_extensions)
     
     def get_user_urls(self):
         """Get URLs from user input"""
@@ -113,16 +184,27 @@ class WebScraper:
         text = text[:100]  # Limit length
         return text
     
-    def save_html_source(self, url, html_content, depth):
-        """Save the raw HTML source to a text file"""
+    def next_file_number(self):
+        """Reserve the next output file number (thread-safe)"""
+        with self.counter_lock:
+            self.file_counter += 1
+            return self.file_counter
+    
+    def save_html_source(self, url, html_content, depth, response=None):
+        """Save the raw HTML source to a text file, or append the response to the WARC archive"""
         try:
+            if self.archive and response is not None:
+                archive_file = self.archive.write(url, response)
+                print(f"{'  ' * depth}Archived HTML source: {archive_file}")
+                return
+            
             # Generate filename based on URL
             parsed_url = urlparse(url)
             domain = parsed_url.netloc.replace('.', '_')
             path_part = self.clean_filename(parsed_url.path.replace('/', '_'))
             
-            self.file_counter += 1
-            filename = f"{self.file_counter:04d}_D{depth}_{domain}_{path_part}.html"
+            file_number = self.next_file_number()
+            filename = f"{file_number:04d}_D{depth}_{domain}_{path_part}.html"
             filepath = self.html_dir / filename
             
             # Save HTML content
@@ -136,184 +218,22 @@ class WebScraper:
         except Exception as e:
             print(f"{'  ' * depth}Error saving HTML source: {str(e)}")
     
-    def extract_content(self, soup):
-        """Extract main content from the webpage"""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-            script.decompose()
-        
-        # Try to find main content areas
-        content_selectors = [
-            'main',
-            'article',
-            '.content',
-            '.main-content',
-            '.post-content',
-            '.entry-content',
-            '#content',
-            '.container'
-        ]
-        
-        content = None
-        for selector in content_selectors:
-            content = soup.select_one(selector)
-            if content:
-                break
-        
-        # If no specific content area found, use body
-        if not content:
-            content = soup.find('body')
-        
-        return content
-    
-    def html_to_markdown(self, content):
-        """Convert HTML content to markdown"""
-        if not content:
-            return ""
-        
-        markdown = ""
-        
-        # Process different HTML elements
-        for element in content.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            level = int(element.name[1])
-            markdown += f"\n{'#' * level} {element.get_text().strip()}\n\n"
-        
-        for element in content.find_all('p'):
-            text = element.get_text().strip()
-            if text:
-                markdown += f"{text}\n\n"
-        
-        for element in content.find_all(['ul', 'ol']):
-            for li in element.find_all('li'):
-                text = li.get_text().strip()
-                if text:
-                    markdown += f"- {text}\n"
-            markdown += "\n"
-        
-        for element in content.find_all('a'):
-            text = element.get_text().strip()
-            href = element.get('href', '')
-            if text and href:
-                markdown += f"[{text}]({href})\n"
-        
-        for element in content.find_all(['strong', 'b']):
-            text = element.get_text().strip()
-            if text:
-                markdown += f"**{text}**\n"
-        
-        for element in content.find_all(['em', 'i']):
-            text = element.get_text().strip()
-            if text:
-                markdown += f"*{text}*\n"
-        
-        for element in content.find_all('code'):
-            text = element.get_text().strip()
-            if text:
-                markdown += f"`{text}`\n"
-        
-        for element in content.find_all('pre'):
-            text = element.get_text().strip()
-            if text:
-                markdown += f"```\n{text}\n```\n\n"
-        
-        # If no specific elements found, just get all text
-        if not markdown.strip():
-            markdown = content.get_text()
-        
-        return markdown
-    
-    def extract_links(self, soup, base_url):
-        """Extract all links from the page"""
-        links = set()
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            # Convert relative URLs to absolute
-            absolute_url = urljoin(base_url, href)
-            
-            # Parse the URL
-            parsed = urlparse(absolute_url)
-            
-            # Filter out non-HTTP(S) links and anchors
-            if parsed.scheme in ['http', 'https'] and parsed.netloc:
-                # Remove fragment (anchor) from URL
-                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                if parsed.query:
-                    clean_url += f"?{parsed.query}"
-                links.add(clean_url)
-        
-        return links
-    
-    def extract_media_urls(self, soup, base_url):
-        """Extract all media URLs from the page"""
-        media_urls = set()
-        
-        # Find images
-        for img in soup.find_all('img'):
-            src = img.get('src') or img.get('data-src')
-            if src:
-                media_urls.add(urljoin(base_url, src))
-        
-        # Find videos
-        for video in soup.find_all(['video', 'source']):
-            src = video.get('src')
-            if src:
-                media_urls.add(urljoin(base_url, src))
-        
-        # Find links to media files
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if any(href.lower().endswith(ext) for ext in self.media_extensions):
-                media_urls.add(urljoin(base_url, href))
-        
-        # Find background images in style attributes
-        for element in soup.find_all(style=True):
-            style = element['style']
-            urls = re.findall(r'url\(["\']?([^"\']+)["\']?\)', style)
-            for url in urls:
-                media_urls.add(urljoin(base_url, url))
-        
-        return media_urls
-    
-    def download_media(self, url, page_url):
-        """Download a media file"""
-        try:
-            # Skip if already downloaded
-            url_hash = str(abs(hash(url)))[:8]
-            
-            # Get file extension
-            parsed_url = urlparse(url)
-            path = parsed_url.path
-            ext = os.path.splitext(path)[1].lower()
-            
-            # If no extension, try to get from content-type
-            if not ext:
-                try:
-                    response = requests.head(url, headers=self.headers, timeout=10)
-                    content_type = response.headers.get('content-type', '')
-                    ext = mimetypes.guess_extension(content_type.split(';')[0]) or ''
-                except:
-                    ext = ''
-            
-            # Generate filename
-            self.media_counter += 1
-            domain = urlparse(page_url).netloc.replace('.', '_')
-            filename = f"{self.media_counter:04d}_{domain}_{url_hash}{ext}"
-            filepath = self.media_dir / filename
-            
-            # Download the file
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            
-            # Save the file
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
-            print(f"{'  ' * 2}Downloaded media: {filename}")
-            return str(filepath.relative_to(self.base_output_dir))
-            
-        except Exception as e:
-            print(f"{'  ' * 2}Error downloading media {url}: {str(e)}")
-            return None
+    def download_media(self, media_urls, page_url):
+        """Download a page's media files in parallel through the media store"""
+        futures = [(url, self.media_store.submit(url, page_url)) for url in media_urls]
+        
+        downloaded_media = []
+        for url, future in futures:
+            try:
+                filepath = future.result()
+            except Exception as e:
+                print(f"{'  ' * 2}Error downloading media {url}: {str(e)}")
+                continue
+            downloaded_media.append({
+                'url': url,
+                'local_path': str(filepath.relative_to(self.base_output_dir))
+            })
+        return downloaded_media
     
     def scrape_url(self, url, depth=0):
         """Scrape a single URL and return content with links"""
@@ -321,10 +241,6 @@ class WebScraper:
             # Clean up the URL
             url = url.strip()
             
-            # Skip if already visited
-            if url in self.visited_urls:
-                return None
-            
             # Validate URL format
             parsed = urlparse(url)
             if not parsed.scheme or not parsed.netloc:
@@ -338,55 +254,82 @@ class WebScraper:
                 }
             
             print(f"{'  ' * depth}Scraping: {url}")
-            self.visited_urls.add(url)
             
-            response = requests.get(url, headers=self.headers, timeout=30)
+            # Revalidate against the HTTP cache from previous crawls
+            conditional_headers = self.http_cache.conditional_headers(url)
+            timings = {}
+            with timed(timings, 'download'):
+                response = self.session.get(url, timeout=30, headers=conditional_headers)
+            # elapsed = request sent until headers parsed (DNS/connect/TTFB); the rest is the body
+            timings['ttfb'] = min(response.elapsed.total_seconds(), timings['download'])
+            timings['download'] -= timings['ttfb']
+            fetch = {
+                'host': parsed.netloc.lower(),
+                'status': response.status_code,
+                'bytes': len(response.content),
+                'retries': len(response.raw.retries.history) if getattr(response.raw, 'retries', None) else 0
+            }
+            if self.rate_limiter:
+                self.rate_limiter.observe(fetch['host'], response.status_code, timings['ttfb'],
+                                          response.headers.get('Retry-After'), throttled_retries(response))
+            if response.status_code >= 400:
+                self.metrics.error(url, fetch['host'], f"HTTP {response.status_code}", fetch['retries'])
+            if response.status_code == 304 and conditional_headers:
+                # Unchanged since the last crawl: follow cached links, skip parsing and writing
+                print(f"{'  ' * depth}Not modified: {url}")
+                cached = self.http_cache.revalidated(url)
+                return {
+                    'title': urlparse(url).netloc,
+                    'url': url,
+                    'content': '',
+                    'links': cached['links'],
+                    'media': [],
+                    'success': True,
+                    'not_modified': True,
+                    'depth': depth,
+                    'fetch': fetch,
+                    'timings': timings
+                }
             response.raise_for_status()
             
             # Save HTML source
-            self.save_html_source(url, response.text, depth)
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Get title
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else urlparse(url).netloc
-            
-            # Extract all links from the page
-            links = self.extract_links(soup, url)
-            
-            # Extract media URLs
-            media_urls = self.extract_media_urls(soup, url)
+            with timed(timings, 'write'):
+                self.save_html_source(url, response.text, depth, response)
+            
+            # Title, links, media URLs and markdown in one pass over the page
+            page = self.extractor.extract(response.content, url, timings)
+            title_text = page['title'] or urlparse(url).netloc
+            links = page['links']
+            anchors = page['anchors']
+            media_urls = page['media_urls']
+            markdown_content = page['markdown']
+            self.http_cache.store(url, response, links)
             
             # Download media files
-            downloaded_media = []
             print(f"{'  ' * depth}Found {len(media_urls)} media files")
-            for media_url in list(media_urls)[:20]:  # Limit to 20 media files per page
-                media_path = self.download_media(media_url, url)
-                if media_path:
-                    downloaded_media.append({
-                        'url': media_url,
-                        'local_path': media_path
-                    })
-            
-            # Extract main content
-            content = self.extract_content(soup)
-            
-            # Convert to markdown
-            markdown_content = self.html_to_markdown(content)
+            with timed(timings, 'media'):
+                downloaded_media = self.download_media(list(media_urls)[:20], url)  # Limit to 20 media files per page
             
             return {
                 'title': title_text,
                 'url': url,
                 'content': markdown_content,
                 'links': list(links),
+                'anchors': anchors,
                 'media': downloaded_media,
                 'success': True,
-                'depth': depth
+                'depth': depth,
+                'fetch': fetch,
+                'timings': timings
             }
             
         except Exception as e:
             print(f"{'  ' * depth}Error scraping {url}: {str(e)}")
+            if getattr(e, 'response', None) is None:
+                # HTTP error statuses were already counted above
+                self.metrics.error(url, urlparse(url).netloc.lower(), type(e).__name__)
+                if self.rate_limiter:
+                    self.rate_limiter.observe(urlparse(url).netloc.lower(), None)
             try:
                 title = urlparse(url).netloc
             except:
@@ -401,11 +344,11 @@ class WebScraper:
                 'depth': depth
             }
     
-    def save_markdown(self, data):
+    def save_markdown(self, data, file_number=None):
         """Save scraped data as markdown file"""
-        self.file_counter += 1
+        file_number = file_number or self.next_file_number()
         depth_prefix = f"D{data.get('depth', 0)}_"
-        filename = f"{self.file_counter:04d}_{depth_prefix}{self.clean_filename(data['title'])}.md"
+        filename = f"{file_number:04d}_{depth_prefix}{self.clean_filename(data['title'])}.md"
         filepath = self.output_dir / filename
         
         # Format links section
@@ -449,77 +392,320 @@ class WebScraper:
             print(f"Error saving {filepath}: {str(e)}")
             return False
     
-    def scrape_recursive(self, url, depth=0):
-        """Recursively scrape URL and its links up to max_depth"""
-        if depth > self.max_depth:
-            return
-        
+    def crawl_page(self, url, depth=0):
+        """Scrape and save one page, returning the links to follow from it"""
         # Scrape the current URL
         data = self.scrape_url(url, depth)
         if not data:
-            return
+            return []
+        
+        # Near-duplicates of an already saved page are cross-referenced, not saved or followed
+        fingerprint = duplicate_of = None
+        if self.near_dup and data['success'] and not data.get('not_modified'):
+            fingerprint, duplicate_of = self.near_dup.check(url, data['content'])
+        if duplicate_of:
+            print(f"{'  ' * depth}Near-duplicate of {duplicate_of}, skipped")
+            with self.counter_lock:
+                self.duplicates += 1
+                with open(self.base_output_dir / "duplicates.tsv", 'a', encoding='utf-8') as f:
+                    f.write(f"{url}\t{duplicate_of}\n")
+            self.journal.note('page', ok=True, unchanged=False, dup=duplicate_of)
+            self.record_metrics(url, data)
+            return []
         
-        # Save the scraped content
-        if self.save_markdown(data):
-            if data['success']:
+        # Save the scraped content (pages unchanged since the last crawl are not rewritten)
+        if data.get('not_modified'):
+            with self.counter_lock:
+                self.unchanged += 1
+            saved = True
+        else:
+            with timed(data.setdefault('timings', {}), 'write'):
+                saved = self.save_markdown(data)
+        self.record_metrics(url, data)
+        with self.counter_lock:
+            if saved and data['success']:
                 self.successful += 1
             else:
                 self.failed += 1
+        if fingerprint is not None:
+            # The fingerprint lets --resume rebuild the near-duplicate index
+            self.journal.note('page', ok=bool(saved and data['success']), unchanged=False, u=url,
+                              fp=NearDuplicateIndex.encode(fingerprint))
         else:
-            self.failed += 1
+            self.journal.note('page', ok=bool(saved and data['success']), unchanged=bool(data.get('not_modified')))
+        
+        # Follow links if we haven't reached max depth
+        if depth >= self.max_depth or not data.get('success') or not data.get('links'):
+            return []
         
-        # Be respectful - add delay between requests
-        time.sleep(2)
+        print(f"{'  ' * depth}Found {len(data['links'])} links at depth {depth}")
         
-        # Recursively scrape links if we haven't reached max depth
-        if depth < self.max_depth and data.get('success') and data.get('links'):
-            print(f"{'  ' * depth}Found {len(data['links'])} links at depth {depth}")
-            
-            # Limit number of links to follow per page
-            links_to_follow = data['links'][:10]  # Follow max 10 links per page
-            
-            for link in links_to_follow:
-                # Only follow links from the same domain or if depth is 0
-                if depth == 0 or urlparse(link).netloc == urlparse(url).netloc:
-                    self.scrape_recursive(link, depth + 1)
+        # Only follow links from the same domain or if depth is 0; the crawl
+        # engine scores them and keeps the best links_per_page
+        anchors = data.get('anchors', {})
+        page_domain = urlparse(url).netloc
+        return [(link, anchors.get(link, '')) for link in data['links']
+                if depth == 0 or urlparse(link).netloc == page_domain]
+    
+    def record_metrics(self, url, data):
+        """Feed a fetched page's status, size and phase timings to the crawl metrics"""
+        fetch = data.get('fetch')
+        if fetch and fetch['status'] < 400:
+            self.metrics.page(url, fetch['host'], fetch['status'], fetch['bytes'],
+                              data.get('timings', {}), fetch['retries'])
+    
+    def crawl(self, urls, resume_state=None):
+        """Crawl the source URLs concurrently with per-host politeness"""
+        engine = CrawlEngine(
+            self.crawl_page,
+            max_depth=self.max_depth,
+            workers=self.workers,
+            host_delay=self.host_delay,
+            host_max_in_flight=self.host_max_in_flight,
+            journal=self.journal,
+            visited=self.visited_urls,
+            robots=self.robots,
+            links_per_page=self.links_per_page,
+            max_pages=self.max_pages,
+            rate_limiter=self.rate_limiter
+        )
+        if resume_state:
+            engine.restore(resume_state['pending'], resume_state['seen'])
+        engine.seed(urls)
+        if self.sitemap_seeder and urls:
+            self.sitemap_seeder.seed(engine, urls)
+        engine.run()
+    
+    def load_resume_state(self):
+        """Rebuild frontier and counters from the journal of an interrupted crawl"""
+        pending, seen, completed, notes = self.journal.load()
+        
+        for note in notes:
+            if note.get('k') != 'page':
+                continue
+            if note.get('dup'):
+                self.duplicates += 1
+                continue
+            if note.get('fp') and self.near_dup:
+                self.near_dup.add(note['u'], NearDuplicateIndex.decode(note['fp']))
+            if note.get('unchanged'):
+                self.unchanged += 1
+            if note.get('ok'):
+                self.successful += 1
+            else:
+                self.failed += 1
+        
+        # Continue file numbering after the files already written
+        numbers = [int(f.name[:4]) for d in (self.output_dir, self.html_dir)
+                   for f in d.iterdir() if f.name[:4].isdigit()]
+        self.file_counter = max(numbers, default=0)
+        
+        return {'pending': pending, 'seen': seen, 'completed': completed}
     
     def run(self):
         """Main scraping process"""
-        urls = self.get_user_urls()
-        
-        if not urls:
-            print("No URLs provided.")
-            return
+        self.successful = 0
+        self.failed = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        
+        resume_state = None
+        if self.resume_dir:
+            resume_state = self.load_resume_state()
+            urls = []
+            print(f"Resuming crawl in {self.base_output_dir.absolute()}")
+            print(f"  Completed: {len(resume_state['completed'])} pages, pending: {len(resume_state['pending'])} URLs")
+            if not resume_state['pending']:
+                print("Nothing left to crawl.")
+                return
+        else:
+            urls = self.get_user_urls()
+            
+            if not urls:
+                print("No URLs provided.")
+                return
         
-        print(f"\nStarting scrape of {len(urls)} URLs")
+        print(f"\nStarting scrape of {len(urls) or len(resume_state['pending'])} URLs")
         print(f"Max depth: {self.max_depth}")
+        print(f"Workers: {self.workers} (per host: {self.host_max_in_flight} in flight, {self.host_delay}s delay{', adaptive' if self.rate_limiter else ''})")
         print(f"Output directory: {self.base_output_dir.absolute()}")
         print(f"  Content: {self.output_dir.name}/")
         print(f"  Media: {self.media_dir.name}/")
         print(f"  HTML Source: {self.html_dir.name}/")
         print("-" * 60)
         
-        self.successful = 0
-        self.failed = 0
-        
-        for url in urls:
-            self.scrape_recursive(url, depth=0)
+        self.metrics.start()
+        try:
+            self.crawl(urls, resume_state)
+        finally:
+            self.metrics.close()
+            if self.rate_limiter:
+                # Learned host rates are kept even if the crawl is interrupted
+                self.rate_limiter.close()
+        self.media_store.close()
+        self.media_counter = sum(1 for _ in self.media_dir.iterdir())
         
         print("-" * 60)
         print(f"\nScraping complete!")
         print(f"Successful: {self.successful}")
         print(f"Failed: {self.failed}")
+        print(f"Unchanged since last crawl (304): {self.unchanged}")
+        if self.near_dup:
+            print(f"Near-duplicates skipped: {self.duplicates} (see duplicates.tsv)")
+        print(f"HTTP cache: {self.http_cache.summary()}")
         print(f"Total content files: {self.file_counter}")
         print(f"Total media files: {self.media_counter}")
+        print(f"Media downloads: {self.media_store.downloaded} new, {self.media_store.reused} already in {self.media_store.store_dir}/")
         print(f"URLs visited: {len(self.visited_urls)}")
+        print(f"Metrics: {self.metrics.summary()}")
+        print(f"Mean time per page: {self.metrics.phase_summary() or 'n/a'} (metrics.jsonl / metrics.prom)")
+        if self.archive:
+            self.archive.close()
+            print(f"HTML archive: {self.archive.summary()}")
+        if self.robots:
+            print(f"Disallowed by robots.txt: {self.robots.disallowed}")
+        if self.rate_limiter:
+            print(f"Host rates: {self.rate_limiter.summary()}")
+        self.visited_urls.close()
+        self.http_cache.close()
         print(f"\nOutput saved to: {self.base_output_dir.absolute()}")
 
+# Offline re-extraction: one bare WebScraper per worker process, so the
+# extraction and markdown code is exactly what a crawl runs
+reextract_scraper = None
+
+def init_reextract_worker(output_dir):
+    global reextract_scraper
+    # Bare instance: __init__ would create a new output directory and HTTP state
+    reextract_scraper = WebScraper.__new__(WebScraper)
+    reextract_scraper.output_dir = Path(output_dir)
+    reextract_scraper.media_extensions = set(MEDIA_EXTENSIONS)
+    reextract_scraper.extractor = PageExtractor(reextract_scraper.media_extensions)
+
+def reextract_page(task):
+    """Extract one saved page and write its markdown; task = (number, depth, path or None, url, html)"""
+    number, depth, path, url, html = task
+    if path is not None:
+        url, html = read_html_source(path)
+    page = reextract_scraper.extractor.extract(html, url)
+    data = {
+        'title': page['title'] or urlparse(url).netloc,
+        'url': url,
+        'content': page['markdown'],
+        'links': page['links'],
+        'media': [],
+        'success': True,
+        'depth': depth
+    }
+    return reextract_scraper.save_markdown(data, file_number=number)
+
+def reextract_tasks(source_dir):
+    """Tasks for every page in html_source/ and archive/ of a crawl directory"""
+    unnumbered = []
+    last_number = 0
+    for path in sorted((source_dir / "html_source").glob('*.html')):
+        match = re.match(r'(\d+)_D(\d+)_', path.name)
+        if match:
+            last_number = max(last_number, int(match.group(1)))
+            yield int(match.group(1)), int(match.group(2)), str(path), None, None
+        else:
+            unnumbered.append(path)
+    # Pages without a number of their own (archived ones never got one) are
+    # numbered after the saved files, so no two pages share an output file
+    for last_number, path in enumerate(unnumbered, last_number + 1):
+        yield last_number, 0, str(path), None, None
+    if (source_dir / "archive").is_dir():
+        for number, (url, warc_headers, http_headers, body) in enumerate(WarcReader(source_dir / "archive").records(),
+                                                                           last_number + 1):
+            yield number, 0, None, url, body
+
+def reextract(source_dir, processes=None):
+    """Regenerate markdown from a crawl's saved HTML on all cores, without network access"""
+    source_dir = Path(source_dir)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_dir = source_dir / f"content_reextracted_{timestamp}"
+    output_dir.mkdir(parents=True)
+    processes = processes or os.cpu_count() or 1
+    
+    print(f"Re-extracting {source_dir.absolute()} with {processes} processes")
+    print(f"Output directory: {output_dir.absolute()}")
+    print("-" * 60)
+    
+    start = time.perf_counter()
+    finished = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_reextract_worker,
+                             initargs=(str(output_dir),)) as executor:
+        # Bounded submission: archive pages carry their HTML, so don't queue them all at once
+        pending = set()
+        for task in reextract_tasks(source_dir):
+            pending.add(executor.submit(reextract_page, task))
+            if len(pending) >= processes * 8:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                finished.extend(done)
+        finished.extend(pending)
+    
+    saved = failed = 0
+    for future in finished:
+        try:
+            ok = future.result()
+        except Exception as e:
+            print(f"Error re-extracting: {str(e)}")
+            ok = False
+        if ok:
+            saved += 1
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    
+    print("-" * 60)
+    print(f"Re-extracted: {saved} pages, failed: {failed}")
+    print(f"Time: {elapsed:.2f}s ({(saved + failed) / elapsed if elapsed else 0:.1f} pages/s)")
+    print(f"Output saved to: {output_dir.absolute()}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Web Scraper with Media Collection")
+    parser.add_argument('--resume', metavar='OUTPUT_DIR',
+                        help="continue an interrupted crawl from its scraped_content_* directory")
+    parser.add_argument('--reextract', metavar='OUTPUT_DIR',
+                        help="regenerate markdown offline from a crawl's html_source/ (and archive/) on all cores")
+    parser.add_argument('--processes', type=int,
+                        help="worker processes for --reextract (default: all cores)")
+    parser.add_argument('--ignore-robots', action='store_true',
+                        help="do not fetch or honor robots.txt")
+    parser.add_argument('--sitemaps', action='store_true',
+                        help="also seed the crawl from each source site's sitemap.xml")
+    parser.add_argument('--links-per-page', type=int, default=10,
+                        help="follow at most this many of the best-scored new links from each page (default: 10)")
+    parser.add_argument('--max-pages', type=int,
+                        help="stop after fetching this many pages")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="save and follow pages even if their content nearly duplicates an earlier page")
+    parser.add_argument('--archive', choices=('gzip', 'zstd'),
+                        help="store HTML sources as compressed WARC records in archive/ instead of one file per page")
+    parser.add_argument('--visited', choices=VISITED_BACKENDS, default='memory',
+                        help="visited-URL set: exact in memory, Bloom filter, or SQLite on disk for very large crawls")
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help="keep a fixed delay between requests to a host instead of adapting it to the server")
+    parser.add_argument('--metrics', choices=('both', 'jsonl', 'prometheus', 'off'), default='both',
+                        help="crawl metrics output: per-page metrics.jsonl and/or Prometheus-style metrics.prom")
+    args = parser.parse_args()
+    
+    if args.reextract:
+        reextract(args.reextract, args.processes)
+        sys.exit(0)
+    
     # You can adjust max_depth here (0 = only source URLs, 1 = source + their links, etc.)
+    scraper = None
     try:
-        scraper = WebScraper(max_depth=1)
+        scraper = WebScraper(max_depth=1, resume_dir=args.resume, visited_backend=args.visited,
+                             respect_robots=not args.ignore_robots, use_sitemaps=args.sitemaps,
+                             links_per_page=args.links_per_page, max_pages=args.max_pages,
+                             near_dup_threshold=None if args.keep_duplicates else 0.8, archive=args.archive, metrics=args.metrics,
+                             adaptive_rate=not args.fixed_rate)
         scraper.run()
     except KeyboardInterrupt:
         print("\n\nScraping interrupted by user.")
+        if scraper:
+            print(f"Resume with: python {sys.argv[0]} --resume {scraper.base_output_dir}")
     except Exception as e:
         print(f"\n\nError: {str(e)}")